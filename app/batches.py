@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from .config import settings
+from .jobs import JobStore, job_store
+from .scheduler import QueueFullError
+from .schemas import AnalyzeRequest, Batch, BatchItem, BatchProgress, Job
+from .storage import read_json, write_json
+
+
+logger = logging.getLogger(__name__)
+
+
+# find_or_create calls in flight while a batch is submitted.
+_SUBMIT_CONCURRENCY = 16
+
+_BATCH_ID = re.compile(r"[0-9a-f]{32}")
+
+_RUNNING = {"downloading", "transcribing", "fact_checking", "translating"}
+
+
+class InvalidBatchError(ValueError):
+    pass
+
+
+async def parse_jsonl(chunks: AsyncIterator[bytes], *, max_items: int) -> list[AnalyzeRequest]:
+    """`AnalyzeRequest`s from a streamed JSONL body, one object per line; blank lines are skipped."""
+    requests: list[AnalyzeRequest] = []
+    buffer = b""
+    line_no = 0
+
+    def take(line: bytes) -> None:
+        nonlocal line_no
+        line_no += 1
+        if not line.strip():
+            return
+        if len(requests) >= max_items:
+            raise InvalidBatchError(f"A batch holds at most {max_items} items.")
+        try:
+            requests.append(AnalyzeRequest.model_validate_json(line))
+        except ValidationError as e:
+            raise InvalidBatchError(f"Line {line_no}: {e.errors()[0]['msg']}") from e
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            take(line)
+    take(buffer)
+    if not requests:
+        raise InvalidBatchError("The batch is empty.")
+    return requests
+
+
+class BatchStore:
+    """
+    Batches of analyze requests. Items are deduplicated against each other
+    and against existing jobs by `JobStore._cache_key`, and each batch is
+    queued as its own scheduler group so batches and single requests take
+    turns. Only the item -> job mapping is stored; progress is derived from
+    the job statuses in the history index.
+    """
+
+    def __init__(self, base_dir: Path, jobs: JobStore):
+        self.batches_dir = base_dir / "batches"
+        self._jobs = jobs
+
+    def _batch_path(self, batch_id: str) -> Path:
+        return self.batches_dir / f"{batch_id}.json"
+
+    async def create(self, requests: list[AnalyzeRequest], api_keys: list[Optional[str]]) -> Batch:
+        """Submit every request; `api_keys[i]` is the resolved key for item i, None if there is none."""
+        batch_id = uuid4().hex
+        items: list[BatchItem] = []
+        first_by_key: dict[str, int] = {}
+        for index, (req, api_key) in enumerate(zip(requests, api_keys)):
+            item = BatchItem(
+                index=index,
+                url=req.url,
+                output_language=(req.output_language or "").strip().lower() or "ar",
+                provider=req.provider,
+            )
+            key = JobStore._cache_key(req.url, req.output_language, req.provider)
+            if not api_key:
+                item.error = f"{req.provider.title()} API key is required."
+            elif key in first_by_key:
+                item.duplicate_of = first_by_key[key]
+            else:
+                first_by_key[key] = index
+            items.append(item)
+
+        sem = asyncio.Semaphore(_SUBMIT_CONCURRENCY)
+
+        async def create_job(index: int) -> tuple[Job, bool]:
+            req = requests[index]
+            async with sem:
+                return await self._jobs.find_or_create(
+                    url=req.url,
+                    output_language=req.output_language,
+                    provider=req.provider,
+                    force=req.force,
+                    api_key=api_keys[index],
+                    mode=req.mode,
+                )
+
+        unique = list(first_by_key.values())
+        created = await asyncio.gather(*(create_job(i) for i in unique))
+        # Enqueued in submission order, so the batch is worked through front to back.
+        for index, (job, cached) in zip(unique, created):
+            item = items[index]
+            item.job_id, item.cached = job.id, cached
+            if job.status in {"completed", "failed"}:
+                continue
+            try:
+                await self._jobs.submit(job.id, api_key=api_keys[index], group=batch_id)
+            except QueueFullError as e:
+                # A joined job belongs to whoever created it and keeps its course; the item follows it.
+                if not cached:
+                    await self._jobs.update(job.id, status="failed", progress=100, error=str(e))
+        for item in items:
+            if item.duplicate_of is not None:
+                first = items[item.duplicate_of]
+                item.job_id, item.cached = first.job_id, True
+
+        data = {
+            "id": batch_id,
+            "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            "items": [item.model_dump(mode="json", exclude={"status"}) for item in items],
+        }
+        await asyncio.to_thread(write_json, self._batch_path(batch_id), data)
+        logger.info("Batch %s: %d item(s), %d job(s)", batch_id, len(items), len(unique))
+        return await self._with_progress(data, include_items=True)
+
+    async def _read(self, batch_id: str) -> Optional[dict[str, Any]]:
+        if not _BATCH_ID.fullmatch(batch_id):
+            return None
+        return await asyncio.to_thread(read_json, self._batch_path(batch_id))
+
+    async def get(self, batch_id: str, *, include_items: bool = True) -> Optional[Batch]:
+        data = await self._read(batch_id)
+        return await self._with_progress(data, include_items=include_items) if data else None
+
+    async def _with_progress(self, data: dict[str, Any], *, include_items: bool) -> Batch:
+        items = [BatchItem.model_validate(item) for item in data["items"]]
+        job_ids = list(dict.fromkeys(item.job_id for item in items if item.job_id))
+        statuses = await self._jobs.statuses(job_ids)
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job_id in job_ids:
+            # The index is written shortly after the job itself; not there yet means queued.
+            status = statuses.get(job_id, "queued")
+            counts["running" if status in _RUNNING else status] += 1
+        for item in items:
+            if item.job_id:
+                item.status = statuses.get(item.job_id, "queued")
+        finished = counts["completed"] + counts["failed"]
+        progress = BatchProgress(
+            items=len(items),
+            jobs=len(job_ids),
+            cached=sum(1 for item in items if item.cached and item.duplicate_of is None),
+            duplicates=sum(1 for item in items if item.duplicate_of is not None),
+            rejected=sum(1 for item in items if item.error),
+            progress=100 if not job_ids else finished * 100 // len(job_ids),
+            **counts,
+        )
+        return Batch(
+            id=data["id"],
+            created_at=data["created_at"],
+            status="completed" if finished == len(job_ids) else "running",
+            progress=progress,
+            items=items if include_items else [],
+        )
+
+    async def export(self, batch_id: str) -> AsyncIterator[bytes]:
+        """One JSON line per item, in submission order, with the job's report if it completed."""
+        data = await self._read(batch_id)
+        for raw in (data or {}).get("items", []):
+            item = BatchItem.model_validate(raw)
+            record: dict[str, Any] = item.model_dump(mode="json")
+            record["report"] = None
+            # Only report fields are exported, so transcripts and segments stay on disk.
+            job = await self._jobs.get(item.job_id, content=False) if item.job_id else None
+            if job:
+                record["status"] = job.status
+                record["error"] = item.error or job.error
+                report = await self._jobs.report(job)
+                if report:
+                    record["report"] = report.model_dump(mode="json")
+            yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+batch_store = BatchStore(settings.data_dir, job_store)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+
+from .schemas import CaptionInfo
+
+
+_TIMING = re.compile(r"^\s*(\d{1,2}:)?\d{2}:\d{2}[.,]\d{3}\s*-->")
+_INLINE_TAG = re.compile(r"<[^>]+>")
+_NOISE = re.compile(r"\[(?:music|applause|laughter|silence|music playing|inaudible|musique|موسيقى)\]", re.IGNORECASE)
+
+
+def _base_language(code: str) -> str:
+    return code.split("-")[0].lower()
+
+
+def select_track(info: dict[str, Any], *, allow_auto: bool = True) -> Optional[tuple[str, str]]:
+    """
+    Pick a caption track in the video's spoken language from yt-dlp metadata.
+    Returns (language, "manual" | "auto"), or None when nothing suitable is listed.
+    """
+    manual = {k: v for k, v in (info.get("subtitles") or {}).items() if v and k != "live_chat"}
+    auto = {k: v for k, v in (info.get("automatic_captions") or {}).items() if v}
+    spoken = _base_language(str(info.get("language") or ""))
+
+    if spoken:
+        for lang in manual:
+            if _base_language(lang) == spoken:
+                return lang, "manual"
+    elif len(manual) == 1:
+        return next(iter(manual)), "manual"
+
+    if not allow_auto:
+        return None
+    # YouTube lists the untranslated auto track as "<lang>-orig"; everything else is machine-translated.
+    for lang in auto:
+        if lang.endswith("-orig"):
+            return lang, "auto"
+    if spoken:
+        for lang in auto:
+            if lang.lower() == spoken:
+                return lang, "auto"
+    return None
+
+
+def vtt_to_text(vtt: str) -> str:
+    """
+    Flatten WebVTT cues into plain text. Rolling auto-captions repeat the previous
+    line in every cue, so consecutive duplicate lines are dropped.
+    """
+    lines: list[str] = []
+    started = False
+    for raw in vtt.splitlines():
+        line = raw.strip()
+        if _TIMING.match(line):
+            started = True
+            continue
+        if not started or not line or line.isdigit() or line.startswith("NOTE"):
+            continue
+        text = _NOISE.sub("", _INLINE_TAG.sub("", line)).replace("&nbsp;", " ").replace("&amp;", "&")
+        text = re.sub(r"\s+", " ", text).strip()
+        if not text or (lines and lines[-1] == text):
+            continue
+        lines.append(text)
+    return "\n".join(lines)
+
+
+def assess(text: str, *, duration: Optional[float], min_words: int, min_words_per_minute: float) -> Optional[str]:
+    """Return a reason the captions are not good enough to replace transcription, or None if they are."""
+    words = len(text.split())
+    if words < min_words:
+        return f"only {words} words"
+    if duration and duration > 0:
+        per_minute = words / (duration / 60)
+        if per_minute < min_words_per_minute:
+            return f"{per_minute:.0f} words/minute is too sparse"
+    return None
+
+
+def caption_info(language: str, kind: str, text: str) -> CaptionInfo:
+    return CaptionInfo(language=language, kind=kind, words=len(text.split()))
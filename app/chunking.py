@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import re
+import subprocess
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .ytdlp_audio import DownloadError
+
+
+class AudioChunk(NamedTuple):
+    path: Path
+    start: float
+    end: float  # cut point; the file itself runs `overlap` seconds past it
+
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def detect_silences(path: Path, *, noise_db: float = -35.0, min_silence: float = 0.4) -> list[tuple[float, float]]:
+    """(start, end) of every silence ffmpeg's silencedetect finds in the file."""
+    proc = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostats", "-i", str(path),
+            "-af", f"silencedetect=n={noise_db}dB:d={min_silence}",
+            "-f", "null", "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise DownloadError((proc.stderr or "ffmpeg silencedetect failed").strip())
+
+    silences: list[tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in proc.stderr.splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    return silences
+
+
+def plan_chunks(
+    duration: float, silences: list[tuple[float, float]], *, target: float, overlap: float
+) -> list[tuple[float, float, float]]:
+    """
+    Split [0, duration] into pieces of roughly `target` seconds, cutting at the
+    middle of the silence closest to each target point (hard cut if there is none
+    nearby). Returns (start, cut, file_end) with file_end = cut + overlap.
+    """
+    midpoints = sorted((s + e) / 2 for s, e in silences)
+    cuts: list[float] = []
+    pos = 0.0
+    while duration - pos > target * 1.25:
+        ideal = pos + target
+        lo, hi = pos + target * 0.6, pos + target * 1.15
+        candidates = [m for m in midpoints if lo <= m <= hi]
+        cut = min(candidates, key=lambda m: abs(m - ideal)) if candidates else ideal
+        cuts.append(cut)
+        pos = cut
+
+    bounds = [0.0, *cuts, duration]
+    return [(a, b, min(duration, b + overlap)) for a, b in zip(bounds, bounds[1:])]
+
+
+def split_audio(
+    path: Path,
+    out_dir: Path,
+    *,
+    duration: float,
+    target_seconds: float,
+    overlap_seconds: float,
+    noise_db: float = -35.0,
+    min_silence: float = 0.4,
+) -> list[AudioChunk]:
+    """Cut `path` on silence boundaries into overlapping chunk files under `out_dir`."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob("chunk_*"):
+        stale.unlink()
+
+    silences = detect_silences(path, noise_db=noise_db, min_silence=min_silence)
+    chunks: list[AudioChunk] = []
+    for i, (start, cut, file_end) in enumerate(
+        plan_chunks(duration, silences, target=target_seconds, overlap=overlap_seconds)
+    ):
+        chunk_path = out_dir / f"chunk_{i:04d}{path.suffix}"
+        proc = subprocess.run(
+            [
+                "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                "-ss", f"{start:.3f}", "-t", f"{file_end - start:.3f}",
+                "-i", str(path), "-c", "copy", str(chunk_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0 or not chunk_path.exists():
+            raise DownloadError((proc.stderr or "ffmpeg failed to cut audio").strip())
+        chunks.append(AudioChunk(chunk_path, start, cut))
+    return chunks
+
+
+def _norm_words(text: str) -> list[str]:
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def _drop_leading_words(text: str, count: int) -> str:
+    """Remove the first `count` word tokens from `text`, keeping the rest verbatim."""
+    if count <= 0:
+        return text
+    matches = list(_WORD.finditer(text))
+    if count >= len(matches):
+        return ""
+    return text[matches[count].start():]
+
+
+def stitch(texts: list[str], *, max_overlap_words: int = 40, min_overlap_words: int = 2) -> list[str]:
+    """
+    De-duplicate the words repeated at chunk overlaps: for each chunk, drop the
+    longest prefix that equals the tail of the previous chunk (case/punctuation
+    insensitive). Returns the trimmed text of every chunk, in order.
+    """
+    out: list[str] = []
+    prev_words: list[str] = []
+    for text in texts:
+        text = (text or "").strip()
+        words = _norm_words(text)
+        overlap = 0
+        for k in range(min(max_overlap_words, len(prev_words), len(words)), min_overlap_words - 1, -1):
+            if prev_words[-k:] == words[:k]:
+                overlap = k
+                break
+        trimmed = _drop_leading_words(text, overlap).strip()
+        out.append(trimmed)
+        prev_words = words
+    return out
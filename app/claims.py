@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .schemas import ClaimCheck, ClaimVerdict, FactCheckReport, Source
+from .storage import append_jsonl, file_lock, read_jsonl_from, write_text_atomic
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?؟。！？])\s+|\n+")
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_SHINGLE = 4
+_PRIME = (1 << 61) - 1
+
+
+def _perm_params() -> list[tuple[int, int]]:
+    params = []
+    for i in range(_NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-{i}".encode("ascii"), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMS = _perm_params()
+
+
+def normalize_claim(text: str) -> str:
+    return " ".join(w.lower() for w in _WORD.findall(text or ""))
+
+
+def _shingles(normalized: str) -> set[int]:
+    """Character 4-grams, hashed; language-agnostic and tolerant of small rewordings."""
+    if len(normalized) <= _SHINGLE:
+        grams = {normalized} if normalized else set()
+    else:
+        grams = {normalized[i : i + _SHINGLE] for i in range(len(normalized) - _SHINGLE + 1)}
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams}
+
+
+def minhash(normalized: str) -> tuple[int, ...]:
+    shingles = _shingles(normalized)
+    if not shingles:
+        return ()
+    return tuple(min((a * h + b) % _PRIME for h in shingles) for a, b in _PERMS)
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the two texts' shingle sets."""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / _NUM_PERM
+
+
+def _bands(sig: tuple[int, ...]) -> list[tuple[int, int]]:
+    return [(i, hash(sig[i * _ROWS : (i + 1) * _ROWS])) for i in range(_BANDS)]
+
+
+def split_sentences(text: str, *, min_words: int = 4) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text or "") if len(_WORD.findall(s)) >= min_words]
+
+
+class ClaimRecord(BaseModel):
+    """A verified claim from a completed report, reusable as context for later fact-checks."""
+
+    claim: str
+    verdict: ClaimVerdict
+    confidence: int
+    explanation: str
+    correction: Optional[str] = None
+    sources: List[Source] = Field(default_factory=list)
+    output_language: str
+    job_id: str
+    checked_at: datetime
+
+
+class ClaimMatch(BaseModel):
+    record: ClaimRecord
+    similarity: float
+    matched_text: str
+
+
+class ClaimCache:
+    """
+    Claims from completed reports, deduplicated by normalized text and indexed
+    with MinHash + LSH for near-duplicate lookup. Persisted as an append-only
+    JSON-lines log shared by all worker processes: each process reads the
+    lines appended since its last look before every lookup, and appends and
+    compactions happen under a file lock after catching up, so records written
+    by other processes are never dropped.
+
+    Claim texts are in the report's output language, so matches are only
+    found against transcripts in that same language.
+    Methods do blocking I/O and are meant to be called via `asyncio.to_thread`.
+    """
+
+    def __init__(self, base_dir: Path, *, max_entries: int = 50000):
+        self.log_path = base_dir / "claims" / "claims.jsonl"
+        self.lock_path = base_dir / "claims" / "claims.lock"
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._records: Dict[str, ClaimRecord] = {}
+        self._signatures: Dict[str, tuple[int, ...]] = {}
+        self._buckets: Dict[tuple[int, int], set[str]] = {}
+        self._log_lines = 0
+        # Which log file (inode) has been read, and how far.
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+
+    def _index(self, record: ClaimRecord) -> None:
+        key = normalize_claim(record.claim)
+        if not key:
+            return
+        if key in self._records:
+            self._unindex(key)
+        sig = minhash(key)
+        self._records[key] = record
+        self._signatures[key] = sig
+        for band in _bands(sig):
+            self._buckets.setdefault(band, set()).add(key)
+        while len(self._records) > self.max_entries:
+            oldest = min(self._records, key=lambda k: self._records[k].checked_at)
+            self._unindex(oldest)
+
+    def _unindex(self, key: str) -> None:
+        sig = self._signatures.pop(key, ())
+        self._records.pop(key, None)
+        for band in _bands(sig) if sig else ():
+            keys = self._buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[band]
+
+    def _refresh(self) -> None:
+        """Index lines appended to the log since the last call; start over if it was compacted meanwhile."""
+        try:
+            stat = self.log_path.stat()
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+            self._records.clear()
+            self._signatures.clear()
+            self._buckets.clear()
+            self._log_lines = 0
+            self._log_inode = stat.st_ino
+            self._log_offset = 0
+        if stat.st_size == self._log_offset:
+            return
+        records, self._log_offset = read_jsonl_from(self.log_path, self._log_offset)
+        for data in records:
+            try:
+                self._index(ClaimRecord.model_validate(data))
+            except ValueError:
+                continue
+            self._log_lines += 1
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add_report(
+        self,
+        report: FactCheckReport,
+        *,
+        job_id: str,
+        output_language: str,
+        only: Optional[Iterable[int]] = None,
+    ) -> int:
+        """
+        Index the report's checkable claims; returns how many were added.
+        `only` restricts indexing to the claims at those positions, e.g. the
+        ones actually verified by this job (not reused or failed checks).
+        """
+        positions = set(range(len(report.claims))) if only is None else set(only)
+        checked_at = report.generated_at if report.generated_at.tzinfo else report.generated_at.replace(tzinfo=timezone.utc)
+        records = [
+            ClaimRecord(
+                claim=c.claim,
+                verdict=c.verdict,
+                confidence=c.confidence,
+                explanation=c.explanation,
+                correction=c.correction,
+                sources=c.sources,
+                output_language=output_language,
+                job_id=job_id,
+                checked_at=checked_at,
+            )
+            for i, c in enumerate(report.claims)
+            if i in positions and c.verdict != "not_a_factual_claim" and normalize_claim(c.claim)
+        ]
+        if not records:
+            return 0
+        with self._lock, file_lock(self.lock_path):
+            append_jsonl(self.log_path, [r.model_dump(mode="json") for r in records])
+            # Picks up this append along with anything other processes wrote before it.
+            self._refresh()
+            if self._log_lines > 2 * max(len(self._records), 1000):
+                self._compact()
+        return len(records)
+
+    def _compact(self) -> None:
+        """Rewrite the log from the index; call under the file lock, right after `_refresh`."""
+        lines = [r.model_dump_json() + "\n" for r in self._records.values()]
+        write_text_atomic(self.log_path, "".join(lines))
+        stat = self.log_path.stat()
+        self._log_inode, self._log_offset = stat.st_ino, stat.st_size
+        self._log_lines = len(lines)
+
+    def _candidates(self, text: str, threshold: float) -> list[tuple[str, float]]:
+        key = normalize_claim(text)
+        sig = minhash(key)
+        if not sig:
+            return []
+        keys: set[str] = set()
+        for band in _bands(sig):
+            keys |= self._buckets.get(band, set())
+        scored = [(k, similarity(sig, self._signatures[k])) for k in keys]
+        return [(k, s) for k, s in scored if s >= threshold]
+
+    def match(
+        self,
+        texts: Iterable[str],
+        *,
+        threshold: float,
+        max_age: Optional[timedelta] = None,
+        output_language: Optional[str] = None,
+        limit: int = 8,
+    ) -> list[ClaimMatch]:
+        """Best cached claim per matched record across `texts`, most similar first."""
+        cutoff = datetime.now(tz=timezone.utc) - max_age if max_age else None
+        best: Dict[str, ClaimMatch] = {}
+        with self._lock:
+            self._refresh()
+            for text in texts:
+                for key, score in self._candidates(text, threshold):
+                    record = self._records[key]
+                    if cutoff and record.checked_at < cutoff:
+                        continue
+                    if output_language and record.output_language != output_language:
+                        continue
+                    if key not in best or score > best[key].similarity:
+                        best[key] = ClaimMatch(record=record, similarity=round(score, 3), matched_text=text)
+        return sorted(best.values(), key=lambda m: m.similarity, reverse=True)[: max(0, limit)]
+
+    def match_transcript(self, transcript: str, **kwargs) -> list[ClaimMatch]:
+        """Match each transcript sentence, and each pair of adjacent sentences, against cached claims."""
+        sentences = split_sentences(transcript)
+        windows = sentences + [f"{a} {b}" for a, b in zip(sentences, sentences[1:])]
+        return self.match(windows, **kwargs)
+
+
+def as_prompt_context(matches: list[ClaimMatch]) -> list[dict]:
+    """Compact view of prior verdicts for the fact-check prompt."""
+    return [
+        {
+            "claim": m.record.claim,
+            "verdict": m.record.verdict,
+            "confidence": m.record.confidence,
+            "correction": m.record.correction,
+            "checked_at": m.record.checked_at.date().isoformat(),
+            "sources": [s.url for s in m.record.sources[:3]],
+        }
+        for m in matches
+    ]
+
+
+def to_claim_check(record: ClaimRecord) -> ClaimCheck:
+    return ClaimCheck(
+        claim=record.claim,
+        verdict=record.verdict,
+        confidence=record.confidence,
+        explanation=record.explanation,
+        correction=record.correction,
+        sources=record.sources,
+    )
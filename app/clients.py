@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from google import genai
+from google.genai import types as genai_types
+from openai import AsyncOpenAI
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+ClientKey = tuple[str, str, str]
+
+
+def _key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class ClientRegistry:
+    """
+    Provider SDK clients cached per (kind, API key hash, base URL), so calls
+    with the same credentials share one HTTP connection pool.
+
+    The least recently used client is dropped once `max_size` is exceeded.
+    Evicted clients are not closed here, since an in-flight call may still be
+    using them; they are released when garbage collected. `aclose`
+    closes everything at shutdown.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[ClientKey, Any]" = OrderedDict()
+
+    def get(self, kind: str, api_key: str, base_url: Optional[str], factory: Callable[[], Any]) -> Any:
+        key: ClientKey = (kind, _key_hash(api_key), base_url or "")
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+            client = factory()
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+            return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for kind, _, _ in self._clients:
+                counts[kind] = counts.get(kind, 0) + 1
+            return counts
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), OrderedDict()
+        for client in clients:
+            try:
+                aio = getattr(client, "aio", None)
+                if aio is not None:
+                    await aio.aclose()
+                result = client.close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.debug("Failed to close provider client", exc_info=True)
+
+
+registry = ClientRegistry(max_size=settings.client_cache_size)
+
+
+def server_key(provider: str) -> str:
+    """The operator-configured key for a provider ("" if none)."""
+    return {
+        "gemini": settings.gemini_api_key,
+        "openai": settings.openai_api_key,
+        "deepseek": settings.deepseek_api_key,
+    }.get(provider, "")
+
+
+def openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Shared asyncio OpenAI-compatible client (OpenAI itself, or DeepSeek via
+    `base_url`); must be used from the event loop it was created on.
+    """
+    key = api_key or settings.openai_api_key
+    base_url = base_url or settings.openai_base_url
+    return registry.get(
+        "openai",
+        key,
+        base_url,
+        lambda: AsyncOpenAI(api_key=key, base_url=base_url, timeout=settings.provider_timeout_seconds),
+    )
+
+
+def gemini_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    Shared Gemini client; the key is bound to the client rather than to
+    process-global state. Use `.aio` on it for the asyncio API.
+    """
+    key = api_key or settings.gemini_api_key
+    base_url = settings.gemini_base_url
+    return registry.get(
+        "gemini",
+        key,
+        base_url,
+        lambda: genai.Client(
+            api_key=key,
+            http_options=genai_types.HttpOptions(
+                base_url=base_url, timeout=int(settings.provider_timeout_seconds * 1000)
+            ),
+        ),
+    )
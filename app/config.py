@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -17,16 +17,123 @@ class Settings(BaseSettings):
     data_dir: Path = Path("data")
     ytdlp_cookies_file: Optional[Path] = None
 
+    # Persistence
+    write_coalesce_seconds: float = 0.25
+    index_compact_every: int = 1000
+    transcript_cache_enabled: bool = True
+    resolve_canonical_ids: bool = True
+    force_rerun_min_interval_seconds: float = 60
+    # Shared state for multiple worker processes: "sqlite", "local" (one process only) or "module:Class"
+    state_backend: str = "sqlite"
+    lease_ttl_seconds: float = 60
+    # How often event streams re-read jobs that run in another worker process
+    event_poll_interval_seconds: float = 1.0
+    # In-memory job cache (slim entries; running jobs are pinned)
+    job_cache_max_entries: int = 1000
+    job_cache_max_bytes: int = 32 * 1024 * 1024
+    job_cache_ttl_seconds: float = 3600
+
+    # Cross-video claim cache: prior verdicts offered as fact-check context
+    claim_cache_enabled: bool = True
+    claim_cache_similarity: float = 0.5
+    claim_cache_ttl_days: float = 30
+    claim_cache_max_context: int = 8
+    claim_cache_max_entries: int = 50000
+    claim_cache_reuse_similarity: float = 0.9
+
+    # Per-claim mode: extract, verify claims concurrently, compose
+    per_claim_max_claims: int = 20
+    per_claim_concurrency: int = 4
+    per_claim_output_tokens: int = 800
+
+    # Stream fact-check replies and publish the partial report this often
+    stream_reports: bool = True
+    stream_publish_interval_seconds: float = 0.5
+
+    # Audio extraction profile (speech-optimized by default)
+    audio_codec: Literal["opus", "flac", "mp3"] = "opus"
+    audio_sample_rate: int = 16000
+    audio_channels: int = 1
+    audio_bitrate: str = "24k"
+    audio_trim_silence: bool = False
+    audio_silence_threshold_db: float = -40.0
+    audio_silence_min_seconds: float = 0.7
+
+    # Chunked transcription for long audio
+    transcribe_chunk_threshold_seconds: float = 600
+    transcribe_max_upload_bytes: int = 24 * 1024 * 1024
+    transcribe_chunk_seconds: float = 300
+    transcribe_chunk_overlap_seconds: float = 2.0
+    transcribe_chunk_concurrency: int = 4
+
+    # Captions-first transcripts
+    captions_first: bool = True
+    captions_allow_auto: bool = True
+    captions_min_words: int = 30
+    captions_min_words_per_minute: float = 20.0
+
+    # Scheduling
+    max_concurrent_jobs: int = 8
+    max_queue_size: int = 1000
+    batch_max_items: int = 1000
+    download_concurrency: int = 4
+    transcribe_concurrency: int = 4
+    factcheck_concurrency: int = 8
+
+    # HTTP responses
+    compression_min_bytes: int = 1024
+    compression_brotli: bool = True
+
+    # Provider clients
+    client_cache_size: int = 32
+    provider_timeout_seconds: float = 600
+
+    # Provider rate limits per API key (0 = unlimited)
+    gemini_rpm: int = 60
+    gemini_tpm: int = 1_000_000
+    openai_rpm: int = 500
+    openai_tpm: int = 200_000
+    deepseek_rpm: int = 0
+    deepseek_tpm: int = 0
+    factcheck_output_tokens: int = 2000
+    # Limiters kept for distinct keys; idle ones beyond this are dropped, oldest first.
+    rate_limit_max_keys: int = 1024
+
+    # Per-stage execution policy: providers (comma-separated) tried after the
+    # job's own provider, using server keys; hedging starts the next one early
+    # when the current call is slower than its HEDGE_PERCENTILE latency.
+    # Requests that bring their own key only fail over to server keys when
+    # ALLOW_SERVER_KEY_FAILOVER is set. DeepSeek transcription always falls
+    # back to Gemini, then OpenAI, since DeepSeek has no transcription API.
+    transcribe_failover: str = ""
+    fact_check_failover: str = ""
+    translate_failover: str = ""
+    hedge_stages: str = ""
+    hedge_percentile: float = 95
+    hedge_min_samples: int = 20
+    allow_server_key_failover: bool = False
+
+    # Retries of transient stage failures (rate limits, timeouts, 5xx)
+    stage_max_attempts: int = 3
+    rate_limit_max_attempts: int = 8
+    retry_base_delay: float = 2.0
+    retry_max_delay: float = 30.0
+
     # Models
     gemini_model: str = "gemini-2.0-flash"
     openai_model: str = "gpt-4o"
     deepseek_model: str = "deepseek-chat"
+
+    # API endpoints; override to point at a proxy or a local stub (see bench/)
+    openai_base_url: Optional[str] = None
+    gemini_base_url: Optional[str] = None
+    deepseek_base_url: str = "https://api.deepseek.com"
     
     # Legacy support (can be removed later if unused)
     transcribe_model: str = "gemini-2.0-flash"
     factcheck_model: str = "gemini-2.0-flash"
 
-    @field_validator("ytdlp_cookies_file", mode="before")
+    @field_validator("ytdlp_cookies_file", "openai_base_url", "gemini_base_url", mode="before")
     @classmethod
     def _empty_str_to_none(cls, v):
         if v is None:
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from .config import settings
+from .schemas import ExecutionAttempt, ExecutionRecord
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+
+def _split(value: str) -> list[str]:
+    return [part.strip().lower() for part in (value or "").split(",") if part.strip()]
+
+
+# Providers that can't serve a stage at all, and who serves it in their place.
+_UNSUPPORTED = {"transcribe": {"deepseek"}}
+_SUBSTITUTES = {"transcribe": ["gemini", "openai"]}
+
+
+def stage_providers(stage: str, primary: str) -> list[str]:
+    """
+    The job's provider followed by the stage's configured failover providers,
+    deduplicated. A provider that can't serve the stage is replaced by the
+    stage's substitutes.
+    """
+    configured = _split(getattr(settings, f"{stage}_failover", ""))
+    candidates = [primary, *configured]
+    if primary in _UNSUPPORTED.get(stage, set()):
+        candidates[1:1] = _SUBSTITUTES.get(stage, [])
+    chain: list[str] = []
+    for provider in candidates:
+        if provider not in chain and provider not in _UNSUPPORTED.get(stage, set()):
+            chain.append(provider)
+    return chain
+
+
+def hedging_enabled(stage: str) -> bool:
+    return stage in _split(settings.hedge_stages)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per (stage, provider)."""
+
+    def __init__(self, window: int = 200):
+        self.window = max(1, window)
+        self._samples: Dict[tuple[str, str], Deque[float]] = {}
+
+    def observe(self, stage: str, provider: str, seconds: float) -> None:
+        samples = self._samples.get((stage, provider))
+        if samples is None:
+            samples = self._samples[(stage, provider)] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, stage: str, provider: str, pct: float, *, min_samples: int) -> Optional[float]:
+        samples = self._samples.get((stage, provider))
+        if not samples or len(samples) < max(1, min_samples):
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+latencies = LatencyTracker()
+
+
+async def execute(
+    stage: str,
+    providers: list[str],
+    run: Callable[[str], Awaitable[T]],
+    *,
+    hedge: bool = False,
+) -> tuple[T, ExecutionRecord]:
+    """
+    Run `run(provider)` with ordered failover: on an error the next provider
+    is tried. With `hedge`, if the running call hasn't answered within the
+    provider's p`HEDGE_PERCENTILE` latency, the next provider is started
+    alongside it; the first success wins and the other call is cancelled.
+    """
+    if not providers:
+        raise RuntimeError(f"No provider available for {stage}.")
+
+    pending = list(providers)
+    running: Dict[asyncio.Task, tuple[str, float, str]] = {}
+    attempts: list[ExecutionAttempt] = []
+    last_error: Optional[BaseException] = None
+
+    def launch(reason: str) -> None:
+        provider = pending.pop(0)
+        task = asyncio.create_task(run(provider))
+        running[task] = (provider, time.monotonic(), reason)
+
+    def hedge_timeout() -> Optional[float]:
+        if not hedge or not pending or len(running) != 1:
+            return None
+        provider, started, _ = next(iter(running.values()))
+        delay = latencies.percentile(
+            stage, provider, settings.hedge_percentile, min_samples=settings.hedge_min_samples
+        )
+        if delay is None:
+            return None
+        return max(0.0, started + delay - time.monotonic())
+
+    launch("primary")
+    try:
+        while running:
+            done, _ = await asyncio.wait(
+                list(running), timeout=hedge_timeout(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                logger.info("Hedging %s: starting %s alongside %s", stage, pending[0], next(iter(running.values()))[0])
+                launch("hedge")
+                continue
+
+            for task in done:
+                provider, started, reason = running.pop(task)
+                elapsed = round(time.monotonic() - started, 3)
+                error = task.exception()
+                if error is None:
+                    latencies.observe(stage, provider, elapsed)
+                    attempts.append(ExecutionAttempt(provider=provider, outcome="won", seconds=elapsed))
+                    for other, (other_provider, other_started, _) in running.items():
+                        other.cancel()
+                        attempts.append(
+                            ExecutionAttempt(
+                                provider=other_provider,
+                                outcome="cancelled",
+                                seconds=round(time.monotonic() - other_started, 3),
+                            )
+                        )
+                    running.clear()
+                    return task.result(), ExecutionRecord(
+                        stage=stage, provider=provider, reason=reason, attempts=attempts
+                    )
+                last_error = error
+                attempts.append(
+                    ExecutionAttempt(provider=provider, outcome="failed", seconds=elapsed, error=str(error))
+                )
+                logger.warning("%s via %s failed: %s", stage, provider, error)
+
+            if not running and pending:
+                launch("failover")
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise last_error or RuntimeError(f"{stage} failed on every provider.")
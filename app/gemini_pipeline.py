@@ -1,118 +1,280 @@
 from __future__ import annotations
 
 import json
+import re
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, Callable, Optional, Tuple
 
-import google.generativeai as genai
+from google.genai import types
 
+from .clients import gemini_client
 from .config import settings
-from .prompts import FACTCHECK_SYSTEM_PROMPT, build_factcheck_user_prompt
+from .prompts import (
+    FACTCHECK_SYSTEM_PROMPT,
+    TRANSLATE_SYSTEM_PROMPT,
+    build_factcheck_user_prompt,
+    build_translate_user_prompt,
+)
 from .schemas import FactCheckReport
+from .telemetry import timed
+from .translation import apply_translation, extract_translatable
 
 
 class GeminiError(RuntimeError):
     pass
 
 
-def _configure_gemini(api_key: Optional[str] = None):
-    """Configure Gemini API with the API key from settings or user-provided key."""
-    key = api_key or settings.gemini_api_key
-    if key:
-        genai.configure(api_key=key)
-
-
-def transcribe_audio_mp3(mp3_path: Path, api_key: Optional[str] = None) -> str:
-    """Transcribe an MP3 audio file using Gemini's audio capabilities."""
-    _configure_gemini(api_key)
-    
-    # Upload the audio file
-    audio_file = genai.upload_file(path=str(mp3_path))
-    
-    # Use Gemini model for transcription
-    model = genai.GenerativeModel(settings.transcribe_model)
-    
-    # Generate transcription
-    response = model.generate_content([
-        "Please transcribe the following audio file accurately. Provide only the transcription without any additional commentary.",
-        audio_file
-    ])
-    
-    return response.text
-
-
-def fact_check_transcript(
-    *, transcript: str, url: Optional[str] = None, output_language: str = "ar", api_key: Optional[str] = None
+_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+def _parse_json(text: str) -> Any:
+    """
+    Parse a JSON reply. Grounded (google_search) calls can't request a JSON
+    mime type, so the model may wrap the object in a Markdown fence or prose.
+    """
+    text = text.strip()
+    m = _FENCE.match(text)
+    if m:
+        text = m.group(1)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start : end + 1])
+
+
+def _usage(response: types.GenerateContentResponse) -> dict[str, Any]:
+    usage = response.usage_metadata
+    if not usage:
+        return {}
+    return {
+        "prompt_token_count": usage.prompt_token_count or 0,
+        "candidates_token_count": usage.candidates_token_count or 0,
+        "total_token_count": usage.total_token_count or 0,
+    }
+
+
+async def _generate(
+    client: Any,
+    *,
+    model: str,
+    contents: Any,
+    config: types.GenerateContentConfig,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> tuple[str, Optional[types.Candidate], dict[str, Any]]:
+    """
+    (output_text, last_candidate, usage). With `on_delta` the response is
+    streamed and each text fragment is passed to it as it arrives.
+    """
+    if on_delta is None:
+        response = await client.models.generate_content(model=model, contents=contents, config=config)
+        candidate = response.candidates[0] if response.candidates else None
+        return response.text or "", candidate, _usage(response)
+
+    parts: list[str] = []
+    candidate: Optional[types.Candidate] = None
+    grounding = None
+    usage: dict[str, Any] = {}
+    async for chunk in await client.models.generate_content_stream(model=model, contents=contents, config=config):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            on_delta(text)
+        if chunk.candidates:
+            candidate = chunk.candidates[0]
+            grounding = candidate.grounding_metadata or grounding
+        if chunk.usage_metadata:
+            usage = _usage(chunk)
+    if candidate is not None and grounding is not None and candidate.grounding_metadata is None:
+        candidate = candidate.model_copy(update={"grounding_metadata": grounding})
+    return "".join(parts), candidate, usage
+
+
+async def transcribe_audio_mp3(mp3_path: Path, api_key: Optional[str] = None) -> str:
+    """Transcribe an audio file (MP3, Ogg/Opus, FLAC) using Gemini's audio capabilities."""
+    client = gemini_client(api_key).aio
+
+    try:
+        # Upload the audio file
+        with timed("upload_seconds"):
+            audio_file = await client.files.upload(file=mp3_path)
+
+        # Generate transcription
+        response = await client.models.generate_content(
+            model=settings.transcribe_model,
+            contents=[
+                "Please transcribe the following audio file accurately. Provide only the transcription without any additional commentary.",
+                audio_file,
+            ],
+        )
+    except Exception as e:
+        raise GeminiError(f"Error calling Gemini API: {e}") from e
+
+    return response.text or ""
+
+
+async def fact_check_transcript(
+    *,
+    transcript: str,
+    url: Optional[str] = None,
+    output_language: str = "ar",
+    api_key: Optional[str] = None,
+    prior_checks: Optional[list[dict]] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> Tuple[FactCheckReport, dict[str, Any]]:
     """
     Perform fact-checking on the transcript using Gemini.
+    With `on_delta`, the reply is streamed and each text fragment passed to it.
     Returns (report, raw_response_dict).
     """
-    _configure_gemini(api_key)
-    
+    client = gemini_client(api_key).aio
+
     # Get the JSON schema for the response format
     schema = FactCheckReport.model_json_schema()
-    
+
     # Build the prompt
     user_prompt = build_factcheck_user_prompt(
-        transcript=transcript, 
-        url=url, 
-        output_language=output_language
-    )
-    
-    # Configure the model with grounding (web search)
-    model = genai.GenerativeModel(
-        settings.factcheck_model,
-        tools='google_search_retrieval',
+        transcript=transcript,
+        url=url,
+        output_language=output_language,
+        prior_checks=prior_checks,
     )
-    
+
     # Create the full prompt with system instructions
     full_prompt = f"{FACTCHECK_SYSTEM_PROMPT}\n\n{user_prompt}\n\nPlease respond with a valid JSON object matching this schema:\n{json.dumps(schema, indent=2)}"
-    
-    # Generate the response
+
+    # Generate the response, grounded with web search
     try:
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.GenerationConfig(
+        output_text, candidate, usage = await _generate(
+            client,
+            model=settings.factcheck_model,
+            contents=full_prompt,
+            config=types.GenerateContentConfig(
                 temperature=0.1,
-                response_mime_type="application/json",
-            )
+                tools=[types.Tool(google_search=types.GoogleSearch())],
+            ),
+            on_delta=on_delta,
         )
-        
-        output_text = response.text
+
         if not output_text:
             raise GeminiError("Empty model output.")
-        
+
         # Parse the JSON response
         try:
-            report_dict = json.loads(output_text)
+            report_dict = _parse_json(output_text)
         except json.JSONDecodeError as e:
             raise GeminiError(f"Model did not return valid JSON: {e}") from e
-        
+
         # Add timestamp if not present
         if "generated_at" not in report_dict:
             report_dict["generated_at"] = datetime.now(tz=timezone.utc).isoformat()
-        
+
         # Validate against the schema
         report = FactCheckReport.model_validate(report_dict)
-        
+
         # Build raw response data
+        grounding = candidate.grounding_metadata if candidate else None
         raw = {
             "model": settings.factcheck_model,
             "output_text": output_text,
-            "finish_reason": response.candidates[0].finish_reason if response.candidates else None,
-            "usage_metadata": {
-                "prompt_token_count": response.usage_metadata.prompt_token_count if response.usage_metadata else 0,
-                "candidates_token_count": response.usage_metadata.candidates_token_count if response.usage_metadata else 0,
-                "total_token_count": response.usage_metadata.total_token_count if response.usage_metadata else 0,
-            } if response.usage_metadata else {},
-            "grounding_metadata": response.candidates[0].grounding_metadata if response.candidates and hasattr(response.candidates[0], 'grounding_metadata') else None,
+            "finish_reason": candidate.finish_reason if candidate else None,
+            "usage_metadata": usage,
+            "grounding_metadata": grounding.model_dump(mode="json", exclude_none=True) if grounding else None,
         }
-        
+
         return report, raw
-        
+
     except Exception as e:
         if isinstance(e, GeminiError):
             raise
         raise GeminiError(f"Error calling Gemini API: {e}") from e
+
+
+async def translate_report(
+    *, report: FactCheckReport, output_language: str = "ar", api_key: Optional[str] = None
+) -> Tuple[FactCheckReport, dict[str, Any]]:
+    """
+    Translate the human-readable fields of an existing report with a single
+    ungrounded call. Verdicts, scores and sources are kept as-is.
+    """
+    client = gemini_client(api_key).aio
+
+    fields_json = json.dumps(extract_translatable(report), ensure_ascii=False, indent=2)
+    user_prompt = build_translate_user_prompt(fields_json=fields_json, output_language=output_language)
+
+    try:
+        response = await client.models.generate_content(
+            model=settings.factcheck_model,
+            contents=user_prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=TRANSLATE_SYSTEM_PROMPT,
+                temperature=0.1,
+                response_mime_type="application/json",
+            ),
+        )
+        output_text = response.text
+    except Exception as e:
+        raise GeminiError(f"Error calling Gemini API: {e}") from e
+
+    if not output_text:
+        raise GeminiError("Empty model output.")
+    try:
+        translated = _parse_json(output_text)
+    except json.JSONDecodeError as e:
+        raise GeminiError(f"Model did not return valid JSON: {e}") from e
+    if not isinstance(translated, dict):
+        raise GeminiError("Model did not return a JSON object.")
+
+    raw = {
+        "model": settings.factcheck_model,
+        "output_text": output_text,
+        "usage_metadata": _usage(response),
+    }
+    return apply_translation(report, translated), raw
+
+
+async def generate_json(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    grounded: bool = False,
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[Any, dict[str, Any]]:
+    """
+    One JSON-returning call, optionally grounded with Google Search.
+    Returns (parsed_json, raw_response_dict).
+    """
+    client = gemini_client(api_key).aio
+    model = model or settings.factcheck_model
+    if grounded:
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=0.1,
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+        )
+    else:
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=0.1,
+            response_mime_type="application/json",
+        )
+
+    try:
+        response = await client.models.generate_content(model=model, contents=user_prompt, config=config)
+        output_text = response.text
+    except Exception as e:
+        raise GeminiError(f"Error calling Gemini API: {e}") from e
+
+    if not output_text:
+        raise GeminiError("Empty model output.")
+    try:
+        data = _parse_json(output_text)
+    except json.JSONDecodeError as e:
+        raise GeminiError(f"Model did not return valid JSON: {e}") from e
+
+    raw = {"model": model, "output_text": output_text, "usage_metadata": _usage(response)}
+    return data, raw
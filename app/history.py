@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import base64
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .schemas import HistoryItem, HistoryPage, Job
+from .storage import ensure_dir, read_json
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    output_language TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    updated_at_us INTEGER NOT NULL,
+    overall_score INTEGER,
+    overall_verdict TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS history_updated ON history (updated_at_us DESC, id DESC);
+CREATE INDEX IF NOT EXISTS history_status ON history (status, updated_at_us DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = (
+    "id",
+    "url",
+    "output_language",
+    "provider",
+    "status",
+    "created_at",
+    "updated_at",
+    "overall_score",
+    "overall_verdict",
+    "summary",
+)
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000)
+
+
+def _encode_cursor(updated_at_us: int, job_id: str) -> str:
+    raw = f"{updated_at_us}|{job_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, job_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        return int(ts), job_id
+    except Exception as e:
+        raise InvalidCursorError("Invalid history cursor.") from e
+
+
+class HistoryIndex:
+    """
+    SQLite-backed summary of every job, maintained incrementally from JobStore.
+    Serves the history API without touching the per-job JSON files.
+    """
+
+    def __init__(self, db_path: Path, jobs_dir: Path):
+        ensure_dir(db_path.parent)
+        self.db_path = db_path
+        self.jobs_dir = jobs_dir
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._backfill()
+
+    def _backfill(self) -> None:
+        """One-time import of jobs written before the index existed."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone()
+        if row:
+            return
+        if self.jobs_dir.exists():
+            rows = []
+            for entry in self.jobs_dir.iterdir():
+                if not entry.is_dir():
+                    continue
+                try:
+                    data = read_json(entry / "job.json")
+                    job = Job.model_validate(data) if isinstance(data, dict) else None
+                except Exception:
+                    job = None
+                if job:
+                    rows.append(self._row(job))
+            self._upsert_rows(rows)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+
+    @staticmethod
+    def _row(job: Job) -> tuple[Any, ...]:
+        report = job.report
+        return (
+            job.id,
+            job.url,
+            job.output_language,
+            job.provider,
+            job.status,
+            job.created_at.isoformat(),
+            job.updated_at.isoformat(),
+            _to_us(job.updated_at),
+            report.overall_score if report else None,
+            report.overall_verdict if report else None,
+            report.summary if report else None,
+        )
+
+    def _upsert_rows(self, rows: Iterable[tuple[Any, ...]]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO history (id, url, output_language, provider, status, created_at, updated_at,
+                                         updated_at_us, overall_score, overall_verdict, summary)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        url = excluded.url,
+                        output_language = excluded.output_language,
+                        provider = excluded.provider,
+                        status = excluded.status,
+                        created_at = excluded.created_at,
+                        updated_at = excluded.updated_at,
+                        updated_at_us = excluded.updated_at_us,
+                        overall_score = excluded.overall_score,
+                        overall_verdict = excluded.overall_verdict,
+                        summary = excluded.summary
+                    """,
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def upsert(self, job: Job) -> None:
+        self._upsert_rows([self._row(job)])
+
+    def unfinished_ids(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM history WHERE status NOT IN ('completed', 'failed') ORDER BY created_at"
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def statuses(self, job_ids: list[str]) -> dict[str, str]:
+        result: dict[str, str] = {}
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start : start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, status FROM history WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+            result.update((row["id"], row["status"]) for row in rows)
+        return result
+
+    def list(
+        self,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        provider: Optional[str] = None,
+        language: Optional[str] = None,
+        verdict: Optional[str] = None,
+    ) -> HistoryPage:
+        where: list[str] = []
+        params: list[Any] = []
+        if cursor:
+            ts, job_id = _decode_cursor(cursor)
+            where.append("(updated_at_us < ? OR (updated_at_us = ? AND id < ?))")
+            params.extend([ts, ts, job_id])
+        for column, value in (
+            ("status", status),
+            ("provider", provider),
+            ("output_language", (language or "").strip().lower() or None),
+            ("overall_verdict", verdict),
+        ):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+
+        sql = f"SELECT {', '.join(_COLUMNS)}, updated_at_us FROM history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY updated_at_us DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        items: list[HistoryItem] = []
+        for row in rows[:limit]:
+            try:
+                items.append(HistoryItem.model_validate({k: row[k] for k in _COLUMNS}))
+            except Exception:
+                continue
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = _encode_cursor(last["updated_at_us"], last["id"])
+        return HistoryPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from .schemas import Job, JobCacheStats
+
+
+# Loaded on demand from transcript.txt / report.json / job.json instead of kept resident.
+CONTENT_FIELDS = frozenset({"transcript", "transcript_segments", "report"})
+
+
+def slim(job: Job) -> Job:
+    """The job without its transcript, segments and report."""
+    if job.transcript is None and not job.transcript_segments and job.report is None:
+        return job
+    return job.model_copy(update={"transcript": None, "transcript_segments": [], "report": None})
+
+
+class _Entry(NamedTuple):
+    job: Job
+    version: int
+    size: int
+    expires_at: float
+
+
+class JobCache:
+    """
+    LRU of recently used slim jobs, bounded by entry count and size, with
+    entries expiring `ttl_seconds` after their last write. Running jobs are
+    not cached here; each entry is sized once, when it is stored.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(job_id)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(job_id)
+            self.hits += 1
+            return entry.job
+
+    def peek(self, job_id: str) -> Optional[Job]:
+        """The entry without touching recency, expiry or the counters."""
+        entry = self._entries.get(job_id)
+        return entry.job if entry else None
+
+    def version(self, job_id: str) -> int:
+        entry = self._entries.get(job_id)
+        return entry.version if entry else 0
+
+    def set_version(self, job_id: str, version: int) -> None:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None and version > entry.version:
+                self._entries[job_id] = entry._replace(version=version)
+
+    def put(self, job: Job, *, version: Optional[int] = None) -> None:
+        # Entries are slim, so measuring them exactly is cheap.
+        size = len(job.model_dump_json())
+        with self._lock:
+            old = self._entries.get(job.id)
+            if old is not None:
+                self._remove(job.id)
+            if version is None:
+                version = old.version if old else 0
+            self._entries[job.id] = _Entry(job, version, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            self._evict()
+
+    def pop(self, job_id: str) -> None:
+        with self._lock:
+            self._remove(job_id)
+
+    def _remove(self, job_id: str) -> None:
+        entry = self._entries.pop(job_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        for job_id in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            self._remove(job_id)
+            self.evictions += 1
+
+    def stats(self, *, pinned: int = 0) -> JobCacheStats:
+        """`pinned`: running jobs, which the owner keeps whole outside the cache."""
+        with self._lock:
+            return JobCacheStats(
+                entries=len(self._entries),
+                pinned=pinned,
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+            )
@@ -1,20 +1,103 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timezone
+import json
+import logging
+import shutil
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from uuid import uuid4
 
+from .captions import assess, caption_info, select_track, vtt_to_text
+from .chunking import AudioChunk, split_audio, stitch
+from .claims import ClaimCache, as_prompt_context, to_claim_check
+from .clients import server_key
 from .config import settings
+from .execution import execute, hedging_enabled, stage_providers
 from .gemini_pipeline import fact_check_transcript as gemini_fact_check
+from .gemini_pipeline import generate_json as gemini_generate_json
 from .gemini_pipeline import transcribe_audio_mp3 as gemini_transcribe
+from .gemini_pipeline import translate_report as gemini_translate
+from .history import HistoryIndex
+from .jobcache import JobCache, slim
+from .jsonstream import JsonStream
+from .metrics import (
+    BYTES,
+    JOB_SECONDS,
+    JOBS,
+    PROVIDER_CALL_SECONDS,
+    PROVIDER_TOKENS,
+    QUEUE_WAIT_SECONDS,
+    STAGE_SECONDS,
+    token_counts,
+)
+from .openai_pipeline import WHISPER_MODEL
 from .openai_pipeline import fact_check_transcript as openai_fact_check
+from .openai_pipeline import generate_json as openai_generate_json
 from .openai_pipeline import transcribe_audio_mp3 as openai_transcribe
-from .schemas import HistoryItem, Job, Provider
-from .storage import read_json, write_json, write_model
-from .ytdlp_audio import DownloadError, download_mp3
+from .openai_pipeline import translate_report as openai_translate
+from .prompts import (
+    CLAIM_EXTRACT_SYSTEM_PROMPT,
+    CLAIM_VERIFY_SYSTEM_PROMPT,
+    FACTCHECK_SYSTEM_PROMPT,
+    REPORT_COMPOSE_SYSTEM_PROMPT,
+    TRANSLATE_SYSTEM_PROMPT,
+    build_claim_extract_user_prompt,
+    build_claim_verify_user_prompt,
+    build_factcheck_user_prompt,
+    build_report_compose_user_prompt,
+)
+from .ratelimit import estimate_tokens, rate_limiter, tokens_used
+from .report import build_report, partial_from_stream
+from .resolver import canonical_id_from_info, static_video_id
+from .retry import retry_async
+from .scheduler import JobScheduler
+from .schemas import (
+    AnalysisMode,
+    ClaimCheck,
+    ExecutionRecord,
+    FactCheckReport,
+    HistoryPage,
+    Job,
+    JobCacheStats,
+    JobMetrics,
+    JobStatus,
+    PartialReport,
+    PipelineStage,
+    Provider,
+    ProviderUsage,
+    StageCheckpoint,
+    StageSpan,
+    TranscriptSegment,
+)
+from .state import StateBackend, create_backend, process_owner
+from .storage import (
+    CoalescingWriter,
+    read_json,
+    sha256_file,
+    write_json,
+    write_json_async,
+    write_model,
+    write_text_async,
+)
+from .telemetry import collect_stats, timed
+from .transcripts import TranscriptCache, audio_key, url_key, video_key
+from .translation import extract_translatable
+from .ytdlp_audio import DownloadError, download_audio, download_subtitles, probe_duration, probe_video
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+# Sent with every fact-check prompt; only needed here for token estimates.
+_REPORT_SCHEMA_JSON = json.dumps(FactCheckReport.model_json_schema(), indent=2)
+_CLAIM_SCHEMA_JSON = json.dumps(ClaimCheck.model_json_schema(), indent=2)
 
 
 def _normalize_url(url: str) -> str:
@@ -44,19 +127,99 @@ def _normalize_url(url: str) -> str:
     return normalized
 
 
+class _ReportStream:
+    """
+    Parses a streamed fact-check reply and publishes its usable part to the
+    job's `partial_report`, at most every `stream_publish_interval_seconds`.
+    When calls are hedged, only the first provider to send text is shown.
+    """
+
+    def __init__(self, store: "JobStore", job_id: str):
+        self._store = store
+        self._job_id = job_id
+        self._parser = JsonStream()
+        self._owner: Optional[str] = None
+        self._last = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._published: Optional[PartialReport] = None
+
+    def receiver(self, provider: str) -> Callable[[str], None]:
+        def on_delta(text: str) -> None:
+            if self._owner is None:
+                self._owner = provider
+            if provider != self._owner:
+                return
+            self._parser.feed(text)
+            now = time.monotonic()
+            if now - self._last >= settings.stream_publish_interval_seconds and (self._task is None or self._task.done()):
+                self._last = now
+                self._task = asyncio.create_task(self._publish())
+
+        return on_delta
+
+    async def _publish(self) -> None:
+        partial = partial_from_stream(self._parser.snapshot())
+        if partial is not None and partial != self._published:
+            self._published = partial
+            await self._store.update(self._job_id, partial_report=partial)
+
+    async def close(self) -> None:
+        """Wait for an in-flight publish so it can't land after the final report."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
 class JobStore:
-    def __init__(self, base_dir: Path):
+    """
+    Jobs and their pipeline. Per-process caches sit in front of a shared
+    `StateBackend`, so several worker processes can serve one `data_dir`:
+    cache keys are claimed atomically, a job only runs under its lease, and
+    cached jobs are reloaded when another process has written a newer version.
+
+    Only running jobs are kept whole in memory, in `_running`; the bounded
+    cache holds slim copies of other jobs (no transcript, segments or report)
+    and `get` loads those from disk.
+    """
+
+    def __init__(self, base_dir: Path, state: Optional[StateBackend] = None):
         self.base_dir = base_dir
         self.jobs_dir = base_dir / "jobs"
-        self.index_path = base_dir / "url_index.json"
         self._lock = asyncio.Lock()
-        self._jobs: Dict[str, Job] = {}
-        self._index: Dict[str, str] = {}
-        self._running: set[str] = set()
-
-        data = read_json(self.index_path)
-        if isinstance(data, dict):
-            self._index = {str(k): str(v) for k, v in data.items()}
+        self._jobs = JobCache(
+            max_entries=settings.job_cache_max_entries,
+            max_bytes=settings.job_cache_max_bytes,
+            ttl_seconds=settings.job_cache_ttl_seconds,
+        )
+        # Jobs running in this process, whole and outside the size-bounded cache.
+        self._running: Dict[str, Job] = {}
+        self._state = state or create_backend(
+            settings.state_backend, base_dir, compact_every=settings.index_compact_every
+        )
+        self._owner = process_owner()
+        # Held while this process serves jobs, so siblings leave its queue records alone.
+        self._presence = f"worker:{self._owner}"
+        self._announcer: Optional[asyncio.Task] = None
+        self._probe_info: Dict[str, Optional[dict[str, Any]]] = {}
+        self._executions: Dict[str, list[ExecutionRecord]] = {}
+        self._metrics: Dict[str, JobMetrics] = {}
+        self._subscribers: Dict[str, set[asyncio.Queue]] = {}
+        self._history = HistoryIndex(base_dir / "history.sqlite3", self.jobs_dir)
+        self._writer = CoalescingWriter(delay=settings.write_coalesce_seconds)
+        self._transcripts = TranscriptCache(base_dir, self._state)
+        self._claims = ClaimCache(base_dir, max_entries=settings.claim_cache_max_entries)
+        self.scheduler = JobScheduler(
+            base_dir / "queue.json",
+            self._writer,
+            self._state,
+            workers=settings.max_concurrent_jobs,
+            max_queue_size=settings.max_queue_size,
+            stage_limits={
+                "download": settings.download_concurrency,
+                "transcribe": settings.transcribe_concurrency,
+                "fact_check": settings.factcheck_concurrency,
+            },
+            owner=self._owner,
+        )
 
     def _job_dir(self, job_id: str) -> Path:
         return self.jobs_dir / job_id
@@ -76,6 +239,78 @@ class JobStore:
     def _audio_dir(self, job_id: str) -> Path:
         return self._job_dir(job_id) / "media"
 
+    def _persist_job(self, job: Job) -> None:
+        # transcript.txt and report.json hold the large fields.
+        write_json(self._job_path(job.id), job.model_dump(mode="json", exclude={"transcript", "report"}))
+        self._history.upsert(job)
+        self._jobs.set_version(job.id, self._state.bump_version(job.id))
+
+    def _save(self, job: Job) -> None:
+        self._writer.submit(f"job:{job.id}", lambda: self._persist_job(job))
+
+    async def flush(self) -> None:
+        await self._writer.flush()
+
+    async def start(self) -> None:
+        """Start the worker pool and re-enqueue jobs left unfinished by processes that are gone."""
+        ttl = settings.lease_ttl_seconds
+        await asyncio.to_thread(self._state.acquire_lease, self._presence, self._owner, ttl)
+        self._announcer = asyncio.create_task(self._announce(ttl))
+        groups = dict(await asyncio.to_thread(self._orphans))
+        await self.scheduler.start(self.run_pipeline, resume=list(groups), groups=groups)
+
+    async def stop(self) -> None:
+        await self.scheduler.stop()
+        if self._announcer is not None:
+            self._announcer.cancel()
+            await asyncio.gather(self._announcer, return_exceptions=True)
+            self._announcer = None
+        await self.flush()
+        await asyncio.to_thread(self._state.release_lease, self._presence, self._owner)
+        await asyncio.to_thread(self._state.close)
+
+    def _orphans(self) -> list[tuple[str, str]]:
+        """
+        (job id, group) of queued or unfinished jobs that nobody runs (their
+        `job:` lease is free) and nobody holds in a queue (the process that
+        recorded them has no `worker:` lease), adopted for this process.
+        """
+        groups = dict(self.scheduler.persisted())
+        orphans = []
+        for job_id in dict.fromkeys([*groups, *self._history.unfinished_ids()]):
+            if self._state.lease_holder(f"job:{job_id}") is not None:
+                continue
+            group = self.scheduler.adopt(job_id, groups.get(job_id, ""), self._gone)
+            if group is not None:
+                orphans.append((job_id, group))
+        return orphans
+
+    def _gone(self, owner: str) -> bool:
+        return owner != self._owner and (not owner or self._state.lease_holder(f"worker:{owner}") is None)
+
+    async def _announce(self, ttl: float) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, ttl / 3))
+            try:
+                await asyncio.to_thread(self._state.acquire_lease, self._presence, self._owner, ttl)
+            except Exception:
+                logger.exception("Renewing %s failed", self._presence)
+
+    async def submit(self, job_id: str, api_key: Optional[str] = None, *, group: str = "") -> None:
+        """Queue the job; `group` (e.g. a batch id) gets its own turn in the worker rotation."""
+        await self.scheduler.enqueue(job_id, api_key, group=group)
+
+    async def statuses(self, job_ids: Iterable[str]) -> Dict[str, JobStatus]:
+        """Status of each known job, from the history index (no job files are read)."""
+        return await asyncio.to_thread(self._history.statuses, list(job_ids))
+
+    def _with_queue_info(self, job: Job) -> Job:
+        if job.status != "queued":
+            return job
+        return job.model_copy(
+            update={"queue_position": self.scheduler.position(job.id), "queue_depth": self.scheduler.depth}
+        )
+
     def _load_job_from_disk(self, job_id: str) -> Optional[Job]:
         data = read_json(self._job_path(job_id))
         if not data:
@@ -85,20 +320,74 @@ class JobStore:
         except Exception:
             return None
 
+    def _read_content(self, job: Job) -> Job:
+        """`job` with its transcript, segments and report read from the job directory."""
+        disk = self._load_job_from_disk(job.id)
+        transcript_path = self._transcript_path(job.id)
+        report_path = self._report_path(job.id)
+        # job.json written before it was slimmed may still carry the large fields.
+        transcript = disk.transcript if disk else None
+        if transcript_path.exists():
+            transcript = transcript_path.read_text(encoding="utf-8")
+        report = None
+        if job.status == "completed":
+            report = disk.report if disk else None
+            if report_path.exists():
+                report = FactCheckReport.model_validate(read_json(report_path))
+        return job.model_copy(
+            update={
+                "transcript": transcript,
+                "transcript_segments": disk.transcript_segments if disk else [],
+                "report": report,
+            }
+        )
+
+    async def _with_content(self, job: Job) -> Job:
+        if job.id in self._running:
+            return job
+        return await asyncio.to_thread(self._read_content, job)
+
+    def _read_report(self, job_id: str) -> Optional[FactCheckReport]:
+        report_path = self._report_path(job_id)
+        if report_path.exists():
+            return FactCheckReport.model_validate(read_json(report_path))
+        disk = self._load_job_from_disk(job_id)
+        return disk.report if disk else None
+
+    async def report(self, job: Job) -> Optional[FactCheckReport]:
+        """The report of a completed job from `get(..., content=False)`, read without its transcript."""
+        if job.report is not None or job.status != "completed":
+            return job.report
+        return await asyncio.to_thread(self._read_report, job.id)
+
+    def cache_stats(self) -> JobCacheStats:
+        return self._jobs.stats(pinned=len(self._running))
+
+    def updated_elsewhere(self, job_id: str) -> bool:
+        """True if another process may be running the job, so `subscribe` alone would miss its updates."""
+        return self._state.shared and job_id not in self._running
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @staticmethod
+    def _report_key(url: str) -> str:
+        """Index key pointing at the latest full (non-translated) report for a video."""
+        return f"report:{_normalize_url(url)}"
+
     @staticmethod
     def _cache_key(url: str, output_language: str, provider: str) -> str:
         return f"{_normalize_url(url)}||{(output_language or '').strip().lower() or 'ar'}||{provider}"
 
-    async def find_or_create(self, *, url: str, output_language: str, provider: Provider = "gemini", force: bool = False, api_key: Optional[str] = None) -> tuple[Job, bool]:
-        async with self._lock:
-            cache_key = self._cache_key(url, output_language, provider)
-            if not force:
-                cached_id = self._index.get(cache_key)
-                if cached_id:
-                    job = self._jobs.get(cached_id) or self._load_job_from_disk(cached_id)
-                    if job and job.status != "failed":
-                        self._jobs[cached_id] = job
-                        return job, True
+    async def find_or_create(self, *, url: str, output_language: str, provider: Provider = "gemini", force: bool = False, api_key: Optional[str] = None, mode: AnalysisMode = "full") -> tuple[Job, bool]:
+        cache_key = self._cache_key(url, output_language, provider)
+        while True:
+            cached_id = await asyncio.to_thread(self._state.get_key, cache_key)
+            if cached_id:
+                job = await self._load(cached_id)
+                if job and self._joinable(job, force):
+                    return await self._with_content(job), True
 
             job_id = uuid4().hex
             now = datetime.now(tz=timezone.utc)
@@ -107,157 +396,1024 @@ class JobStore:
                 url=url,
                 output_language=(output_language or "").strip().lower() or "ar",
                 provider=provider,
+                mode=mode,
+                force=force,
                 status="queued",
                 created_at=now,
                 updated_at=now,
                 progress=0,
             )
-            self._jobs[job_id] = job
-            write_model(self._job_path(job_id), job)
-            self._index[cache_key] = job_id
-            write_json(self.index_path, self._index)
-            return job, False
+            # Written before the key is claimed, so other processes can load it as soon as they see the key.
+            await asyncio.to_thread(write_model, self._job_path(job_id), job)
+            winner = await asyncio.to_thread(self._state.claim_key, cache_key, job_id, expected=cached_id)
+            if winner == job_id:
+                async with self._lock:
+                    self._jobs.put(job)
+                self._save(job)
+                return job, False
+            # Another request (possibly in another process) claimed the key first: join its job instead.
+            await asyncio.to_thread(shutil.rmtree, self._job_dir(job_id), True)
+
+    @staticmethod
+    def _joinable(job: Job, force: bool) -> bool:
+        """
+        Single-flight per cache key: a request attaches to the key's latest job
+        while it is still running, and a forced re-run also attaches if that job
+        started less than `force_rerun_min_interval_seconds` ago.
+        """
+        if job.status == "failed":
+            return False
+        if job.status != "completed" or not force:
+            return True
+        age = (datetime.now(tz=timezone.utc) - job.created_at).total_seconds()
+        return age < settings.force_rerun_min_interval_seconds
+
+    async def get(self, job_id: str, *, content: bool = True) -> Optional[Job]:
+        """
+        The job with queue info. With `content=False` the transcript, segments
+        and report may be left out, which avoids reading them from disk.
+        """
+        job = await self._load(job_id)
+        if job and content:
+            job = await self._with_content(job)
+        return self._with_queue_info(job) if job else None
 
-    async def get(self, job_id: str) -> Optional[Job]:
+    async def _load(self, job_id: str) -> Optional[Job]:
+        """The cached job, reloaded from disk if another process has written a newer version."""
         async with self._lock:
-            if job_id in self._jobs:
-                return self._jobs[job_id]
-        data = read_json(self._job_path(job_id))
-        if not data:
-            return None
-        try:
-            job = Job.model_validate(data)
-        except Exception:
-            return None
+            # Jobs running here are only written here, so the resident copy is authoritative.
+            if job_id in self._running:
+                return self._running[job_id]
+            cached = self._jobs.get(job_id)
+            if cached and not self._state.shared:
+                return cached
+        version = await asyncio.to_thread(self._state.version, job_id)
+        if cached and self._jobs.version(job_id) >= version:
+            return cached
+        job = await asyncio.to_thread(self._load_job_from_disk, job_id)
+        if not job:
+            return cached
+        job = slim(job)
         async with self._lock:
-            self._jobs[job_id] = job
+            if job_id in self._running:
+                return self._running[job_id]
+            self._jobs.put(job, version=version)
         return job
 
-    async def list_history(self, *, limit: int = 50) -> list[HistoryItem]:
+    async def list_history(
+        self,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        provider: Optional[str] = None,
+        language: Optional[str] = None,
+        verdict: Optional[str] = None,
+    ) -> HistoryPage:
         limit = max(1, min(int(limit or 50), 200))
-        if not self.jobs_dir.exists():
-            return []
+        return await asyncio.to_thread(
+            self._history.list,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            provider=provider,
+            language=language,
+            verdict=verdict,
+        )
 
-        items: list[HistoryItem] = []
-        for entry in self.jobs_dir.iterdir():
-            if not entry.is_dir():
-                continue
-            job_path = entry / "job.json"
-            data = read_json(job_path)
-            if not isinstance(data, dict):
-                continue
+    async def update(self, job_id: str, **fields) -> None:
+        loaded = None
+        if job_id not in self._running:
+            # Cached slim or evicted: the persisted job must keep its segments.
+            loaded = await self._load(job_id)
+            if loaded is None:
+                raise KeyError(job_id)
+            loaded = await self._with_content(loaded)
+        async with self._lock:
+            running = job_id in self._running
+            job = self._running[job_id] if running else loaded
+            if running and job_id in self._metrics:
+                fields.setdefault("metrics", self._metrics[job_id])
+            updated = job.model_copy(update={**fields, "updated_at": datetime.now(tz=timezone.utc)})
+            if running:
+                # No cache write (or sizing) per progress update; the slim copy is cached when the run ends.
+                self._running[job_id] = updated
+            else:
+                self._jobs.put(slim(updated))
+            self._save(updated)
+        self._publish(updated)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Receive every subsequent version of the job; pair with `unsubscribe`."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(job_id, None)
+
+    def _publish(self, job: Job) -> None:
+        for queue in self._subscribers.get(job.id, ()):
+            if queue.full():
+                # Slow consumer: only the latest state matters, drop the oldest.
+                queue.get_nowait()
+            queue.put_nowait(job)
+
+    async def retry(self, job_id: str, api_key: Optional[str] = None) -> Optional[Job]:
+        """Re-queue a failed job; stages with a valid checkpoint are skipped when it runs."""
+        job = await self.get(job_id)
+        if not job:
+            return None
+        if job.status != "failed":
+            raise ValueError(f"Only failed jobs can be retried (status is {job.status}).")
+        await self.update(job_id, status="queued", progress=0, error=None)
+        await self.submit(job_id, api_key)
+        return await self.get(job_id)
+
+    async def _valid_checkpoint(self, job_id: str, stage: str) -> Optional[Path]:
+        checkpoint = (await self._current(job_id)).checkpoints.get(stage)
+        if not checkpoint:
+            return None
+        path = self._job_dir(job_id) / checkpoint.path
+        if not path.exists():
+            return None
+        if await asyncio.to_thread(sha256_file, path) != checkpoint.sha256:
+            return None
+        return path
+
+    async def _checkpoint(self, job_id: str, stage: PipelineStage, path: Path) -> None:
+        checkpoint = StageCheckpoint(
+            stage=stage,
+            path=path.relative_to(self._job_dir(job_id)).as_posix(),
+            sha256=await asyncio.to_thread(sha256_file, path),
+            completed_at=datetime.now(tz=timezone.utc),
+        )
+        checkpoints = {**(await self._current(job_id)).checkpoints, stage: checkpoint}
+        await self.update(job_id, checkpoints=checkpoints)
+
+    async def _retrying(self, job_id: str, label: str, fn: Callable[[], Awaitable[T]]) -> T:
+        async def on_retry(attempt: int, error: BaseException, delay: float) -> None:
+            await self.update(job_id, error=f"{label} attempt {attempt} failed ({error}); retrying in {delay:.1f}s")
+
+        return await retry_async(
+            fn,
+            attempts=settings.stage_max_attempts,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay,
+            rate_limit_attempts=settings.rate_limit_max_attempts,
+            on_retry=on_retry,
+        )
 
-            report = data.get("report") if isinstance(data.get("report"), dict) else {}
-            payload = {
-                "id": data.get("id"),
-                "url": data.get("url"),
-                "output_language": data.get("output_language") or "ar",
-                "status": data.get("status"),
-                "created_at": data.get("created_at"),
-                "updated_at": data.get("updated_at"),
-                "overall_score": report.get("overall_score"),
-                "overall_verdict": report.get("overall_verdict"),
-                "summary": report.get("summary"),
+    async def _run_stage(self, job_id: str, stage: PipelineStage, fn: Callable[[], Awaitable[T]]) -> T:
+        async with self.scheduler.stage(stage):
+            return await self._retrying(job_id, stage, fn)
+
+    async def run_pipeline(self, job_id: str, api_key: Optional[str] = None) -> bool:
+        """
+        Run the job under its lease. Returns False if another process holds the
+        job (it was running there, or the lease was lost mid-run), so its queue
+        record is left to that process.
+        """
+        waited = self.scheduler.queue_wait(job_id)
+        async with self._lock:
+            if job_id in self._running:
+                return False
+        # Only one process may run a job; the lease is renewed while it runs.
+        lease = f"job:{job_id}"
+        ttl = settings.lease_ttl_seconds
+        if not await asyncio.to_thread(self._state.acquire_lease, lease, self._owner, ttl):
+            logger.info("Job %s is running in another process", job_id)
+            return False
+        job = await self._load(job_id)
+        if job and job.status not in {"completed", "failed"}:
+            job = await self._with_content(job)
+        else:
+            job = None
+        async with self._lock:
+            if job_id in self._running or job is None:
+                job = None
+            else:
+                self._running[job_id] = job
+                self._jobs.pop(job_id)
+        if job is None:
+            await asyncio.to_thread(self._state.release_lease, lease, self._owner)
+            return True
+
+        if waited is not None:
+            QUEUE_WAIT_SECONDS.observe(waited)
+            self._metrics[job_id] = job.metrics.model_copy(update={"queue_wait_seconds": round(waited, 3)})
+        else:
+            self._metrics[job_id] = job.metrics
+        started = time.perf_counter()
+        heartbeat = asyncio.create_task(self._hold_lease(lease, ttl, asyncio.current_task()))
+        lost = False
+        try:
+            await self.update(job_id, attempts=job.attempts + 1, error=None)
+            job = await self._resolve_canonical(job)
+            if job.mode == "translate":
+                if await self._translate_stage(job, api_key):
+                    return True
+                job = await self._switch_to_full(job_id)
+
+            if not job.force and await self._reuse_report(job_id):
+                return True
+            transcript = await self._transcript_stage(job, api_key)
+            if not job.force and await self._reuse_report(job_id):
+                return True
+
+            await self.update(job_id, status="fact_checking", progress=70, error=None, transcript=transcript)
+            report_path = await self._valid_checkpoint(job_id, "fact_check")
+            fresh = report_path is None
+            if not fresh:
+                report = FactCheckReport.model_validate(await asyncio.to_thread(read_json, report_path))
+            else:
+                async with self._span(job_id, "fact_check"):
+                    if job.mode == "per_claim":
+                        async with self.scheduler.stage("fact_check"):
+                            report, raw = await self._per_claim_fact_check(job, transcript, api_key)
+                    else:
+                        report, raw = await self._run_stage(job_id, "fact_check", lambda: self._fact_check(job, transcript, api_key))
+                # Per-claim runs name the claims they verified themselves; full reports are all fresh.
+                verified = raw.get("verified_claims")
+                report_path = self._report_path(job_id)
+                await write_json_async(report_path, report.model_dump(mode="json"))
+                await write_json_async(self._raw_response_path(job_id), {**raw, "execution": self._execution_log(job_id)})
+                await self._checkpoint(job_id, "fact_check", report_path)
+
+            await self.update(job_id, status="completed", progress=100, error=None, report=report, partial_report=None)
+            await self._register_report(job_id)
+            if fresh:
+                await self._index_claims(job, report, only=verified)
+        except asyncio.CancelledError:
+            lost = heartbeat.done() and not heartbeat.cancelled() and heartbeat.result()
+            if not lost:
+                raise
+            asyncio.current_task().uncancel()
+            return False
+        except DownloadError as e:
+            await self.update(job_id, status="failed", progress=100, error=f"Download failed: {e}")
+        except Exception as e:
+            await self.update(job_id, status="failed", progress=100, error=str(e))
+        finally:
+            self._probe_info.pop(job_id, None)
+            self._executions.pop(job_id, None)
+            heartbeat.cancel()
+            self._metrics.pop(job_id, None)
+            if lost:
+                # The job is another process's now: write nothing more for it.
+                self._writer.discard(f"job:{job_id}")
+                JOBS.inc(status="interrupted")
+                async with self._lock:
+                    self._running.pop(job_id, None)
+            else:
+                final = await self._current(job_id)
+                outcome = final.status if final.status in {"completed", "failed"} else "interrupted"
+                JOBS.inc(status=outcome)
+                JOB_SECONDS.observe(time.perf_counter() - started, status=outcome)
+                version = None
+                if self._state.shared:
+                    # Make the final state visible before another process can take the lease.
+                    await asyncio.to_thread(self._persist_job, final)
+                    version = await asyncio.to_thread(self._state.version, job_id)
+                async with self._lock:
+                    self._running.pop(job_id, None)
+                    self._jobs.put(slim(final), version=version)
+                await asyncio.to_thread(self._state.release_lease, lease, self._owner)
+        return True
+
+    def _record_span(
+        self, job_id: str, stage: str, seconds: float, *, provider: Optional[str] = None, started_at: Optional[datetime] = None
+    ) -> None:
+        STAGE_SECONDS.observe(seconds, stage=stage, provider=provider or "")
+        metrics = self._metrics.get(job_id)
+        if metrics is None:
+            return
+        span = StageSpan(
+            stage=stage,
+            provider=provider,
+            started_at=started_at or datetime.now(tz=timezone.utc) - timedelta(seconds=seconds),
+            seconds=round(seconds, 3),
+        )
+        self._metrics[job_id] = metrics.model_copy(update={"spans": [*metrics.spans, span]})
+
+    @asynccontextmanager
+    async def _span(self, job_id: str, stage: str) -> AsyncIterator[None]:
+        """Time the block as `stage`, attributed to the provider that served its last call."""
+        started_at = datetime.now(tz=timezone.utc)
+        start = time.perf_counter()
+        executed = len(self._executions.get(job_id, []))
+        try:
+            yield
+        finally:
+            records = self._executions.get(job_id, [])[executed:]
+            provider = records[-1].provider if records else None
+            self._record_span(job_id, stage, time.perf_counter() - start, provider=provider, started_at=started_at)
+
+    def _count_bytes(self, job_id: str, kind: str, amount: int, *, provider: str = "", model: str = "") -> None:
+        BYTES.inc(amount, kind=kind, provider=provider, model=model)
+        metrics = self._metrics.get(job_id)
+        field = f"bytes_{kind}"
+        if metrics is not None and field in JobMetrics.model_fields:
+            self._metrics[job_id] = metrics.model_copy(update={field: getattr(metrics, field) + amount})
+
+    def _record_usage(self, job_id: str, stage: str, provider: str, raw: Any) -> None:
+        counts = token_counts(raw)
+        if counts is None:
+            return
+        model = str(raw.get("model") or "unknown")
+        for kind, amount in zip(("prompt", "completion", "total"), counts):
+            PROVIDER_TOKENS.inc(amount, provider=provider, model=model, kind=kind)
+        metrics = self._metrics.get(job_id)
+        if metrics is None:
+            return
+        usage = list(metrics.usage)
+        for i, entry in enumerate(usage):
+            if (entry.stage, entry.provider, entry.model) == (stage, provider, model):
+                break
+        else:
+            i, entry = len(usage), ProviderUsage(stage=stage, provider=provider, model=model)
+            usage.append(entry)
+        usage[i] = entry.model_copy(
+            update={
+                "calls": entry.calls + 1,
+                "prompt_tokens": entry.prompt_tokens + counts[0],
+                "completion_tokens": entry.completion_tokens + counts[1],
+                "total_tokens": entry.total_tokens + counts[2],
             }
+        )
+        self._metrics[job_id] = metrics.model_copy(update={"usage": usage})
+
+    async def _provider_call(
+        self, job: Job, stage: str, provider: str, key: Optional[str], tokens: int, call: Callable[[], Awaitable[T]]
+    ) -> T:
+        """A rate-limited provider call, timed and with its token usage recorded."""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await rate_limiter.call(
+                provider, key, tokens, call, usage=lambda r: tokens_used(r[1]) if isinstance(r, tuple) else None
+            )
+            outcome = "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            PROVIDER_CALL_SECONDS.observe(time.perf_counter() - start, provider=provider, stage=stage, outcome=outcome)
+        if isinstance(result, tuple):
+            self._record_usage(job.id, stage, provider, result[1])
+        return result
+
+    async def _hold_lease(self, lease: str, ttl: float, run: asyncio.Task) -> bool:
+        """Renew `lease` until cancelled; if it is lost, cancel `run` and return True."""
+        while True:
+            await asyncio.sleep(max(1.0, ttl / 3))
             try:
-                items.append(HistoryItem.model_validate(payload))
+                renewed = await asyncio.to_thread(self._state.renew_lease, lease, self._owner, ttl)
             except Exception:
+                logger.exception("Renewing %s failed", lease)
                 continue
+            if not renewed:
+                logger.warning("Lost %s; stopping the run, another process may now take it", lease)
+                run.cancel()
+                return True
 
-        items.sort(key=lambda x: x.updated_at, reverse=True)
-        return items[:limit]
+    async def _switch_to_full(self, job_id: str) -> Job:
+        await self.update(job_id, mode="full")
+        return await self._current(job_id)
 
-    async def update(self, job_id: str, **fields) -> None:
+    async def _current(self, job_id: str) -> Job:
+        """The resident job; whole while the job runs in this process."""
         async with self._lock:
-            job = self._jobs[job_id]
-            updated = job.model_copy(update={**fields, "updated_at": datetime.now(tz=timezone.utc)})
-            self._jobs[job_id] = updated
-            write_model(self._job_path(job_id), updated)
+            job = self._running.get(job_id) or self._jobs.peek(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job
 
-    async def run_pipeline(self, job_id: str, api_key: Optional[str] = None) -> None:
-        async with self._lock:
-            if job_id in self._running:
-                return
-            self._running.add(job_id)
+    async def _probe(self, job: Job) -> Optional[dict[str, Any]]:
+        """yt-dlp metadata for the job's URL, fetched at most once per pipeline run."""
+        if job.id not in self._probe_info:
+            try:
+                async with self.scheduler.stage("download"):
+                    info = await asyncio.to_thread(probe_video, url=job.url, cookies_file=settings.ytdlp_cookies_file)
+            except DownloadError:
+                info = None
+            self._probe_info[job.id] = info
+        return self._probe_info[job.id]
 
-        job = await self.get(job_id)
-        if not job:
-            async with self._lock:
-                self._running.discard(job_id)
-            return
+    async def _resolve_canonical(self, job: Job) -> Job:
+        """Map the URL to `extractor:id`, from the URL shape, a previous lookup, or yt-dlp metadata."""
+        if job.canonical_id:
+            return job
+        resolve_key = f"resolve:{_normalize_url(job.url)}"
+        canonical = static_video_id(job.url) or await asyncio.to_thread(self._state.get_key, resolve_key)
+        if not canonical and settings.resolve_canonical_ids:
+            info = await self._probe(job)
+            canonical = canonical_id_from_info(info) if info else None
+            if canonical:
+                await asyncio.to_thread(self._state.set_key, resolve_key, canonical)
+        if not canonical:
+            return job
+        await self.update(job.id, canonical_id=canonical)
+        return await self._current(job.id)
 
-        try:
-            await self.update(job_id, status="downloading", progress=10, error=None)
+    @staticmethod
+    def _audio_hash(job: Job) -> Optional[str]:
+        """Hash of the downloaded audio's samples, or of the file when they couldn't be decoded."""
+        if job.audio_stats and job.audio_stats.pcm_sha256:
+            return job.audio_stats.pcm_sha256
+        download = job.checkpoints.get("download")
+        return download.sha256 if download else None
+
+    def _dedupe_keys(self, job: Job) -> list[str]:
+        """Index keys under which an equivalent report (same video, language and provider) is registered."""
+        suffix = f"||{job.output_language}||{job.provider}"
+        keys = []
+        if job.canonical_id:
+            keys.append(f"video:{job.canonical_id}{suffix}")
+        audio_hash = self._audio_hash(job)
+        if audio_hash:
+            keys.append(f"audio:{audio_hash}{suffix}")
+        return keys
+
+    def _report_keys(self, job: Job) -> list[str]:
+        keys = [self._report_key(job.url)]
+        if job.canonical_id:
+            keys.append(f"report:video:{job.canonical_id}")
+        return keys
+
+    async def _register_report(self, job_id: str) -> None:
+        job = await self._current(job_id)
+        for key in [*self._report_keys(job), *self._dedupe_keys(job)]:
+            await asyncio.to_thread(self._state.set_key, key, job_id)
+
+    async def _completed_source(self, job_id: str, keys: list[str]) -> Optional[Job]:
+        for key in keys:
+            source_id = await asyncio.to_thread(self._state.get_key, key)
+            if not source_id or source_id == job_id:
+                continue
+            source = await self.get(source_id)
+            if source and source.status == "completed" and source.report:
+                return source
+        return None
+
+    async def _complete_with_report(self, job_id: str, report: FactCheckReport, raw: dict[str, Any]) -> None:
+        report_path = self._report_path(job_id)
+        await write_json_async(report_path, report.model_dump(mode="json"))
+        await write_json_async(self._raw_response_path(job_id), raw)
+        await self._checkpoint(job_id, "fact_check", report_path)
+        await self.update(job_id, status="completed", progress=100, error=None, report=report)
+
+    async def _adopt_transcript(self, job_id: str, source: Job, **fields: Any) -> str:
+        transcript = source.transcript or ""
+        transcript_path = self._transcript_path(job_id)
+        await write_text_async(transcript_path, transcript)
+        await self._checkpoint(job_id, "transcribe", transcript_path)
+        await self.update(
+            job_id,
+            transcript=transcript,
+            transcript_source="cache",
+            source_job_id=source.id,
+            **fields,
+        )
+        return transcript
+
+    async def _reuse_report(self, job_id: str) -> bool:
+        """Complete the job from an existing report for the same video, found by canonical id or audio hash."""
+        job = await self._current(job_id)
+        source = await self._completed_source(job_id, self._dedupe_keys(job))
+        if not source:
+            return False
+        if not job.transcript:
+            await self._adopt_transcript(job_id, source)
+        else:
+            await self.update(job_id, source_job_id=source.id)
+        await self._complete_with_report(job_id, source.report, {"mode": "dedupe", "source_job_id": source.id})
+        return True
+
+    async def _translate_stage(self, job: Job, api_key: Optional[str]) -> bool:
+        """Translate the latest completed report for this video; False when there is none to reuse."""
+        job_id = job.id
+        source = await self._completed_source(job_id, self._report_keys(job))
+        if not source:
+            return False
+
+        await self._adopt_transcript(job_id, source, status="translating", progress=70)
+        if source.output_language == job.output_language:
+            report, raw = source.report, {}
+        else:
+            async with self._span(job_id, "translate"):
+                report, raw = await self._run_stage(job_id, "fact_check", lambda: self._translate(job, source.report, api_key))
+        await self._complete_with_report(
+            job_id,
+            report,
+            {"mode": "translate", "source_job_id": source.id, "response": raw, "execution": self._execution_log(job_id)},
+        )
+        return True
+
+    async def _translate(self, job: Job, report: FactCheckReport, api_key: Optional[str]) -> tuple[FactCheckReport, dict[str, Any]]:
+        fields_json = json.dumps(extract_translatable(report), ensure_ascii=False)
+        # The reply is about as long as the fields being translated.
+        tokens = estimate_tokens(TRANSLATE_SYSTEM_PROMPT, fields_json) * 2
+
+        async def run(provider: str) -> tuple[FactCheckReport, dict[str, Any]]:
+            key = self._provider_key(job, provider, api_key)
+            if provider == "gemini":
+                call = lambda: gemini_translate(report=report, output_language=job.output_language, api_key=key)
+            else:
+                call = lambda: openai_translate(
+                    report=report, output_language=job.output_language, api_key=key, **self._openai_options(provider)
+                )
+            return await self._provider_call(job, "translate", provider, key, tokens, call)
+
+        return await self._execute(job, "translate", run, api_key=api_key)
+
+    async def _use_cached_transcript(self, job_id: str, transcript: str) -> None:
+        path = self._transcript_path(job_id)
+        await write_text_async(path, transcript)
+        await self._checkpoint(job_id, "transcribe", path)
+        await self.update(job_id, transcript_source="cache")
+
+    async def _transcript_stage(self, job: Job, api_key: Optional[str]) -> str:
+        """Download + transcribe, reusing checkpoints and the shared transcript cache where possible."""
+        job_id = job.id
+        use_cache = settings.transcript_cache_enabled and not job.force
+        url_keys = [url_key(_normalize_url(job.url))]
+        if job.canonical_id:
+            url_keys.append(video_key(job.canonical_id))
+
+        transcript_path = await self._valid_checkpoint(job_id, "transcribe")
+        if transcript_path is not None:
+            return await asyncio.to_thread(transcript_path.read_text, encoding="utf-8")
+
+        if use_cache:
+            cached = await asyncio.to_thread(self._transcripts.lookup, url_keys)
+            if cached is not None:
+                await self._use_cached_transcript(job_id, cached)
+                return cached
+
+        await self.update(job_id, status="downloading", progress=10)
+        if settings.captions_first and not job.checkpoints.get("download"):
+            async with self._span(job_id, "captions"):
+                transcript = await self._captions_stage(job)
+            if transcript is not None:
+                await asyncio.to_thread(self._transcripts.store, transcript, url_keys)
+                return transcript
+
+        audio_path = await self._valid_checkpoint(job_id, "download")
+        if audio_path is None:
             audio_dir = self._audio_dir(job_id)
-            mp3_path = await asyncio.to_thread(
-                download_mp3,
-                url=job.url,
-                out_dir=audio_dir,
-                cookies_file=settings.ytdlp_cookies_file,
+            audio_path, audio_stats = await self._run_stage(
+                job_id,
+                "download",
+                lambda: asyncio.to_thread(
+                    download_audio,
+                    url=job.url,
+                    out_dir=audio_dir,
+                    cookies_file=settings.ytdlp_cookies_file,
+                    codec=settings.audio_codec,
+                    sample_rate=settings.audio_sample_rate,
+                    channels=settings.audio_channels,
+                    bitrate=settings.audio_bitrate,
+                    trim_silence=settings.audio_trim_silence,
+                    silence_threshold_db=settings.audio_silence_threshold_db,
+                    silence_min_seconds=settings.audio_silence_min_seconds,
+                ),
             )
+            if audio_stats.download_seconds is not None:
+                self._record_span(job_id, "download", audio_stats.download_seconds)
+            if audio_stats.encode_seconds is not None:
+                self._record_span(job_id, "encode", audio_stats.encode_seconds)
+            self._count_bytes(job_id, "downloaded", audio_stats.source_bytes)
+            self._count_bytes(job_id, "encoded", audio_stats.encoded_bytes)
+            await self.update(job_id, audio_stats=audio_stats)
+            await self._checkpoint(job_id, "download", audio_path)
 
-            await self.update(job_id, status="transcribing", progress=40)
-            
-            transcript = ""
-            if job.provider == "gemini":
-                transcript = await asyncio.to_thread(gemini_transcribe, mp3_path, api_key=api_key)
-            elif job.provider == "openai":
-                transcript = await asyncio.to_thread(openai_transcribe, mp3_path, api_key=api_key)
-            elif job.provider == "deepseek":
-                # DeepSeek doesn't support audio, try Gemini then OpenAI with server keys
-                try:
-                    transcript = await asyncio.to_thread(gemini_transcribe, mp3_path, api_key=None)
-                except Exception:
-                    try:
-                        transcript = await asyncio.to_thread(openai_transcribe, mp3_path, api_key=None)
-                    except Exception:
-                        raise RuntimeError("DeepSeek selected but no transcription service (Gemini/OpenAI) available on server.")
-            
-            self._transcript_path(job_id).write_text(transcript, encoding="utf-8")
-
-            await self.update(job_id, status="fact_checking", progress=70, transcript=transcript)
-            
-            report = None
-            raw = {}
-            
-            if job.provider == "gemini":
-                report, raw = await asyncio.to_thread(
-                    gemini_fact_check,
+        audio_keys = [audio_key(self._audio_hash(await self._current(job_id)))]
+        if use_cache:
+            cached = await asyncio.to_thread(self._transcripts.lookup, audio_keys)
+            if cached is not None:
+                await asyncio.to_thread(self._transcripts.store, cached, url_keys)
+                await self._use_cached_transcript(job_id, cached)
+                return cached
+
+        await self.update(job_id, status="transcribing", progress=40)
+        audio_stats = (await self._current(job_id)).audio_stats
+        with collect_stats() as stats:
+            async with self._span(job_id, "transcribe"):
+                with timed("transcribe_seconds"):
+                    transcript, segments = await self._transcribe_audio(job, audio_path, api_key)
+        if "upload_seconds" in stats:
+            self._record_span(job_id, "upload", stats["upload_seconds"], provider="gemini")
+        transcript_path = self._transcript_path(job_id)
+        await write_text_async(transcript_path, transcript)
+        await self._checkpoint(job_id, "transcribe", transcript_path)
+        if audio_stats:
+            audio_stats = audio_stats.model_copy(
+                update={k: stats[k] for k in ("upload_seconds", "transcribe_seconds") if k in stats}
+            )
+        await self.update(job_id, transcript_source="audio", transcript_segments=segments, audio_stats=audio_stats)
+        await asyncio.to_thread(self._transcripts.store, transcript, [*url_keys, *audio_keys])
+        return transcript
+
+    async def _captions_stage(self, job: Job) -> Optional[str]:
+        """Build the transcript from platform captions; None (with a recorded reason) to fall back to audio."""
+        job_id = job.id
+        info = await self._probe(job)
+        if not info:
+            await self.update(job_id, captions_skipped="video metadata unavailable")
+            return None
+        track = select_track(info, allow_auto=settings.captions_allow_auto)
+        if not track:
+            await self.update(job_id, captions_skipped="no caption track in the spoken language")
+            return None
+
+        language, kind = track
+        try:
+            async with self.scheduler.stage("download"):
+                vtt_path = await asyncio.to_thread(
+                    download_subtitles,
+                    url=job.url,
+                    out_dir=self._audio_dir(job_id),
+                    language=language,
+                    automatic=kind == "auto",
+                    cookies_file=settings.ytdlp_cookies_file,
+                )
+            text = vtt_to_text(await asyncio.to_thread(vtt_path.read_text, encoding="utf-8"))
+        except (DownloadError, OSError) as e:
+            await self.update(job_id, captions_skipped=f"caption download failed: {e}")
+            return None
+
+        duration = info.get("duration")
+        reason = assess(
+            text,
+            duration=float(duration) if isinstance(duration, (int, float)) else None,
+            min_words=settings.captions_min_words,
+            min_words_per_minute=settings.captions_min_words_per_minute,
+        )
+        if reason:
+            await self.update(job_id, captions_skipped=f"{kind} {language} captions rejected: {reason}")
+            return None
+
+        transcript_path = self._transcript_path(job_id)
+        await write_text_async(transcript_path, text)
+        await self._checkpoint(job_id, "transcribe", transcript_path)
+        await self.update(
+            job_id,
+            transcript_source="captions",
+            captions=caption_info(language, kind, text),
+            captions_skipped=None,
+        )
+        return text
+
+    async def _transcribe_audio(
+        self, job: Job, audio_path: Path, api_key: Optional[str]
+    ) -> tuple[str, list[TranscriptSegment]]:
+        """Transcribe in one request, or in parallel silence-aligned chunks when the audio is long or large."""
+        current = await self._current(job.id)
+        duration = current.audio_stats.duration_seconds if current.audio_stats else None
+        if duration is None:
+            duration = await asyncio.to_thread(probe_duration, audio_path)
+        size = (await asyncio.to_thread(audio_path.stat)).st_size
+        needs_chunks = duration is not None and (
+            duration > settings.transcribe_chunk_threshold_seconds or size > settings.transcribe_max_upload_bytes
+        )
+        if not needs_chunks:
+            text = await self._run_stage(job.id, "transcribe", lambda: self._transcribe(job, audio_path, api_key))
+            segments = [TranscriptSegment(start=0.0, end=duration, text=text)] if duration else []
+            return text, segments
+
+        async with self.scheduler.stage("transcribe"):
+            chunks = await asyncio.to_thread(
+                split_audio,
+                audio_path,
+                self._audio_dir(job.id) / "chunks",
+                duration=duration,
+                target_seconds=settings.transcribe_chunk_seconds,
+                overlap_seconds=settings.transcribe_chunk_overlap_seconds,
+            )
+            sem = asyncio.Semaphore(max(1, settings.transcribe_chunk_concurrency))
+
+            async def transcribe_chunk(chunk: AudioChunk) -> str:
+                async with sem:
+                    return await retry_async(
+                        lambda: self._transcribe(job, chunk.path, api_key),
+                        attempts=settings.stage_max_attempts,
+                        base_delay=settings.retry_base_delay,
+                        max_delay=settings.retry_max_delay,
+                        rate_limit_attempts=settings.rate_limit_max_attempts,
+                    )
+
+            texts = await asyncio.gather(*(transcribe_chunk(c) for c in chunks))
+
+        pieces = stitch(list(texts))
+        segments = [
+            TranscriptSegment(start=round(c.start, 3), end=round(c.end, 3), text=piece)
+            for c, piece in zip(chunks, pieces)
+            if piece
+        ]
+        return "\n".join(seg.text for seg in segments), segments
+
+    async def _prior_checks(self, job: Job, transcript: str) -> list[dict[str, Any]]:
+        """Near-matching verdicts from earlier reports in the same language, as prompt context."""
+        if not settings.claim_cache_enabled or settings.claim_cache_max_context <= 0:
+            return []
+        matches = await asyncio.to_thread(
+            self._claims.match_transcript,
+            transcript,
+            threshold=settings.claim_cache_similarity,
+            max_age=timedelta(days=settings.claim_cache_ttl_days),
+            output_language=job.output_language,
+            limit=settings.claim_cache_max_context,
+        )
+        return as_prompt_context(matches)
+
+    async def _index_claims(self, job: Job, report: FactCheckReport, *, only: Optional[list[int]] = None) -> None:
+        if not settings.claim_cache_enabled:
+            return
+        try:
+            await asyncio.to_thread(
+                self._claims.add_report, report, job_id=job.id, output_language=job.output_language, only=only
+            )
+        except Exception:
+            logger.exception("Failed to index claims of job %s", job.id)
+
+    def _execution_log(self, job_id: str) -> list[dict[str, Any]]:
+        return [record.model_dump(mode="json") for record in self._executions.pop(job_id, [])]
+
+    @staticmethod
+    def _provider_key(job: Job, provider: str, api_key: Optional[str]) -> str:
+        """The request's key for the job's own provider; failover providers use server keys."""
+        if provider == job.provider and api_key:
+            return api_key
+        return server_key(provider)
+
+    @staticmethod
+    def _openai_options(provider: str) -> dict[str, Any]:
+        if provider == "openai":
+            return {}
+        if provider == "deepseek":
+            return {"base_url": settings.deepseek_base_url, "model": settings.deepseek_model}
+        raise RuntimeError(f"Unknown provider: {provider}")
+
+    async def _execute(
+        self,
+        job: Job,
+        stage: str,
+        run: Callable[[str], Awaitable[T]],
+        *,
+        api_key: Optional[str],
+        policy: Optional[str] = None,
+    ) -> T:
+        """
+        Run a provider call under the failover/hedging policy of `policy`
+        (default: the stage itself) and log which provider served it.
+
+        Other providers run on the server's keys, so a request that brought its
+        own key only fails over when `allow_server_key_failover` is set; the
+        operator would pay, and the data would go to a provider the user didn't
+        pick. Stand-ins for a stage the job's provider can't serve are always used.
+        """
+        policy = policy or stage
+        configured = stage_providers(policy, job.provider)
+        chain = [p for p in configured if p == job.provider or server_key(p)]
+        allowed = job.provider not in configured or not api_key or settings.allow_server_key_failover
+        providers = chain if allowed else [p for p in chain if p == job.provider]
+        if not providers and policy == "transcribe" and job.provider == "deepseek":
+            raise RuntimeError("DeepSeek selected but no transcription service (Gemini/OpenAI) available on server.")
+        result, record = await execute(stage, providers, run, hedge=hedging_enabled(policy))
+        if api_key and record.provider != job.provider:
+            logger.warning("Job %s: %s served by %s on the server key", job.id, stage, record.provider)
+        record = record.model_copy(
+            update={
+                "server_key_failover": any(p != job.provider for p in providers),
+                "withheld": [p for p in chain if p not in providers],
+            }
+        )
+        self._executions.setdefault(job.id, []).append(record)
+        return result
+
+    async def _transcribe(self, job: Job, audio_path: Path, api_key: Optional[str]) -> str:
+        size = (await asyncio.to_thread(audio_path.stat)).st_size
+
+        async def run(provider: str) -> str:
+            key = self._provider_key(job, provider, api_key)
+            if provider == "gemini":
+                call = lambda: gemini_transcribe(audio_path, api_key=key)
+            else:
+                call = lambda: openai_transcribe(audio_path, api_key=key, **self._openai_options(provider))
+            model = settings.transcribe_model if provider == "gemini" else WHISPER_MODEL
+            self._count_bytes(job.id, "uploaded", size, provider=provider, model=model)
+            # Audio is budgeted as one request; the token cost isn't known until the reply.
+            return await self._provider_call(job, "transcribe", provider, key, 0, call)
+
+        return await self._execute(job, "transcribe", run, api_key=api_key)
+
+    async def _fact_check(self, job: Job, transcript: str, api_key: Optional[str]) -> tuple[FactCheckReport, dict[str, Any]]:
+        prior_checks = await self._prior_checks(job, transcript)
+        user_prompt = build_factcheck_user_prompt(
+            transcript=transcript, url=job.url, output_language=job.output_language, prior_checks=prior_checks
+        )
+        tokens = estimate_tokens(FACTCHECK_SYSTEM_PROMPT, user_prompt, _REPORT_SCHEMA_JSON) + settings.factcheck_output_tokens
+
+        async def run(provider: str) -> tuple[FactCheckReport, dict[str, Any]]:
+            key = self._provider_key(job, provider, api_key)
+            on_delta = stream.receiver(provider) if stream is not None else None
+            if provider == "gemini":
+                call = lambda: gemini_fact_check(
                     transcript=transcript,
                     url=job.url,
                     output_language=job.output_language,
-                    api_key=api_key,
+                    api_key=key,
+                    prior_checks=prior_checks,
+                    on_delta=on_delta,
                 )
-            elif job.provider == "openai":
-                report, raw = await asyncio.to_thread(
-                    openai_fact_check,
+            else:
+                call = lambda: openai_fact_check(
                     transcript=transcript,
                     url=job.url,
                     output_language=job.output_language,
-                    api_key=api_key,
+                    api_key=key,
+                    prior_checks=prior_checks,
+                    on_delta=on_delta,
+                    **self._openai_options(provider),
+                )
+            return await self._provider_call(job, "fact_check", provider, key, tokens, call)
+
+        stream = _ReportStream(self, job.id) if settings.stream_reports else None
+        try:
+            report, raw = await self._execute(job, "fact_check", run, api_key=api_key)
+        finally:
+            if stream is not None:
+                await stream.close()
+        return report, {**raw, "prior_claims": prior_checks}
+
+    async def _generate_json(
+        self,
+        job: Job,
+        api_key: Optional[str],
+        stage: str,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        grounded: bool,
+        output_tokens: int,
+    ) -> tuple[Any, dict[str, Any]]:
+        """A single JSON call under the fact-check execution policy and rate limits."""
+        tokens = estimate_tokens(system_prompt, user_prompt) + output_tokens
+
+        async def run(provider: str) -> tuple[Any, dict[str, Any]]:
+            key = self._provider_key(job, provider, api_key)
+            if provider == "gemini":
+                call = lambda: gemini_generate_json(
+                    system_prompt=system_prompt, user_prompt=user_prompt, grounded=grounded, api_key=key
                 )
-            elif job.provider == "deepseek":
-                report, raw = await asyncio.to_thread(
-                    openai_fact_check,
+            else:
+                call = lambda: openai_generate_json(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    grounded=grounded,
+                    api_key=key,
+                    **self._openai_options(provider),
+                )
+            return await self._provider_call(job, stage, provider, key, tokens, call)
+
+        return await self._execute(job, stage, run, api_key=api_key, policy="fact_check")
+
+    async def _cached_check(self, job: Job, claim: str) -> Optional[ClaimCheck]:
+        """A fresh cached verdict for a near-identical claim, reused without a model call."""
+        if not settings.claim_cache_enabled or job.force:
+            return None
+        matches = await asyncio.to_thread(
+            self._claims.match,
+            [claim],
+            threshold=settings.claim_cache_reuse_similarity,
+            max_age=timedelta(days=settings.claim_cache_ttl_days),
+            output_language=job.output_language,
+            limit=1,
+        )
+        return to_claim_check(matches[0].record) if matches else None
+
+    async def _per_claim_fact_check(
+        self, job: Job, transcript: str, api_key: Optional[str]
+    ) -> tuple[FactCheckReport, dict[str, Any]]:
+        """
+        Extract claims with one ungrounded call, verify them concurrently (each
+        published to `partial_report` as it finishes), then write the summary.
+        The overall score and verdict are computed from the claim verdicts.
+        """
+        job_id = job.id
+        extracted, extract_raw = await self._retrying(
+            job_id,
+            "claim extraction",
+            lambda: self._generate_json(
+                job,
+                api_key,
+                "claim_extract",
+                system_prompt=CLAIM_EXTRACT_SYSTEM_PROMPT,
+                user_prompt=build_claim_extract_user_prompt(
                     transcript=transcript,
                     url=job.url,
                     output_language=job.output_language,
-                    api_key=api_key,
-                    base_url="https://api.deepseek.com",
-                    model=settings.deepseek_model,
-                )
+                    max_claims=settings.per_claim_max_claims,
+                ),
+                grounded=False,
+                output_tokens=settings.per_claim_output_tokens,
+            ),
+        )
+        items = [
+            (str(item.get("claim") or "").strip(), item.get("quote"))
+            for item in (extracted.get("claims") if isinstance(extracted, dict) else None) or []
+            if isinstance(item, dict) and str(item.get("claim") or "").strip()
+        ][: max(1, settings.per_claim_max_claims)]
 
-            write_model(self._report_path(job_id), report)
-            write_json(self._raw_response_path(job_id), raw)
+        checks: list[Optional[ClaimCheck]] = [None] * len(items)
+        verify_raw: list[dict[str, Any]] = []
+        errors: list[Exception] = []
+        # Positions verified by a model call in this job. Reused verdicts keep
+        # their original record and failed placeholders are never cached.
+        verified: list[int] = []
+        reused = 0
+        await self.update(job_id, partial_report=PartialReport(total_claims=len(items)))
+        sem = asyncio.Semaphore(max(1, settings.per_claim_concurrency))
 
-            await self.update(job_id, status="completed", progress=100, report=report)
-        except DownloadError as e:
-            await self.update(job_id, status="failed", progress=100, error=f"Download failed: {e}")
-        except Exception as e:
-            await self.update(job_id, status="failed", progress=100, error=str(e))
-        finally:
-            async with self._lock:
-                self._running.discard(job_id)
+        async def verify(index: int, claim: str, quote: Optional[str]) -> None:
+            nonlocal reused
+            async with sem:
+                check = await self._cached_check(job, claim)
+                if check is not None:
+                    reused += 1
+                else:
+                    try:
+                        data, raw = await self._retrying(
+                            job_id,
+                            f"claim {index + 1}",
+                            lambda: self._generate_json(
+                                job,
+                                api_key,
+                                "claim_verify",
+                                system_prompt=CLAIM_VERIFY_SYSTEM_PROMPT,
+                                user_prompt=build_claim_verify_user_prompt(
+                                    claim=claim,
+                                    quote=quote if isinstance(quote, str) else None,
+                                    output_language=job.output_language,
+                                    schema_json=_CLAIM_SCHEMA_JSON,
+                                ),
+                                grounded=True,
+                                output_tokens=settings.per_claim_output_tokens,
+                            ),
+                        )
+                        check = ClaimCheck.model_validate({**data, "claim": claim})
+                        verify_raw.append(raw)
+                        verified.append(index)
+                    except Exception as e:
+                        errors.append(e)
+                        check = ClaimCheck(
+                            claim=claim, verdict="unverifiable", confidence=0, explanation=f"Verification failed: {e}"
+                        )
+            checks[index] = check
+            await self.update(
+                job_id,
+                partial_report=PartialReport(total_claims=len(items), claims=[c for c in checks if c is not None]),
+            )
+
+        await asyncio.gather(*(verify(i, claim, quote) for i, (claim, quote) in enumerate(items)))
+        if errors and len(errors) == len(items):
+            raise errors[0]
+
+        claims = [c for c in checks if c is not None]
+        # Every position is filled by now, so indices into `checks` are indices into the report's claims.
+        claims_json = json.dumps([c.model_dump(mode="json") for c in claims], ensure_ascii=False, indent=2)
+        composed, compose_raw = await self._retrying(
+            job_id,
+            "report summary",
+            lambda: self._generate_json(
+                job,
+                api_key,
+                "report_compose",
+                system_prompt=REPORT_COMPOSE_SYSTEM_PROMPT,
+                user_prompt=build_report_compose_user_prompt(
+                    transcript=transcript, claims_json=claims_json, output_language=job.output_language
+                ),
+                grounded=False,
+                output_tokens=settings.per_claim_output_tokens,
+            ),
+        )
+        report = build_report(composed, claims)
+        raw = {
+            "mode": "per_claim",
+            "claims_reused": reused,
+            "claims_failed": len(errors),
+            "verified_claims": sorted(verified),
+            "extract": extract_raw,
+            "verify": verify_raw,
+            "compose": compose_raw,
+        }
+        return report, raw
 
 
 job_store = JobStore(settings.data_dir)
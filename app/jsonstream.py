@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Optional
+
+
+_FENCE_START = re.compile(r"^\s*```(?:json)?\s*")
+_SCALAR_CHARS = set("-+.0123456789eEtruefalsn")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonStream:
+    """
+    Tolerant incremental parser for a JSON object arriving in chunks.
+
+    `snapshot()` returns the value parsed from everything received so far,
+    with open strings, arrays and objects closed and any trailing incomplete
+    key, number or literal dropped. A leading Markdown fence or prose before
+    the first `{` is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+        self._text = ""
+        self._dirty = False
+
+    def feed(self, chunk: str) -> None:
+        if chunk:
+            self._chunks.append(chunk)
+            self._dirty = True
+
+    @property
+    def text(self) -> str:
+        if self._dirty:
+            self._text += "".join(self._chunks)
+            self._chunks = []
+            self._dirty = False
+        return self._text
+
+    def snapshot(self) -> Optional[Any]:
+        text = _FENCE_START.sub("", self.text, count=1)
+        start = text.find("{")
+        if start == -1:
+            return None
+        candidate = _repair(text[start:])
+        if candidate is None:
+            return None
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+
+
+def _repair(text: str) -> Optional[str]:
+    """Longest prefix of `text` that can be closed into valid JSON, closed."""
+    stack: list[str] = []
+    # Per open object: True while the next string is a key.
+    expecting_key: list[bool] = []
+    in_string = False
+    string_is_key = False
+    escaped = False
+    in_scalar = False
+    cut: Optional[str] = None
+
+    def closers() -> str:
+        return "".join(_CLOSERS[c] for c in reversed(stack))
+
+    def value_done(end: int) -> None:
+        nonlocal cut
+        cut = text[:end] + closers()
+
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if string_is_key:
+                    pass
+                else:
+                    value_done(i + 1)
+            i += 1
+            continue
+
+        if in_scalar:
+            if ch in _SCALAR_CHARS:
+                i += 1
+                continue
+            in_scalar = False
+            value_done(i)
+            # fall through to handle the delimiter
+
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and expecting_key[-1]
+        elif ch in "{[":
+            stack.append(ch)
+            if ch == "{":
+                expecting_key.append(True)
+            value_done(i + 1)
+        elif ch in "}]":
+            if not stack:
+                break
+            opened = stack.pop()
+            if opened == "{":
+                expecting_key.pop()
+            value_done(i + 1)
+            if not stack:
+                return text[: i + 1]
+        elif ch == ":":
+            if stack and stack[-1] == "{":
+                expecting_key[-1] = False
+        elif ch == ",":
+            if stack and stack[-1] == "{":
+                expecting_key[-1] = True
+        elif ch in _SCALAR_CHARS:
+            in_scalar = True
+        i += 1
+
+    if in_string and not string_is_key:
+        # Close the partial string value, dropping a dangling escape sequence.
+        partial = text
+        tail = re.search(r"\\(u[0-9a-fA-F]{0,3})?$", partial)
+        if tail and not _escaped_backslash(partial, tail.start()):
+            partial = partial[: tail.start()]
+        return partial + '"' + closers()
+    return cut
+
+
+def _escaped_backslash(text: str, pos: int) -> bool:
+    """True if the backslash at `pos` is itself escaped (preceded by an odd run of backslashes)."""
+    run = 0
+    j = pos - 1
+    while j >= 0 and text[j] == "\\":
+        run += 1
+        j -= 1
+    return run % 2 == 1
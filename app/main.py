@@ -1,19 +1,69 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from .batches import InvalidBatchError, batch_store, parse_jsonl
+from .clients import registry as client_registry
 from .config import settings
+from .history import InvalidCursorError
+from .jobcache import CONTENT_FIELDS
 from .jobs import job_store
-from .schemas import AnalyzeRequest, HistoryItem, Job
+from .metrics import QUEUE_DEPTH, RUNNING_JOBS, registry as metrics_registry
+from .ratelimit import rate_limiter
+from .scheduler import QueueFullError
+from .schemas import (
+    AnalyzeRequest,
+    Batch,
+    BatchRequest,
+    HistoryPage,
+    Job,
+    JobCacheStats,
+    JobProgress,
+    JobStatus,
+    LimiterState,
+    OverallVerdict,
+    Provider,
+    RetryRequest,
+)
 
 
-app = FastAPI(title="Fact-Check Social Media", version="0.1.0")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_store.start()
+    yield
+    await job_store.stop()
+    await client_registry.aclose()
+
+
+app = FastAPI(title="Fact-Check Social Media", version="0.1.0", lifespan=lifespan)
+
+# Brotli when the optional brotli-asgi package is installed (it falls back to
+# gzip for clients that don't accept br); plain gzip otherwise. Event streams
+# are left uncompressed by both.
+try:
+    if not settings.compression_brotli:
+        raise ImportError
+    from brotli_asgi import BrotliMiddleware
+
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.compression_min_bytes, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.compression_min_bytes)
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -25,52 +75,315 @@ async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-@app.post("/api/analyze")
-async def analyze(req: AnalyzeRequest):
-    print(f"DEBUG: Received analyze request: {req.model_dump()}")
-    
-    api_key = req.api_key
-    
+def _api_key_or_server_key(provider: Provider, api_key: Optional[str]) -> Optional[str]:
     # Fallback to server keys if not provided
     if not api_key:
-        if req.provider == "gemini":
+        if provider == "gemini":
             api_key = settings.gemini_api_key
-        elif req.provider == "openai":
+        elif provider == "openai":
             api_key = settings.openai_api_key
-        elif req.provider == "deepseek":
+        elif provider == "deepseek":
             api_key = settings.deepseek_api_key
+    return api_key or None
 
+
+def _resolve_api_key(provider: Provider, api_key: Optional[str]) -> str:
+    api_key = _api_key_or_server_key(provider, api_key)
     if not api_key:
-        msg = f"{req.provider.title()} API key is required."
-        if req.provider == "gemini":
+        msg = f"{provider.title()} API key is required."
+        if provider == "gemini":
             msg += " Get free key: https://aistudio.google.com/app/apikey"
-        elif req.provider == "openai":
+        elif provider == "openai":
             msg += " Get key: https://platform.openai.com/api-keys"
-        elif req.provider == "deepseek":
+        elif provider == "deepseek":
             msg += " Get key: https://platform.deepseek.com/api_keys"
         raise HTTPException(status_code=400, detail=msg)
+    return api_key
+
+
+@app.post("/api/analyze")
+async def analyze(req: AnalyzeRequest):
+    # Never log the request body as a whole: it may carry the user's API key.
+    logger.info(
+        "Analyze request: url=%s provider=%s language=%s mode=%s force=%s",
+        req.url,
+        req.provider,
+        req.output_language,
+        req.mode,
+        req.force,
+    )
+
+    api_key = _resolve_api_key(req.provider, req.api_key)
 
     job, cached = await job_store.find_or_create(
         url=req.url, 
         output_language=req.output_language, 
         provider=req.provider,
         force=req.force, 
-        api_key=api_key
+        api_key=api_key,
+        mode=req.mode,
     )
     
     if job.status not in {"completed", "failed"}:
-        asyncio.create_task(job_store.run_pipeline(job.id, api_key=api_key))
+        try:
+            await job_store.submit(job.id, api_key=api_key)
+        except QueueFullError as e:
+            if cached:
+                # Joined a job another request (or process) owns: leave it be.
+                raise HTTPException(status_code=429, detail=str(e))
+            await job_store.update(job.id, status="failed", progress=100, error=str(e))
+            raise HTTPException(status_code=503, detail=str(e))
     return {"job_id": job.id, "cached": cached}
 
 
+async def _create_batch(requests: list[AnalyzeRequest]) -> Batch:
+    if len(requests) > settings.batch_max_items:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {settings.batch_max_items} items.")
+    logger.info("Batch request: %d item(s)", len(requests))
+    # Items without a usable key are reported per item instead of failing the batch.
+    api_keys = [_api_key_or_server_key(r.provider, r.api_key) for r in requests]
+    return await batch_store.create(requests, api_keys)
+
+
+@app.post("/api/batches", response_model=Batch)
+async def create_batch(req: BatchRequest):
+    """
+    Analyze many URLs at once. Items are deduplicated against each other and
+    against saved reports, and the batch takes turns with other work in the queue.
+    """
+    return await _create_batch(req.items)
+
+
+@app.post("/api/batches/jsonl", response_model=Batch)
+async def create_batch_jsonl(request: Request):
+    """Like `POST /api/batches`, with the body streamed as JSONL: one AnalyzeRequest object per line."""
+    try:
+        requests = await parse_jsonl(request.stream(), max_items=settings.batch_max_items)
+    except InvalidBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _create_batch(requests)
+
+
+@app.get("/api/batches/{batch_id}", response_model=Batch)
+async def get_batch(batch_id: str, items: bool = True):
+    """Aggregate progress; `?items=false` leaves out the per-item list."""
+    batch = await batch_store.get(batch_id, include_items=items)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@app.get("/api/batches/{batch_id}/export")
+async def export_batch(batch_id: str):
+    """The finished batch as JSONL, one line per item with its report, streamed in submission order."""
+    batch = await batch_store.get(batch_id, include_items=False)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if batch.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Batch is still running ({batch.progress.progress}% done).")
+    return StreamingResponse(
+        batch_store.export(batch_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.jsonl"'},
+    )
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[set[str]]:
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(requested - set(Job.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown job field(s): {', '.join(unknown)}")
+    return requested | {"id"}
+
+
+def _etag(*parts: object) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip() for tag in header.split(",")}
+    # Weak comparison: W/"x" and "x" name the same representation.
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or etag in candidates or bare in candidates
+
+
+def _not_modified_since(request: Request, updated_at) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have 1s resolution.
+    return updated_at.replace(microsecond=0) <= since
+
+
 @app.get("/api/jobs/{job_id}", response_model=Job)
-async def get_job(job_id: str):
+async def get_job(job_id: str, request: Request, fields: Optional[str] = None):
+    """
+    `fields=status,progress` returns only those fields (plus `id`). Responses
+    carry an ETag derived from `updated_at`, and conditional requests for an
+    unchanged job get a bodiless 304.
+    """
+    include = _parse_fields(fields)
+    job = await job_store.get(job_id, content=include is None or bool(include & CONTENT_FIELDS))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Queue position moves without touching the job, so it is part of the tag.
+    etag = _etag(
+        job.id,
+        job.updated_at.isoformat(),
+        ",".join(sorted(include)) if include else "*",
+        job.queue_position,
+        job.queue_depth,
+    )
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(job.updated_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _etag_matches(request, etag) or (
+        "if-none-match" not in request.headers
+        and job.status in {"completed", "failed"}
+        and _not_modified_since(request, job.updated_at)
+    ):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(job.model_dump(mode="json", include=include), headers=headers)
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events: `progress` events carry only status/progress fields,
+    `partial` events the report as far as it has been generated, then a
+    single `done` event carries the full job once it completes or fails.
+    """
+    queue = job_store.subscribe(job_id)
+    job = await job_store.get(job_id, content=False)
+    if not job:
+        job_store.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        current = job
+        last_sent = None
+        last_partial = None
+        idle = 0.0
+        try:
+            while True:
+                if current.status in {"completed", "failed"}:
+                    final = await job_store.get(job_id) or current
+                    yield _sse("done", final.model_dump_json())
+                    return
+                if current.partial_report is not None:
+                    partial = current.partial_report.model_dump_json()
+                    if partial != last_partial:
+                        yield _sse("partial", partial)
+                        last_partial = partial
+                progress = JobProgress.from_job(current)
+                # updated_at moves on every internal update; only push visible changes.
+                visible = progress.model_dump(exclude={"updated_at"})
+                if visible != last_sent:
+                    yield _sse("progress", progress.model_dump_json())
+                    last_sent = visible
+                # Updates from a job running in another worker process are not
+                # published here; poll for them (re-reads go by the job's version).
+                timeout = settings.event_poll_interval_seconds if job_store.updated_elsewhere(job_id) else 5
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=timeout)
+                    idle = 0.0
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    idle += timeout
+                    if idle >= 5:
+                        yield ": keepalive\n\n"
+                        idle = 0.0
+                # Re-read so queue position is current and missed events don't matter.
+                current = await job_store.get(job_id, content=False) or current
+        finally:
+            job_store.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs/{job_id}/retry", response_model=Job)
+async def retry_job(job_id: str, req: Optional[RetryRequest] = None):
     job = await job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    api_key = _resolve_api_key(job.provider, req.api_key if req else None)
+    try:
+        return await job_store.retry(job_id, api_key=api_key)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFullError as e:
+        await job_store.update(job_id, status="failed", progress=100, error=str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get("/api/limits", response_model=list[LimiterState])
+async def limits():
+    """Current rate-limiter budget and backoff state per provider and API key."""
+    return rate_limiter.snapshot()
+
+
+@app.get("/api/cache/jobs", response_model=JobCacheStats)
+async def job_cache_stats():
+    """Size and hit/miss/eviction counters of the in-memory job cache."""
+    return job_store.cache_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: stage, queue-wait and provider-call histograms, token and byte counters."""
+    QUEUE_DEPTH.set(job_store.scheduler.depth)
+    RUNNING_JOBS.set(job_store.running_count)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
+@app.get("/api/history", response_model=HistoryPage)
+async def history(
+    request: Request,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[JobStatus] = None,
+    provider: Optional[Provider] = None,
+    language: Optional[str] = None,
+    verdict: Optional[OverallVerdict] = None,
+):
+    try:
+        page = await job_store.list_history(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            provider=provider,
+            language=language,
+            verdict=verdict,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/api/history", response_model=list[HistoryItem])
-async def history(limit: int = 50):
-    return await job_store.list_history(limit=limit)
+    body = page.model_dump_json()
+    headers = {"ETag": _etag(body), "Cache-Control": "no-cache"}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+
+# Seconds; covers sub-second API calls up to long transcriptions.
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: (non-cumulative bucket counts + overflow, sum, count)
+        self._values: Dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip((*self.buckets, math.inf), counts):
+                    cumulative += n
+                    le = _labels(self.label_names, key, f'le="{_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                labels = _labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_number(round(total, 6))}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS: Histogram = registry.register(
+    Histogram("factcheck_stage_seconds", "Wall time of pipeline stages.", ["stage", "provider"])
+)
+QUEUE_WAIT_SECONDS: Histogram = registry.register(
+    Histogram("factcheck_queue_wait_seconds", "Time jobs spent waiting for a worker.")
+)
+JOB_SECONDS: Histogram = registry.register(
+    Histogram("factcheck_job_seconds", "Pipeline run time per job, by final status.", ["status"])
+)
+PROVIDER_CALL_SECONDS: Histogram = registry.register(
+    Histogram(
+        "factcheck_provider_call_seconds",
+        "Latency of provider API calls, including rate-limit waits.",
+        ["provider", "stage", "outcome"],
+    )
+)
+PROVIDER_TOKENS: Counter = registry.register(
+    Counter("factcheck_provider_tokens_total", "Tokens reported by providers.", ["provider", "model", "kind"])
+)
+BYTES: Counter = registry.register(
+    Counter(
+        "factcheck_bytes_total",
+        "Audio bytes downloaded, encoded and uploaded for transcription (uploads by provider and model).",
+        ["kind", "provider", "model"],
+    )
+)
+JOBS: Counter = registry.register(Counter("factcheck_jobs_total", "Finished pipeline runs.", ["status"]))
+QUEUE_DEPTH: Gauge = registry.register(Gauge("factcheck_queue_depth", "Jobs waiting for a worker."))
+RUNNING_JOBS: Gauge = registry.register(Gauge("factcheck_running_jobs", "Jobs running in this process."))
+
+
+def token_counts(raw: Any) -> Optional[tuple[int, int, int]]:
+    """(prompt, completion, total) tokens from an OpenAI (`usage`) or Gemini (`usage_metadata`) raw response."""
+    if not isinstance(raw, dict):
+        return None
+    usage = raw.get("usage")
+    if isinstance(usage, dict) and usage.get("total_tokens") is not None:
+        return (
+            int(usage.get("prompt_tokens") or 0),
+            int(usage.get("completion_tokens") or 0),
+            int(usage.get("total_tokens") or 0),
+        )
+    usage = raw.get("usage_metadata")
+    if isinstance(usage, dict) and usage:
+        return (
+            int(usage.get("prompt_token_count") or 0),
+            int(usage.get("candidates_token_count") or 0),
+            int(usage.get("total_token_count") or 0),
+        )
+    return None
@@ -3,56 +3,118 @@ from __future__ import annotations
 import json
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional, Tuple
-
-from openai import OpenAI
+from typing import Any, Callable, Optional, Tuple
 
+from .clients import openai_client
 from .config import settings
-from .prompts import FACTCHECK_SYSTEM_PROMPT, build_factcheck_user_prompt
+from .prompts import (
+    FACTCHECK_SYSTEM_PROMPT,
+    TRANSLATE_SYSTEM_PROMPT,
+    build_factcheck_user_prompt,
+    build_translate_user_prompt,
+)
 from .schemas import FactCheckReport
+from .translation import apply_translation, extract_translatable
+
+
+# Model used for every transcription, whatever the chat model is.
+WHISPER_MODEL = "whisper-1"
 
 
 class OpenAIError(RuntimeError):
     pass
 
 
-def _client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> OpenAI:
-    return OpenAI(
-        api_key=api_key or settings.openai_api_key,
-        base_url=base_url
+async def _complete(
+    client: Any,
+    *,
+    model: str,
+    messages: list[dict[str, str]],
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> tuple[str, dict[str, Any]]:
+    """
+    (output_text, raw_response_dict) for a JSON-mode chat completion. With
+    `on_delta` the response is streamed, each fragment passed to it, and the
+    raw dict rebuilt in the non-streaming shape.
+    """
+    if on_delta is None:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+        return response.choices[0].message.content or "", response.model_dump(mode="json")
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0.1,
+        stream=True,
+        stream_options={"include_usage": True},
     )
-
-
-def transcribe_audio_mp3(mp3_path: Path, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None) -> str:
-    client = _client(api_key, base_url)
-    model = model or settings.openai_model # Fallback, though usually whisper-1
-    
-    # OpenAI usually uses 'whisper-1' for transcription
-    transcribe_model = "whisper-1" 
-    
-    with mp3_path.open("rb") as f:
-        tx = client.audio.transcriptions.create(
-            model=transcribe_model,
-            file=f,
+    parts: list[str] = []
+    finish_reason = None
+    response_id = response_model = None
+    usage = None
+    async for chunk in stream:
+        response_id = chunk.id or response_id
+        response_model = chunk.model or response_model
+        if chunk.usage is not None:
+            usage = chunk.usage.model_dump(mode="json")
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        delta = choice.delta.content if choice.delta else None
+        if delta:
+            parts.append(delta)
+            on_delta(delta)
+    output_text = "".join(parts)
+    raw = {
+        "id": response_id,
+        "object": "chat.completion",
+        "model": response_model or model,
+        "choices": [
+            {"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": output_text}}
+        ],
+        "usage": usage,
+    }
+    return output_text, raw
+
+
+async def transcribe_audio_mp3(mp3_path: Path, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None) -> str:
+    client = openai_client(api_key, base_url)
+    # The SDK reads a Path asynchronously, so the upload doesn't block the loop.
+    try:
+        tx = await client.audio.transcriptions.create(
+            model=WHISPER_MODEL,
+            file=mp3_path,
             response_format="text",
         )
+    except Exception as e:
+        raise OpenAIError(f"OpenAI API error: {e}") from e
     
     if isinstance(tx, str):
         return tx
     return getattr(tx, "text", "") or ""
 
 
-def fact_check_transcript(
+async def fact_check_transcript(
     *, 
     transcript: str, 
     url: Optional[str] = None, 
     output_language: str = "ar",
     api_key: Optional[str] = None,
     base_url: Optional[str] = None,
-    model: Optional[str] = None
+    model: Optional[str] = None,
+    prior_checks: Optional[list[dict]] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> Tuple[FactCheckReport, dict[str, Any]]:
-    
-    client = _client(api_key, base_url)
+    """With `on_delta`, the reply is streamed and each text fragment passed to it."""
+
+    client = openai_client(api_key, base_url)
     model = model or settings.openai_model
     
     schema = FactCheckReport.model_json_schema()
@@ -60,22 +122,23 @@ def fact_check_transcript(
     # Add schema to prompt for models that don't support strict json_schema
     system_prompt = f"{FACTCHECK_SYSTEM_PROMPT}\n\nYou must respond with a valid JSON object matching this schema:\n{json.dumps(schema, indent=2)}"
     
-    user_prompt = build_factcheck_user_prompt(transcript=transcript, url=url, output_language=output_language)
+    user_prompt = build_factcheck_user_prompt(
+        transcript=transcript, url=url, output_language=output_language, prior_checks=prior_checks
+    )
 
     try:
-        response = client.chat.completions.create(
+        output_text, raw = await _complete(
+            client,
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            response_format={"type": "json_object"},
-            temperature=0.1,
+            on_delta=on_delta,
         )
     except Exception as e:
         raise OpenAIError(f"OpenAI API error: {e}") from e
 
-    output_text = response.choices[0].message.content or ""
     if not output_text:
         raise OpenAIError("Empty model output.")
 
@@ -93,6 +156,90 @@ def fact_check_transcript(
          # Try to be lenient if possible, or just fail
          raise OpenAIError(f"Validation failed: {e}") from e
 
-    raw = response.model_dump(mode="json")
     return report, raw
 
+
+
+async def translate_report(
+    *,
+    report: FactCheckReport,
+    output_language: str = "ar",
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None
+) -> Tuple[FactCheckReport, dict[str, Any]]:
+    """
+    Translate the human-readable fields of an existing report with a single
+    ungrounded call. Verdicts, scores and sources are kept as-is.
+    """
+    client = openai_client(api_key, base_url)
+    model = model or settings.openai_model
+
+    fields_json = json.dumps(extract_translatable(report), ensure_ascii=False, indent=2)
+    user_prompt = build_translate_user_prompt(fields_json=fields_json, output_language=output_language)
+
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": TRANSLATE_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+    except Exception as e:
+        raise OpenAIError(f"OpenAI API error: {e}") from e
+
+    output_text = response.choices[0].message.content or ""
+    if not output_text:
+        raise OpenAIError("Empty model output.")
+    try:
+        translated = json.loads(output_text)
+    except json.JSONDecodeError as e:
+        raise OpenAIError(f"Model did not return valid JSON: {e}") from e
+    if not isinstance(translated, dict):
+        raise OpenAIError("Model did not return a JSON object.")
+
+    return apply_translation(report, translated), response.model_dump(mode="json")
+
+
+async def generate_json(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    grounded: bool = False,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[Any, dict[str, Any]]:
+    """
+    One JSON-returning chat call. `grounded` is accepted for parity with the
+    Gemini pipeline; Chat Completions has no built-in web search.
+    Returns (parsed_json, raw_response_dict).
+    """
+    client = openai_client(api_key, base_url)
+    model = model or settings.openai_model
+
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+    except Exception as e:
+        raise OpenAIError(f"OpenAI API error: {e}") from e
+
+    output_text = response.choices[0].message.content or ""
+    if not output_text:
+        raise OpenAIError("Empty model output.")
+    try:
+        data = json.loads(output_text)
+    except json.JSONDecodeError as e:
+        raise OpenAIError(f"Model did not return valid JSON: {e}") from e
+
+    return data, response.model_dump(mode="json")
@@ -1,3 +1,8 @@
+from __future__ import annotations
+
+import json
+
+
 FACTCHECK_SYSTEM_PROMPT = """\
 You are a meticulous, skeptical fact-checker for social media videos (Instagram, YouTube, X/Twitter, TikTok style).
 
@@ -79,10 +84,25 @@ LANGUAGE_NAME_BY_CODE = {
 }
 
 
-def build_factcheck_user_prompt(*, transcript: str, url: str | None = None, output_language: str = "ar") -> str:
+def build_factcheck_user_prompt(
+    *,
+    transcript: str,
+    url: str | None = None,
+    output_language: str = "ar",
+    prior_checks: list[dict] | None = None,
+) -> str:
     lang_code = (output_language or "").strip().lower() or "ar"
     lang_name = LANGUAGE_NAME_BY_CODE.get(lang_code, lang_code)
     meta = f"Video URL: {url}\n\n" if url else ""
+    prior = ""
+    if prior_checks:
+        prior = (
+            "Previously verified claims from other videos that resemble statements in this transcript (JSON lines).\n"
+            "If the transcript makes the same claim, you may reuse the verdict and sources instead of searching again,\n"
+            "unless the claim is time-sensitive or the evidence may have changed. Ignore entries that don't match.\n"
+            + "".join(json.dumps(c, ensure_ascii=False) + "\n" for c in prior_checks)
+            + "\n"
+        )
     return (
         f"{meta}"
         f"Requested output language: {lang_name} (code: {lang_code}).\n"
@@ -91,6 +111,7 @@ def build_factcheck_user_prompt(*, transcript: str, url: str | None = None, outp
         "For sources_used and per-claim sources: keep source titles/publishers as they appear on the source (do not translate).\n\n"
         "Transcript (verbatim, may contain errors):\n"
         f"{transcript}\n\n"
+        f"{prior}"
         "Task:\n"
         "1) Extract the distinct factual claims (including implied numeric/statistical claims).\n"
         "2) Verify each claim using web_search.\n"
@@ -98,3 +119,117 @@ def build_factcheck_user_prompt(*, transcript: str, url: str | None = None, outp
         "4) Assess danger/harm potential and recommend an on-screen warning if needed.\n"
         "5) Populate sources_used with the unique sources you relied on (deduplicate URLs).\n"
     )
+
+
+TRANSLATE_SYSTEM_PROMPT = """\
+You are a professional translator localizing a completed fact-check report.
+
+You receive a JSON object containing only the human-readable text fields of the report.
+Translate every string value into the requested language and return a JSON object with exactly the same shape:
+the same keys, the same list lengths and the same order.
+
+Rules:
+- Do NOT add, drop, merge or reorder items.
+- Do NOT translate JSON keys.
+- Keep null values as null.
+- Keep URLs, numbers, proper names, and quoted titles of sources unchanged.
+- Preserve meaning precisely; do not soften or strengthen any statement.
+"""
+
+
+def build_translate_user_prompt(*, fields_json: str, output_language: str = "ar") -> str:
+    lang_code = (output_language or "").strip().lower() or "ar"
+    lang_name = LANGUAGE_NAME_BY_CODE.get(lang_code, lang_code)
+    return (
+        f"Target language: {lang_name} (code: {lang_code}).\n\n"
+        "Report fields to translate (JSON):\n"
+        f"{fields_json}\n"
+    )
+
+
+CLAIM_EXTRACT_SYSTEM_PROMPT = """\
+You extract checkable factual claims from social media video transcripts.
+
+Rules:
+- List each distinct factual claim once, including implied numeric/statistical claims.
+- Skip opinions, jokes, satire, rhetorical questions, greetings and pure anecdotes.
+- Phrase each claim as a short, self-contained sentence that can be verified on its own.
+- Include the transcript excerpt the claim comes from as `quote` (verbatim, untranslated).
+- Do not verify anything and do not search the web.
+
+Respond with a JSON object: {"claims": [{"claim": "...", "quote": "..."}]}
+"""
+
+
+def build_claim_extract_user_prompt(
+    *, transcript: str, url: str | None = None, output_language: str = "ar", max_claims: int = 20
+) -> str:
+    lang_code = (output_language or "").strip().lower() or "ar"
+    lang_name = LANGUAGE_NAME_BY_CODE.get(lang_code, lang_code)
+    meta = f"Video URL: {url}\n\n" if url else ""
+    return (
+        f"{meta}"
+        f"Write each `claim` in {lang_name} (code: {lang_code}).\n"
+        f"Return at most {max_claims} claims, most important first.\n\n"
+        "Transcript (verbatim, may contain errors):\n"
+        f"{transcript}\n"
+    )
+
+
+CLAIM_VERIFY_SYSTEM_PROMPT = """\
+You are a meticulous, skeptical fact-checker verifying ONE claim taken from a social media video.
+
+Rules:
+- Use the web_search tool to find evidence; prefer primary/authoritative sources.
+- Never hallucinate sources. Only cite sources you actually found.
+- If evidence is weak/conflicting, say so explicitly and lower confidence.
+- verdict must be one of: supported, contradicted, mixed, unverifiable, not_a_factual_claim.
+- Every field in the JSON schema is required. Use null for unknown strings and [] for empty lists.
+
+Output must follow the provided JSON schema exactly.
+"""
+
+
+def build_claim_verify_user_prompt(
+    *, claim: str, quote: str | None = None, output_language: str = "ar", schema_json: str
+) -> str:
+    lang_code = (output_language or "").strip().lower() or "ar"
+    lang_name = LANGUAGE_NAME_BY_CODE.get(lang_code, lang_code)
+    context = f"Transcript excerpt: {quote}\n" if quote else ""
+    return (
+        f"Claim: {claim}\n"
+        f"{context}\n"
+        f"Write `explanation` and `correction` in {lang_name} (code: {lang_code}); keep `claim` as given.\n"
+        "Keep source titles/publishers as they appear on the source (do not translate).\n\n"
+        "Respond with a JSON object matching this schema:\n"
+        f"{schema_json}\n"
+    )
+
+
+REPORT_COMPOSE_SYSTEM_PROMPT = """\
+You write the summary of a fact-check report whose claims have already been verified.
+
+You receive the transcript and the verified claims (JSON). Do not re-verify claims and do not change verdicts.
+
+Respond with a JSON object with exactly these keys:
+- summary: plain-language summary of what is right vs wrong.
+- whats_right: list of short strings.
+- whats_wrong: list of short strings.
+- missing_context: list of short strings.
+- danger: list of {"category", "severity", "description", "mitigation"}; category must be one of
+  medical_misinformation, financial_scam, illegal_instructions, self_harm, dangerous_challenge,
+  hate_or_harassment, privacy_or_doxxing, other; severity is 0–5.
+- limitations: string or null (e.g. ambiguous or likely mistranscribed passages).
+"""
+
+
+def build_report_compose_user_prompt(*, transcript: str, claims_json: str, output_language: str = "ar") -> str:
+    lang_code = (output_language or "").strip().lower() or "ar"
+    lang_name = LANGUAGE_NAME_BY_CODE.get(lang_code, lang_code)
+    return (
+        f"Write all text in {lang_name} (code: {lang_code}). Do NOT translate JSON keys or enum values.\n\n"
+        "Verified claims (JSON):\n"
+        f"{claims_json}\n\n"
+        "Transcript (verbatim, may contain errors):\n"
+        f"{transcript}\n"
+    )
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from .clients import server_key
+from .config import settings
+from .retry import backoff_delay, is_transient_error
+from .schemas import LimiterState
+
+
+T = TypeVar("T")
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return sum(len(t) for t in texts if t) // 4 + 1
+
+
+def tokens_used(raw: Any) -> Optional[int]:
+    """Actual total tokens from an OpenAI (`usage`) or Gemini (`usage_metadata`) raw response."""
+    if not isinstance(raw, dict):
+        return None
+    usage = raw.get("usage") or {}
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    usage = raw.get("usage_metadata") or {}
+    if isinstance(usage, dict) and isinstance(usage.get("total_token_count"), int):
+        return usage["total_token_count"] or None
+    return None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    current: Optional[BaseException] = exc
+    while current is not None:
+        headers = getattr(getattr(current, "response", None), "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+        current = current.__cause__ or current.__context__
+    return None
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth. 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(0, per_minute))
+        self.level = self.capacity
+        self._rate = self.capacity / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self._rate
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.level >= self.capacity
+
+    def take(self, amount: float, now: float) -> None:
+        if not self.capacity:
+            return
+        self._refill(now)
+        # May go negative when a call used more than estimated; later callers wait it off.
+        self.level -= amount
+
+
+class KeyLimiter:
+    """Request and token budgets for one (provider, API key), plus a shared backoff after 429/5xx."""
+
+    def __init__(self, provider: str, key_id: str, *, rpm: int, tpm: int):
+        self.provider = provider
+        self.key_id = key_id
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiting = 0
+        self.throttled_total = 0
+        self._failures = 0
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()  # FIFO, so waiting calls are served in arrival order
+
+    async def acquire(self, tokens: int) -> None:
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    wait = max(
+                        self._blocked_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(tokens, now),
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                now = time.monotonic()
+                self.requests.take(1, now)
+                self.tokens.take(min(tokens, self.tokens.capacity) if self.tokens.capacity else 0, now)
+        finally:
+            self.waiting -= 1
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        if actual is not None and actual != estimated:
+            self.tokens.take(actual - estimated, time.monotonic())
+
+    def idle(self) -> bool:
+        """No waiting calls, no backoff and full budgets: a fresh limiter would behave the same."""
+        now = time.monotonic()
+        return (
+            not self.waiting
+            and not self._failures
+            and self._blocked_until <= now
+            and self.requests.full(now)
+            and self.tokens.full(now)
+        )
+
+    def succeeded(self) -> None:
+        self._failures = 0
+
+    def failed(self, exc: BaseException) -> None:
+        """Pause every call on this key: Retry-After if the provider sent one, else jittered exponential backoff."""
+        self._failures += 1
+        self.throttled_total += 1
+        delay = _retry_after(exc)
+        if delay is None:
+            delay = backoff_delay(self._failures, base=settings.retry_base_delay, cap=settings.retry_max_delay)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def state(self) -> LimiterState:
+        now = time.monotonic()
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return LimiterState(
+            provider=self.provider,
+            key_id=self.key_id,
+            rpm=int(self.requests.capacity),
+            tpm=int(self.tokens.capacity),
+            available_requests=int(self.requests.level) if self.requests.capacity else None,
+            available_tokens=int(self.tokens.level) if self.tokens.capacity else None,
+            waiting=self.waiting,
+            blocked_for_seconds=round(max(0.0, self._blocked_until - now), 2),
+            consecutive_failures=self._failures,
+            throttled_total=self.throttled_total,
+        )
+
+
+def _limits(provider: str) -> tuple[int, int]:
+    return {
+        "gemini": (settings.gemini_rpm, settings.gemini_tpm),
+        "openai": (settings.openai_rpm, settings.openai_tpm),
+        "deepseek": (settings.deepseek_rpm, settings.deepseek_tpm),
+    }.get(provider, (0, 0))
+
+
+class RateLimiter:
+    """
+    Per-provider, per-API-key limiters. Calls wait for budget instead of
+    failing; keys are identified by a short hash so state can be exposed.
+
+    Limiters are kept in least-recently-used order. Once there are more than
+    `max_keys`, the oldest idle ones are dropped; busy limiters are kept even
+    past the bound, so no waiting call or backoff is lost.
+    """
+
+    def __init__(self, max_keys: int = 1024) -> None:
+        self.max_keys = max(1, max_keys)
+        self._limiters: "OrderedDict[tuple[str, str], KeyLimiter]" = OrderedDict()
+
+    def limiter(self, provider: str, api_key: Optional[str]) -> KeyLimiter:
+        key = api_key or server_key(provider)
+        key_id = hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
+        limiter = self._limiters.get((provider, key_id))
+        if limiter is not None:
+            self._limiters.move_to_end((provider, key_id))
+            return limiter
+        rpm, tpm = _limits(provider)
+        limiter = self._limiters[(provider, key_id)] = KeyLimiter(provider, key_id, rpm=rpm, tpm=tpm)
+        self._evict()
+        return limiter
+
+    def _evict(self) -> None:
+        excess = len(self._limiters) - self.max_keys
+        for name, limiter in list(self._limiters.items())[:-1]:
+            if excess <= 0:
+                break
+            if limiter.idle():
+                del self._limiters[name]
+                excess -= 1
+
+    def __len__(self) -> int:
+        return len(self._limiters)
+
+    async def call(
+        self,
+        provider: str,
+        api_key: Optional[str],
+        tokens: int,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        usage: Callable[[T], Optional[int]] = lambda _: None,
+    ) -> T:
+        limiter = self.limiter(provider, api_key)
+        await limiter.acquire(tokens)
+        try:
+            result = await fn()
+        except Exception as e:
+            if is_transient_error(e):
+                limiter.failed(e)
+            raise
+        limiter.succeeded()
+        limiter.settle(tokens, usage(result))
+        return result
+
+    def snapshot(self) -> list[LimiterState]:
+        return [limiter.state() for limiter in self._limiters.values()]
+
+
+rate_limiter = RateLimiter(max_keys=settings.rate_limit_max_keys)
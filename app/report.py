@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from pydantic import ValidationError
+
+from .schemas import ClaimCheck, DangerItem, FactCheckReport, OverallVerdict, PartialReport, Source
+
+
+# Share of a claim that counts as accurate; unverifiable and non-factual claims don't count.
+_VERDICT_ACCURACY = {"supported": 1.0, "mixed": 0.5, "contradicted": 0.0}
+
+
+def score_claims(claims: Iterable[ClaimCheck]) -> tuple[int, OverallVerdict]:
+    """
+    Confidence-weighted share of accurate claims (0-100) and the matching
+    overall verdict, using the same bands as the fact-check prompt.
+    """
+    total = weight_sum = 0.0
+    for claim in claims:
+        accuracy = _VERDICT_ACCURACY.get(claim.verdict)
+        if accuracy is None:
+            continue
+        weight = max(claim.confidence, 10)
+        total += accuracy * weight
+        weight_sum += weight
+    if not weight_sum:
+        return 50, "unverifiable"
+
+    score = round(100 * total / weight_sum)
+    if score >= 90:
+        return score, "accurate"
+    if score >= 70:
+        return score, "mostly_accurate"
+    if score >= 40:
+        return score, "mixed"
+    if score >= 10:
+        return score, "misleading"
+    return score, "false"
+
+
+def collect_sources(claims: Iterable[ClaimCheck]) -> list[Source]:
+    """Unique per-claim sources, by URL, in first-seen order."""
+    seen: set[str] = set()
+    sources: list[Source] = []
+    for claim in claims:
+        for source in claim.sources:
+            url = source.url.strip()
+            if url and url not in seen:
+                seen.add(url)
+                sources.append(source)
+    return sources
+
+
+def _strings(value: Any) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(v).strip() for v in value if isinstance(v, (str, int, float)) and str(v).strip()]
+
+
+def build_report(composed: Any, claims: list[ClaimCheck]) -> FactCheckReport:
+    """
+    Assemble a report from verified claims and the model-written summary
+    fields. Score, verdict and sources come from the claims; malformed
+    summary fields are dropped rather than failing the whole report.
+    """
+    composed = composed if isinstance(composed, dict) else {}
+    danger: list[DangerItem] = []
+    for item in composed.get("danger") or []:
+        try:
+            danger.append(DangerItem.model_validate(item))
+        except ValidationError:
+            continue
+    limitations = composed.get("limitations")
+    score, verdict = score_claims(claims)
+    return FactCheckReport(
+        generated_at=datetime.now(tz=timezone.utc),
+        overall_score=score,
+        overall_verdict=verdict,
+        summary=str(composed.get("summary") or "").strip(),
+        sources_used=collect_sources(claims),
+        whats_right=_strings(composed.get("whats_right")),
+        whats_wrong=_strings(composed.get("whats_wrong")),
+        missing_context=_strings(composed.get("missing_context")),
+        claims=claims,
+        danger=danger,
+        limitations=limitations.strip() if isinstance(limitations, str) and limitations.strip() else None,
+    )
+
+
+def partial_from_stream(data: Any) -> Optional[PartialReport]:
+    """
+    The fields of a partially streamed report object that are already
+    usable: complete claims only, the summary even if still growing.
+    """
+    if not isinstance(data, dict):
+        return None
+    items = data.get("claims") if isinstance(data.get("claims"), list) else []
+    if items and list(data)[-1] == "claims":
+        # Still streaming the array: the last claim may be cut off mid-object.
+        items = items[:-1]
+    claims: list[ClaimCheck] = []
+    for item in items:
+        try:
+            claims.append(ClaimCheck.model_validate(item))
+        except ValidationError:
+            continue
+    partial = PartialReport(
+        summary=data["summary"] if isinstance(data.get("summary"), str) else None,
+        whats_right=_strings(data.get("whats_right")),
+        whats_wrong=_strings(data.get("whats_wrong")),
+        claims=claims,
+    )
+    for field in ("overall_score", "overall_verdict"):
+        try:
+            partial = PartialReport.model_validate({**partial.model_dump(), field: data.get(field)})
+        except ValidationError:
+            continue
+    return partial
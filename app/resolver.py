@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+_YOUTUBE_ID = r"[A-Za-z0-9_-]{11}"
+
+# (extractor, host pattern, path pattern); ids match what yt-dlp reports as `id`.
+_PATH_PATTERNS = (
+    ("youtube", r"(^|\.)youtu\.be$", rf"^/({_YOUTUBE_ID})$"),
+    ("youtube", r"(^|\.)youtube(-nocookie)?\.com$", rf"^/(?:shorts|embed|live|v)/({_YOUTUBE_ID})$"),
+    ("instagram", r"(^|\.)instagram\.com$", r"^/(?:[^/]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)$"),
+    ("twitter", r"(^|\.)(twitter|x)\.com$", r"^/[^/]+/status(?:es)?/(\d+)(?:/video/\d+)?$"),
+    ("tiktok", r"(^|\.)tiktok\.com$", r"^/@[^/]+/video/(\d+)$"),
+)
+
+
+def static_video_id(url: str) -> Optional[str]:
+    """Resolve well-known URL shapes to `extractor:id` without a network call."""
+    try:
+        parts = urlsplit((url or "").strip())
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+    path = parts.path.rstrip("/")
+
+    if re.search(r"(^|\.)youtube\.com$", host) and path == "/watch":
+        video_ids = parse_qs(parts.query).get("v") or []
+        if video_ids and re.fullmatch(_YOUTUBE_ID, video_ids[0]):
+            return f"youtube:{video_ids[0]}"
+
+    for extractor, host_re, path_re in _PATH_PATTERNS:
+        if not re.search(host_re, host):
+            continue
+        m = re.match(path_re, path)
+        if m:
+            return f"{extractor}:{m.group(1)}"
+    return None
+
+
+def canonical_id_from_info(info: dict[str, Any]) -> Optional[str]:
+    extractor = str(info.get("extractor_key") or info.get("extractor") or "").strip().lower()
+    video_id = str(info.get("id") or "").strip()
+    if not extractor or not video_id:
+        return None
+    return f"{extractor}:{video_id}"
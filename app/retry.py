@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .ytdlp_audio import DownloadError
+
+
+T = TypeVar("T")
+
+
+_TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Exceptions from these packages carry provider/HTTP messages worth matching;
+# anything else (yt-dlp output, our own errors) is not judged by its text.
+_SDK_MODULES = {"openai", "google", "httpx", "httpcore"}
+_RATE_LIMIT_MARKERS = (
+    "429",
+    "rate limit",
+    "ratelimit",
+    "resource_exhausted",
+    "resource exhausted",
+)
+# Out of credit or over a daily cap: waiting minutes won't help.
+_QUOTA_EXHAUSTED_MARKERS = (
+    "insufficient_quota",
+    "exceeded your current quota",
+    "billing",
+    "perday",
+    "per day",
+)
+# yt-dlp failures that are about the network rather than the video.
+_NETWORK_DOWNLOAD_MARKERS = (
+    "timed out",
+    "connection reset",
+    "connection refused",
+    "connection aborted",
+    "remote end closed connection",
+    "temporary failure in name resolution",
+    "network is unreachable",
+    "http error 429",
+    "http error 500",
+    "http error 502",
+    "http error 503",
+    "http error 504",
+)
+_TRANSIENT_MARKERS = _RATE_LIMIT_MARKERS + (
+    "timeout",
+    "timed out",
+    "temporarily",
+    "unavailable",
+    "overloaded",
+    "try again",
+    "connection reset",
+    "connection aborted",
+    "connection error",
+    "internal server error",
+    "bad gateway",
+    "gateway timeout",
+)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _from_sdk(exc: BaseException) -> bool:
+    return type(exc).__module__.split(".")[0] in _SDK_MODULES
+
+
+def _is_download_error(exc: BaseException) -> bool:
+    # Ours (yt-dlp run as a subprocess) or yt_dlp.utils.DownloadError if the library is used directly.
+    return isinstance(exc, DownloadError) or (
+        type(exc).__name__ == "DownloadError" and type(exc).__module__.startswith("yt_dlp")
+    )
+
+
+def is_quota_exhausted(exc: BaseException) -> bool:
+    """True for out-of-credit / daily-quota errors, which are not worth retrying."""
+    seen: set[int] = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        message = str(current).lower()
+        if any(marker in message for marker in _QUOTA_EXHAUSTED_MARKERS):
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    True for rate limits, timeouts and 5xx-style failures, including when
+    wrapped by a pipeline error. Exhausted quotas and download errors that
+    aren't network failures ("Video unavailable", private, removed) fail fast.
+    """
+    if is_quota_exhausted(exc):
+        return False
+    seen: set[int] = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if _is_download_error(current):
+            message = str(current).lower()
+            return any(marker in message for marker in _NETWORK_DOWNLOAD_MARKERS)
+        if isinstance(current, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+            return True
+        code = _status_code(current)
+        if code is not None and code in _TRANSIENT_STATUS:
+            return True
+        if _from_sdk(current):
+            message = str(current).lower()
+            if any(marker in message for marker in _TRANSIENT_MARKERS):
+                return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True for 429 / resource-exhausted errors, including when wrapped by a pipeline error."""
+    if is_quota_exhausted(exc):
+        return False
+    seen: set[int] = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if _status_code(current) == 429:
+            return True
+        if _from_sdk(current):
+            message = str(current).lower()
+            if any(marker in message for marker in _RATE_LIMIT_MARKERS):
+                return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def backoff_delay(attempt: int, *, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt number."""
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempt - 1))))
+
+
+async def retry_async(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    rate_limit_attempts: Optional[int] = None,
+    on_retry: Optional[Callable[[int, BaseException, float], Awaitable[None]]] = None,
+) -> T:
+    """
+    Call `fn` until it succeeds, retrying transient errors with jittered
+    exponential backoff. Rate-limit errors may get a larger budget
+    (`rate_limit_attempts`), since waiting them out usually works.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await fn()
+        except Exception as e:
+            limit = attempts
+            if rate_limit_attempts is not None and is_rate_limit_error(e):
+                limit = max(attempts, rate_limit_attempts)
+            if attempt >= max(1, limit) or not is_transient_error(e):
+                raise
+            delay = backoff_delay(attempt, base=base_delay, cap=max_delay)
+            if on_retry is not None:
+                await on_retry(attempt, e, delay)
+            await asyncio.sleep(delay)
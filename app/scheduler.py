@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+from .state import StateBackend, process_owner
+from .storage import CoalescingWriter, read_json
+
+
+logger = logging.getLogger(__name__)
+
+
+# Returns False if another process holds the job; its queue record is then left alone.
+Runner = Callable[[str, Optional[str]], Awaitable[Optional[bool]]]
+
+
+def _parse(value: str) -> Optional[tuple[float, str, str]]:
+    """(enqueue time, group, owner) of a `queue:` record; owner is "" in records from before owners."""
+    enqueued_at, _, rest = value.partition("|")
+    group, _, owner = rest.partition("|")
+    try:
+        return float(enqueued_at), group, owner
+    except ValueError:
+        return None
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobScheduler:
+    """
+    Bounded FIFO queues of job ids drained by a fixed pool of workers.
+
+    Jobs are enqueued into groups (the default group "" for single requests,
+    one per batch) and workers take from the groups in turn, so a large batch
+    cannot starve interactive requests or other batches. Each group holds at
+    most `max_queue_size` waiting jobs.
+
+    Waiting and running jobs are recorded per job in the shared `StateBackend`
+    (`queue:<job id>` -> enqueue time, group and owning process), so unfinished
+    work is re-enqueued after a restart; a process only takes over records whose
+    owner is gone (see `adopt`). User-supplied API keys are kept in memory only;
+    resumed jobs fall back to the server keys.
+    """
+
+    def __init__(
+        self,
+        queue_path: Path,
+        writer: CoalescingWriter,
+        state: StateBackend,
+        *,
+        workers: int,
+        max_queue_size: int,
+        stage_limits: Dict[str, int],
+        owner: Optional[str] = None,
+    ):
+        # Pre-StateBackend queue file, imported on start.
+        self.queue_path = queue_path
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self._writer = writer
+        self._state = state
+        self.owner = owner or process_owner()
+        # group -> job id -> api key; group order is the round-robin rotation.
+        self._queues: "OrderedDict[str, OrderedDict[str, Optional[str]]]" = OrderedDict()
+        self._group_of: Dict[str, str] = {}
+        self._active: set[str] = set()
+        self._enqueued_at: Dict[str, float] = {}
+        self._waited: Dict[str, float] = {}
+        self._stage_limits = {name: max(1, n) for name, n in stage_limits.items()}
+        self._stages: Dict[str, asyncio.Semaphore] = {}
+        self._cond: Optional[asyncio.Condition] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def persisted(self) -> list[tuple[str, str]]:
+        """(job id, group) of every recorded job, oldest first, including a legacy `queue_path` file."""
+        entries = []
+        for key, value in self._state.scan_keys("queue:"):
+            record = _parse(value)
+            if record is not None:
+                entries.append((record[0], key[len("queue:") :], record[1]))
+        entries.sort()
+        jobs = [(job_id, group) for _, job_id, group in entries]
+        data = read_json(self.queue_path)
+        if isinstance(data, dict) and isinstance(data.get("jobs"), list):
+            groups = data.get("groups") if isinstance(data.get("groups"), dict) else {}
+            jobs.extend((str(x), str(groups.get(x, ""))) for x in data["jobs"])
+        return jobs
+
+    def _persist(self, job_id: str, group: Optional[str]) -> None:
+        """Record a waiting or running job, or with `group=None` forget it."""
+        key = f"queue:{job_id}"
+        value = None if group is None else self._record(time.time(), group)
+        self._writer.submit(key, lambda: self._state.set_key(key, value))
+
+    def _record(self, enqueued_at: float, group: str) -> str:
+        return f"{enqueued_at:.6f}|{group}|{self.owner}"
+
+    def adopt(self, job_id: str, group: str, gone: Callable[[str], bool]) -> Optional[str]:
+        """
+        Atomically record a job as this process's if whoever recorded it is
+        `gone` (called with the owner, "" for unrecorded or pre-owner records).
+        Returns the job's group, or None if the owner is alive or another
+        process adopted the job first.
+        """
+        key = f"queue:{job_id}"
+        current = self._state.get_key(key)
+        record = _parse(current) if current is not None else None
+        enqueued_at, group, owner = record or (time.time(), group, "")
+        if not gone(owner):
+            return None
+        value = self._record(enqueued_at, group)
+        return group if self._state.claim_key(key, value, expected=current) == value else None
+
+    def _add(self, job_id: str, api_key: Optional[str], group: str) -> None:
+        self._queues.setdefault(group, OrderedDict())[job_id] = api_key
+        self._group_of[job_id] = group
+        self._enqueued_at[job_id] = time.monotonic()
+
+    async def start(self, runner: Runner, resume: Iterable[str] = (), groups: Optional[Dict[str, str]] = None) -> None:
+        if self._tasks:
+            return
+        groups = groups or {}
+        for job_id in resume:
+            if job_id not in self._group_of:
+                self._add(job_id, None, groups.get(job_id, ""))
+                self._persist(job_id, groups.get(job_id, ""))
+        if self._group_of:
+            logger.info("Resuming %d unfinished job(s)", len(self._group_of))
+        await self._writer.flush()
+        # Its jobs are recorded in the state backend now.
+        self.queue_path.unlink(missing_ok=True)
+        self._tasks = [asyncio.create_task(self._worker(runner)) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, job_id: str, api_key: Optional[str] = None, *, group: str = "") -> None:
+        cond = self._condition()
+        async with cond:
+            if job_id in self._active or job_id in self._group_of:
+                return
+            if len(self._queues.get(group, ())) >= self.max_queue_size:
+                raise QueueFullError("Too many analyses are queued right now. Please try again shortly.")
+            self._add(job_id, api_key, group)
+            self._persist(job_id, group)
+            cond.notify()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        1-based position among waiting jobs if nothing else is enqueued, or
+        None if the job is not waiting. Groups ahead of the job's own in the
+        rotation get one more turn than the groups after it.
+        """
+        group = self._group_of.get(job_id)
+        if group is None:
+            return None
+        index = list(self._queues[group]).index(job_id)
+        ahead = index
+        before = True
+        for name, queue in self._queues.items():
+            if name == group:
+                before = False
+                continue
+            ahead += min(len(queue), index + 1 if before else index)
+        return ahead + 1
+
+    def queue_wait(self, job_id: str) -> Optional[float]:
+        """Seconds the job waited before a worker took it; None if it didn't come through the queue."""
+        return self._waited.pop(job_id, None)
+
+    @property
+    def depth(self) -> int:
+        return len(self._group_of)
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        sem = self._stages.get(name)
+        if sem is None:
+            sem = self._stages[name] = asyncio.Semaphore(self._stage_limits.get(name, self.workers))
+        async with sem:
+            yield
+
+    async def _next(self) -> tuple[str, Optional[str]]:
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: bool(self._group_of))
+            group, queue = next(iter(self._queues.items()))
+            job_id, api_key = queue.popitem(last=False)
+            if queue:
+                self._queues.move_to_end(group)
+            else:
+                del self._queues[group]
+            del self._group_of[job_id]
+            self._active.add(job_id)
+            enqueued_at = self._enqueued_at.pop(job_id, None)
+            if enqueued_at is not None:
+                self._waited[job_id] = time.monotonic() - enqueued_at
+            return job_id, api_key
+
+    async def _worker(self, runner: Runner) -> None:
+        while True:
+            job_id, api_key = await self._next()
+            settled: Optional[bool] = True
+            try:
+                settled = await runner(job_id, api_key)
+            except asyncio.CancelledError:
+                # Leave the id in the persisted queue so it resumes on next start.
+                raise
+            except Exception:
+                logger.exception("Pipeline for job %s crashed", job_id)
+            self._active.discard(job_id)
+            if settled is not False:
+                self._persist(job_id, None)
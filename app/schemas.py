@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -70,11 +70,21 @@ class FactCheckReport(BaseModel):
 Provider = Literal["gemini", "openai", "deepseek"]
 
 
+AnalysisMode = Literal["full", "translate", "per_claim"]
+
+
 class AnalyzeRequest(BaseModel):
     url: str
     output_language: str = Field("ar", description="BCP-47 language code, e.g. ar, en, fr.")
     force: bool = Field(False, description="If true, re-run analysis and overwrite cached result for this URL+language.")
     provider: Provider = "gemini"
+    mode: AnalysisMode = Field(
+        "full",
+        description=(
+            "translate: reuse a completed report for this video in another language and only translate its text "
+            "(falls back to full when none exists). per_claim: extract claims first, then verify them in parallel."
+        ),
+    )
     api_key: Optional[str] = None
 
 
@@ -83,11 +93,96 @@ JobStatus = Literal[
     "downloading",
     "transcribing",
     "fact_checking",
+    "translating",
     "completed",
     "failed",
 ]
 
 
+PipelineStage = Literal["download", "transcribe", "fact_check"]
+
+
+TranscriptSource = Literal["audio", "cache", "captions"]
+
+
+class CaptionInfo(BaseModel):
+    language: str
+    kind: Literal["manual", "auto"]
+    words: int
+
+
+class AudioStats(BaseModel):
+    codec: str
+    sample_rate: int
+    channels: int
+    bitrate: Optional[str] = None
+    trimmed_silence: bool = False
+    source_bytes: int = Field(..., description="Size of the audio stream as downloaded.")
+    encoded_bytes: int = Field(..., description="Size of the file sent for transcription.")
+    bytes_saved: int
+    duration_seconds: Optional[float] = None
+    pcm_sha256: Optional[str] = Field(
+        None, description="Hash of the decoded samples; identifies the same audio across re-encodes and re-uploads."
+    )
+    download_seconds: Optional[float] = None
+    encode_seconds: Optional[float] = None
+    upload_seconds: Optional[float] = Field(
+        None, description="Gemini file upload, summed over chunks; OpenAI uploads inside the transcription request."
+    )
+    transcribe_seconds: Optional[float] = None
+
+
+class TranscriptSegment(BaseModel):
+    start: float = Field(..., description="Seconds from the start of the transcribed audio.")
+    end: float
+    text: str
+
+
+class StageCheckpoint(BaseModel):
+    stage: PipelineStage
+    path: str = Field(..., description="Artifact path relative to the job directory.")
+    sha256: str
+    completed_at: datetime
+
+
+class StageSpan(BaseModel):
+    stage: str = Field(..., description="download, encode, upload, captions, transcribe, fact_check or translate.")
+    provider: Optional[str] = None
+    started_at: datetime
+    seconds: float
+
+
+class ProviderUsage(BaseModel):
+    stage: str
+    provider: str
+    model: str
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+class JobMetrics(BaseModel):
+    queue_wait_seconds: Optional[float] = Field(None, description="Time the latest run waited for a worker.")
+    spans: List[StageSpan] = Field(default_factory=list)
+    usage: List[ProviderUsage] = Field(default_factory=list, description="Per stage, provider and model.")
+    bytes_downloaded: int = 0
+    bytes_encoded: int = Field(0, description="Size of the audio prepared for transcription.")
+    bytes_uploaded: int = 0
+
+
+class PartialReport(BaseModel):
+    """The usable part of a report while it is still being generated or verified claim by claim."""
+
+    total_claims: Optional[int] = Field(None, description="Known in per-claim mode once claims are extracted.")
+    summary: Optional[str] = None
+    overall_score: Optional[int] = Field(None, ge=0, le=100)
+    overall_verdict: Optional[OverallVerdict] = None
+    whats_right: List[str] = Field(default_factory=list)
+    whats_wrong: List[str] = Field(default_factory=list)
+    claims: List[ClaimCheck] = Field(default_factory=list)
+
+
 class Job(BaseModel):
     id: str
     url: str
@@ -98,17 +193,155 @@ class Job(BaseModel):
     updated_at: datetime
     progress: int = Field(0, ge=0, le=100)
     error: Optional[str] = None
+    mode: AnalysisMode = "full"
+    canonical_id: Optional[str] = Field(None, description="`extractor:video_id` the URL resolved to.")
+    source_job_id: Optional[str] = Field(None, description="Job whose transcript/report was reused.")
+    force: bool = Field(False, description="Created by a forced re-run; shared caches are bypassed.")
     transcript: Optional[str] = None
+    transcript_source: Optional[TranscriptSource] = None
+    transcript_segments: List[TranscriptSegment] = Field(default_factory=list)
+    audio_stats: Optional[AudioStats] = None
+    captions: Optional[CaptionInfo] = Field(None, description="Caption track used when transcript_source is captions.")
+    captions_skipped: Optional[str] = Field(None, description="Why platform captions were not used, if they were tried.")
     report: Optional[FactCheckReport] = None
+    partial_report: Optional[PartialReport] = None
+    attempts: int = Field(0, description="Number of times the pipeline has been started for this job.")
+    checkpoints: Dict[str, StageCheckpoint] = Field(default_factory=dict)
+    metrics: JobMetrics = Field(default_factory=JobMetrics)
+    queue_position: Optional[int] = Field(None, description="1-based position in the queue while status is queued.")
+    queue_depth: Optional[int] = Field(None, description="Number of jobs waiting in the queue.")
+
+
+class JobProgress(BaseModel):
+    """The small, frequently changing part of a Job, pushed over the event stream."""
+
+    id: str
+    status: JobStatus
+    progress: int
+    error: Optional[str] = None
+    updated_at: datetime
+    queue_position: Optional[int] = None
+    queue_depth: Optional[int] = None
+    claims_done: Optional[int] = None
+    claims_total: Optional[int] = None
+
+    @classmethod
+    def from_job(cls, job: "Job") -> "JobProgress":
+        return cls(
+            id=job.id,
+            status=job.status,
+            progress=job.progress,
+            error=job.error,
+            updated_at=job.updated_at,
+            queue_position=job.queue_position,
+            queue_depth=job.queue_depth,
+            claims_done=len(job.partial_report.claims) if job.partial_report else None,
+            claims_total=job.partial_report.total_claims if job.partial_report else None,
+        )
+
+
+class BatchRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(..., min_length=1)
+
+
+class BatchItem(BaseModel):
+    index: int = Field(..., description="Position in the submitted batch.")
+    url: str
+    output_language: str
+    provider: Provider
+    job_id: Optional[str] = None
+    cached: bool = Field(False, description="Joined an existing job or reused a saved report.")
+    duplicate_of: Optional[int] = Field(None, description="Earlier item with the same URL, language and provider; shares its job.")
+    error: Optional[str] = Field(None, description="Why the item was not submitted.")
+    status: Optional[JobStatus] = None
+
+
+class BatchProgress(BaseModel):
+    items: int
+    jobs: int = Field(..., description="Distinct jobs after deduplication.")
+    cached: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    progress: int = Field(0, ge=0, le=100, description="Share of jobs that have finished.")
+
+
+class Batch(BaseModel):
+    id: str
+    created_at: datetime
+    status: Literal["running", "completed"]
+    progress: BatchProgress
+    items: List[BatchItem] = Field(default_factory=list)
+
+
+class RetryRequest(BaseModel):
+    api_key: Optional[str] = None
 
 
 class HistoryItem(BaseModel):
     id: str
     url: str
     output_language: str
+    provider: Provider = "gemini"
     status: JobStatus
     created_at: datetime
     updated_at: datetime
     overall_score: Optional[int] = None
     overall_verdict: Optional[OverallVerdict] = None
     summary: Optional[str] = None
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next (older) page.")
+
+
+class LimiterState(BaseModel):
+    provider: str
+    key_id: str = Field(..., description="Short hash identifying the API key.")
+    rpm: int = Field(..., description="Requests per minute; 0 means unlimited.")
+    tpm: int = Field(..., description="Tokens per minute; 0 means unlimited.")
+    available_requests: Optional[int] = None
+    available_tokens: Optional[int] = None
+    waiting: int = 0
+    blocked_for_seconds: float = 0.0
+    consecutive_failures: int = 0
+    throttled_total: int = 0
+
+
+class ExecutionAttempt(BaseModel):
+    provider: str
+    outcome: Literal["won", "failed", "cancelled"]
+    seconds: float
+    error: Optional[str] = None
+
+
+class ExecutionRecord(BaseModel):
+    """Which provider served a stage and why (primary, failover after an error, or hedge)."""
+
+    stage: str
+    provider: str
+    reason: Literal["primary", "failover", "hedge"]
+    attempts: List[ExecutionAttempt] = Field(default_factory=list)
+    server_key_failover: bool = Field(
+        False, description="Whether providers other than the job's own could run on the server's keys."
+    )
+    withheld: List[str] = Field(
+        default_factory=list,
+        description="Failover providers left out because the request brought its own key.",
+    )
+
+
+class JobCacheStats(BaseModel):
+    entries: int
+    pinned: int = Field(..., description="Running jobs; kept in full outside the cache and never evicted.")
+    bytes: int = Field(..., description="Approximate serialized size of the resident entries.")
+    max_entries: int
+    max_bytes: int
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
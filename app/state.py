@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import importlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from uuid import uuid4
+
+from .storage import JournaledIndex, ensure_dir
+
+
+def process_owner() -> str:
+    """Lease owner id for this process: host, pid and a random suffix (pids get reused)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class StateBackend(ABC):
+    """
+    State shared by every JobStore that serves the same `data_dir`: the
+    cache/dedupe index (also holding transcript aliases and the run queue),
+    leases on running jobs and a version counter per job.
+
+    Methods may block and are meant to be called via `asyncio.to_thread`.
+    `shared` is False for backends only visible to the current process.
+    """
+
+    shared = True
+
+    @abstractmethod
+    def get_key(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def set_key(self, key: str, value: Optional[str]) -> None:
+        """Set or (with None) delete an index key."""
+
+    @abstractmethod
+    def scan_keys(self, prefix: str) -> list[tuple[str, str]]:
+        """All index entries whose key starts with `prefix`."""
+
+    @abstractmethod
+    def claim_key(self, key: str, value: str, *, expected: Optional[str]) -> str:
+        """
+        Atomically set `key` to `value` if it currently maps to `expected`
+        (None: unset). Returns the value the key maps to afterwards, which is
+        `value` only if this call won.
+        """
+
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the lease unless another owner holds an unexpired one."""
+
+    @abstractmethod
+    def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Extend a lease still held by `owner`; False if it was lost."""
+
+    @abstractmethod
+    def release_lease(self, name: str, owner: str) -> None: ...
+
+    @abstractmethod
+    def lease_holder(self, name: str) -> Optional[str]:
+        """Owner of the lease if it is held and unexpired, else None."""
+
+    @abstractmethod
+    def bump_version(self, job_id: str) -> int:
+        """Record that the job's files changed; returns the new version."""
+
+    @abstractmethod
+    def version(self, job_id: str) -> int:
+        """Current version of the job (0 if never written)."""
+
+    def import_keys(self, items: Iterable[tuple[str, str]], *, marker: str = "imported") -> None:
+        """One-time import (per `marker`) of an existing index; keys already present win."""
+
+    def close(self) -> None:
+        pass
+
+
+class LocalStateBackend(StateBackend):
+    """
+    Single-process state: the index is the journaled `url_index.json`, leases
+    and versions live in memory. Only safe with one worker process.
+    """
+
+    shared = False
+
+    def __init__(self, base_dir: Path, *, compact_every: int = 1000):
+        self._index = JournaledIndex(
+            base_dir / "url_index.json",
+            base_dir / "url_index.journal",
+            compact_every=compact_every,
+        )
+        self._lock = threading.Lock()
+        self._leases: Dict[str, tuple[str, float]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def get_key(self, key: str) -> Optional[str]:
+        return self._index.get(key)
+
+    def set_key(self, key: str, value: Optional[str]) -> None:
+        self._index.set(key, value)
+        self._index.persist()
+
+    def scan_keys(self, prefix: str) -> list[tuple[str, str]]:
+        return [(k, v) for k, v in self._index.items() if k.startswith(prefix)]
+
+    def claim_key(self, key: str, value: str, *, expected: Optional[str]) -> str:
+        with self._lock:
+            current = self._index.get(key)
+            if current != expected:
+                return current or ""
+            self.set_key(key, value)
+            return value
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            holder = self._leases.get(name)
+            if not holder or holder[0] != owner:
+                return False
+            self._leases[name] = (owner, time.monotonic() + ttl)
+            return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder and holder[0] == owner:
+                del self._leases[name]
+
+    def lease_holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            holder = self._leases.get(name)
+            return holder[0] if holder and holder[1] > time.monotonic() else None
+
+    def bump_version(self, job_id: str) -> int:
+        with self._lock:
+            self._versions[job_id] = self._versions.get(job_id, 0) + 1
+            return self._versions[job_id]
+
+    def version(self, job_id: str) -> int:
+        return self._versions.get(job_id, 0)
+
+    def import_keys(self, items: Iterable[tuple[str, str]], *, marker: str = "imported") -> None:
+        # Idempotent, so no marker is kept: the same index file is re-read on every start.
+        with self._lock:
+            for key, value in items:
+                if self._index.get(key) is None:
+                    self._index.set(key, value)
+            self._index.persist()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    job_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteStateBackend(StateBackend):
+    """
+    State in an SQLite database in WAL mode, safe across worker processes on
+    one host. Writes use `BEGIN IMMEDIATE`, so check-and-set operations are
+    atomic. Lease expiry uses wall-clock time, so hosts sharing the database
+    need reasonably synchronized clocks; SQLite itself is only reliable on a
+    local disk, so multi-node setups should plug in a network backend.
+    """
+
+    def __init__(self, db_path: Path, *, busy_timeout: float = 30.0):
+        ensure_dir(db_path.parent)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None, timeout=busy_timeout
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_key(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM keys WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_key(self, key: str, value: Optional[str]) -> None:
+        def apply(conn: sqlite3.Connection) -> None:
+            if value is None:
+                conn.execute("DELETE FROM keys WHERE key = ?", (key,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO keys (key, value) VALUES (?, ?)", (key, value))
+
+        self._write(apply)
+
+    def scan_keys(self, prefix: str) -> list[tuple[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM keys WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def claim_key(self, key: str, value: str, *, expected: Optional[str]) -> str:
+        def apply(conn: sqlite3.Connection) -> str:
+            row = conn.execute("SELECT value FROM keys WHERE key = ?", (key,)).fetchone()
+            current = row[0] if row else None
+            if current != expected:
+                return current or ""
+            conn.execute("INSERT OR REPLACE INTO keys (key, value) VALUES (?, ?)", (key, value))
+            return value
+
+        return self._write(apply)
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        def apply(conn: sqlite3.Connection) -> bool:
+            now = time.time()
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                (name, owner, now + ttl),
+            )
+            return True
+
+        return self._write(apply)
+
+    def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        def apply(conn: sqlite3.Connection) -> bool:
+            cur = conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                (time.time() + ttl, name, owner),
+            )
+            return cur.rowcount > 0
+
+        return self._write(apply)
+
+    def release_lease(self, name: str, owner: str) -> None:
+        self._write(lambda conn: conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)))
+
+    def lease_holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM leases WHERE name = ? AND expires_at > ?", (name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def bump_version(self, job_id: str) -> int:
+        def apply(conn: sqlite3.Connection) -> int:
+            conn.execute(
+                """
+                INSERT INTO versions (job_id, version) VALUES (?, 1)
+                ON CONFLICT(job_id) DO UPDATE SET version = version + 1
+                """,
+                (job_id,),
+            )
+            return conn.execute("SELECT version FROM versions WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+        return self._write(apply)
+
+    def version(self, job_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else 0
+
+    def import_keys(self, items: Iterable[tuple[str, str]], *, marker: str = "imported") -> None:
+        rows = list(items)
+
+        def apply(conn: sqlite3.Connection) -> None:
+            if conn.execute("SELECT value FROM meta WHERE key = ?", (marker,)).fetchone():
+                return
+            conn.executemany("INSERT OR IGNORE INTO keys (key, value) VALUES (?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')", (marker,))
+
+        self._write(apply)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(name: str, base_dir: Path, *, compact_every: int = 1000) -> StateBackend:
+    """
+    `sqlite` (default), `local`, or `package.module:ClassName` for a custom
+    backend, constructed with `base_dir`.
+    """
+    name = (name or "sqlite").strip()
+    if name == "local":
+        return LocalStateBackend(base_dir, compact_every=compact_every)
+    if name == "sqlite":
+        backend = SqliteStateBackend(base_dir / "state.sqlite3")
+        legacy = base_dir / "url_index.json"
+        if legacy.exists() or (base_dir / "url_index.journal").exists():
+            backend.import_keys(
+                JournaledIndex(legacy, base_dir / "url_index.journal", compact_every=compact_every).items()
+            )
+        return backend
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown state backend: {name!r}")
+    backend_cls = getattr(importlib.import_module(module_name), class_name)
+    return backend_cls(base_dir)
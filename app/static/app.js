@@ -11,6 +11,8 @@ const els = {
   url: document.getElementById("url"),
   run: document.getElementById("run"),
   forceRun: document.getElementById("forceRun"),
+  translateMode: document.getElementById("translateMode"),
+  perClaimMode: document.getElementById("perClaimMode"),
 
   langDropdown: document.getElementById("langDropdown"),
   langButton: document.getElementById("langButton"),
@@ -23,6 +25,7 @@ const els = {
   historyCard: document.getElementById("historyCard"),
   historyRefresh: document.getElementById("historyRefresh"),
   historyList: document.getElementById("historyList"),
+  historyMore: document.getElementById("historyMore"),
 
   statusCard: document.getElementById("statusCard"),
   statusText: document.getElementById("statusText"),
@@ -30,6 +33,7 @@ const els = {
   progressBar: document.getElementById("progressBar"),
   infoBox: document.getElementById("infoBox"),
   errorBox: document.getElementById("errorBox"),
+  retryBtn: document.getElementById("retryBtn"),
   resultCard: document.getElementById("resultCard"),
   scoreCircle: document.getElementById("scoreCircle"),
   scorePct: document.getElementById("scorePct"),
@@ -91,6 +95,8 @@ let selectedLanguage = LANGUAGES[0];
 let selectedProvider = "gemini";
 let lastSubmittedUrl = "";
 let currentReportLanguage = null;
+let historyCursor = null;
+let failedJobId = null;
 
 const PROVIDERS = {
   gemini: { name: "Gemini", label: "Gemini API Key *", help: '🔑 <a href="https://aistudio.google.com/app/apikey" target="_blank" style="color: var(--accent);">Get free Gemini API key</a>' },
@@ -235,29 +241,86 @@ async function getJson(url) {
   return data;
 }
 
-async function pollJob(jobId) {
-  while (true) {
-    const job = await getJson(`/api/jobs/${jobId}`);
-    els.statusText.textContent = job.status;
-    setProgress(job.progress);
+function showProgress(p) {
+  const pos = p.status === "queued" && p.queue_position ? ` (#${p.queue_position} of ${p.queue_depth})` : "";
+  const claims = p.status === "fact_checking" && p.claims_total ? ` (${p.claims_done ?? 0}/${p.claims_total} claims)` : "";
+  els.statusText.textContent = `${p.status}${pos}${claims}`;
+  setProgress(p.progress);
+}
 
-    if (job.status === "failed") {
-      setHidden(els.errorBox, false);
-      els.errorBox.textContent = job.error || "Unknown error.";
-      setHidden(els.resultCard, true);
-      return;
-    }
+// Returns true if the job finished over the event stream, false if the caller should fall back to polling.
+function streamJob(jobId) {
+  if (!window.EventSource) return Promise.resolve(false);
+  return new Promise((resolve) => {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    let finished = false;
+    source.addEventListener("progress", (e) => showProgress(JSON.parse(e.data)));
+    source.addEventListener("partial", (e) => renderPartial(JSON.parse(e.data)));
+    source.addEventListener("done", (e) => {
+      finished = true;
+      source.close();
+      showJobOutcome(jobId, JSON.parse(e.data));
+      resolve(true);
+    });
+    source.onerror = () => {
+      if (finished) return;
+      source.close();
+      resolve(false);
+    };
+  });
+}
 
-    if (job.status === "completed") {
-      setHidden(els.errorBox, true);
-      renderResult(job);
+async function watchJob(jobId) {
+  if (await streamJob(jobId)) return;
+  await pollJob(jobId);
+}
+
+function showJobOutcome(jobId, job) {
+  showProgress(job);
+  if (job.status === "failed") {
+    setHidden(els.errorBox, false);
+    els.errorBox.textContent = job.error || "Unknown error.";
+    setHidden(els.resultCard, true);
+    failedJobId = jobId;
+    setHidden(els.retryBtn, false);
+    return true;
+  }
+  if (job.status === "completed") {
+    setHidden(els.errorBox, true);
+    renderResult(job);
+    return true;
+  }
+  return false;
+}
+
+const PROGRESS_FIELDS = "status,progress,error,queue_position,queue_depth";
+
+async function pollJob(jobId) {
+  while (true) {
+    // Poll the small projection; fetch the full job (transcript, report) once it's done.
+    const p = await getJson(`/api/jobs/${jobId}?fields=${PROGRESS_FIELDS}`);
+    showProgress(p);
+    if (p.status === "completed" || p.status === "failed") {
+      showJobOutcome(jobId, await getJson(`/api/jobs/${jobId}`));
       return;
     }
-
     await new Promise((r) => setTimeout(r, 2000));
   }
 }
 
+// Show the report as far as it has been generated; the score stays blank until known.
+function renderPartial(partial) {
+  renderResult({ output_language: currentReportLanguage, transcript: "", report: partial });
+  if (partial.overall_score == null) {
+    els.scorePct.textContent = "…";
+    els.scoreCircle.style.setProperty("--pct", "0");
+  }
+  if (!partial.overall_verdict) {
+    const done = partial.total_claims ? ` (${partial.claims.length}/${partial.total_claims} claims)` : "";
+    els.verdictText.textContent = `Checking…${done}`;
+  }
+}
+
 function humanizeEnum(value) {
   if (!value) return "";
   return String(value)
@@ -369,9 +432,9 @@ function formatWhen(iso) {
   return Number.isNaN(d.getTime()) ? String(iso) : d.toLocaleString();
 }
 
-function renderHistory(items) {
-  els.historyList.innerHTML = "";
-  if (!items || items.length === 0) {
+function renderHistory(items, { append = false } = {}) {
+  if (!append) els.historyList.innerHTML = "";
+  if (!append && (!items || items.length === 0)) {
     const empty = document.createElement("div");
     empty.className = "muted small";
     empty.textContent = "No analyses yet.";
@@ -443,9 +506,13 @@ function renderHistory(items) {
   }
 }
 
-async function loadHistory() {
-  const items = await getJson("/api/history?limit=50");
-  renderHistory(items);
+async function loadHistory({ more = false } = {}) {
+  const params = new URLSearchParams({ limit: "50" });
+  if (more && historyCursor) params.set("cursor", historyCursor);
+  const page = await getJson(`/api/history?${params}`);
+  historyCursor = page.next_cursor || null;
+  renderHistory(page.items || [], { append: more });
+  if (els.historyMore) setHidden(els.historyMore, !historyCursor);
 }
 
 async function runAnalysis({ force }) {
@@ -466,6 +533,8 @@ async function runAnalysis({ force }) {
   lastSubmittedUrl = url;
 
   els.run.disabled = true;
+  failedJobId = null;
+  setHidden(els.retryBtn, true);
   setHidden(els.statusCard, false);
   setHidden(els.resultCard, true);
   setHidden(els.errorBox, true);
@@ -479,15 +548,18 @@ async function runAnalysis({ force }) {
       output_language: selectedLanguage.code,
       provider: selectedProvider,
       force: Boolean(force),
+      mode: els.translateMode?.checked ? "translate" : els.perClaimMode?.checked ? "per_claim" : "full",
       api_key: apiKey
     };
     
     const { job_id, cached } = await postJson("/api/analyze", payload);
     if (cached) {
       setHidden(els.infoBox, false);
-      els.infoBox.textContent = "Loaded saved analysis. Enable re-run to refresh.";
+      els.infoBox.textContent = force
+        ? "This link is already being analyzed or was just re-run; showing that analysis."
+        : "Loaded saved analysis. Enable re-run to refresh.";
     }
-    await pollJob(job_id);
+    await watchJob(job_id);
   } catch (e) {
     setHidden(els.errorBox, false);
     els.errorBox.textContent = e?.message || String(e);
@@ -506,6 +578,25 @@ els.rerunBtn.addEventListener("click", async () => {
   await runAnalysis({ force: true });
 });
 
+if (els.retryBtn) {
+  els.retryBtn.addEventListener("click", async () => {
+    if (!failedJobId) return;
+    const jobId = failedJobId;
+    failedJobId = null;
+    setHidden(els.retryBtn, true);
+    setHidden(els.errorBox, true);
+    els.statusText.textContent = "queued";
+    setProgress(0);
+    try {
+      await postJson(`/api/jobs/${jobId}/retry`, { api_key: els.apiKey.value.trim() || null });
+      await watchJob(jobId);
+    } catch (e) {
+      setHidden(els.errorBox, false);
+      els.errorBox.textContent = e?.message || String(e);
+    }
+  });
+}
+
 if (els.historyToggle && els.historyCard) {
   els.historyToggle.addEventListener("click", async () => {
     const isHidden = els.historyCard.classList.contains("hidden");
@@ -521,3 +612,9 @@ if (els.historyRefresh) {
     await loadHistory();
   });
 }
+
+if (els.historyMore) {
+  els.historyMore.addEventListener("click", async () => {
+    await loadHistory({ more: true });
+  });
+}
@@ -1,19 +1,51 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterator, Optional
 
 from pydantic import BaseModel
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single worker only.
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
 
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def write_json(path: Path, data: Any) -> None:
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write via a temp file in the same directory + rename, so readers never see a torn file."""
     ensure_dir(path.parent)
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: Path, data: Any) -> None:
+    write_text_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
 
 
 def read_json(path: Path) -> Optional[dict[str, Any]]:
@@ -25,3 +57,198 @@ def read_json(path: Path) -> Optional[dict[str, Any]]:
 def write_model(path: Path, model: BaseModel) -> None:
     write_json(path, model.model_dump(mode="json"))
 
+
+async def write_json_async(path: Path, data: Any) -> None:
+    await asyncio.to_thread(write_json, path, data)
+
+
+async def write_model_async(path: Path, model: BaseModel) -> None:
+    await asyncio.to_thread(write_model, path, model)
+
+
+async def write_text_async(path: Path, text: str) -> None:
+    await asyncio.to_thread(write_text_atomic, path, text)
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def append_jsonl(path: Path, records: list[Any]) -> None:
+    if not records:
+        return
+    ensure_dir(path.parent)
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_jsonl(path: Path) -> list[Any]:
+    """Read a JSON-lines file, skipping a torn trailing line left by a crash mid-append."""
+    if not path.exists():
+        return []
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def read_jsonl_from(path: Path, offset: int) -> tuple[list[Any], int]:
+    """
+    Records appended to a JSON-lines file after byte `offset`, and the offset
+    just past the last complete line. A line still being written is left for
+    the next call.
+    """
+    if not path.exists():
+        return [], 0
+    with path.open("rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records, offset + end
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock across processes, held on `path` (created if missing)."""
+    ensure_dir(path.parent)
+    with path.open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CoalescingWriter:
+    """
+    Runs persistence callbacks in a worker thread, keyed by resource.
+    Submitting a key that is already waiting replaces the pending callback,
+    so a burst of updates to one job turns into a single write.
+    """
+
+    def __init__(self, delay: float = 0.25):
+        self.delay = delay
+        self._pending: Dict[str, Callable[[], None]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._flushing: Optional[asyncio.Event] = None
+
+    def _flush_event(self) -> asyncio.Event:
+        if self._flushing is None:
+            self._flushing = asyncio.Event()
+        return self._flushing
+
+    def submit(self, key: str, fn: Callable[[], None]) -> None:
+        self._pending[key] = fn
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._drain(key))
+
+    def discard(self, key: str) -> None:
+        """Drop the callback waiting for `key`, if it hasn't started yet."""
+        self._pending.pop(key, None)
+
+    async def _drain(self, key: str) -> None:
+        flushing = self._flush_event()
+        try:
+            while key in self._pending:
+                if self.delay > 0 and not flushing.is_set():
+                    try:
+                        await asyncio.wait_for(flushing.wait(), self.delay)
+                    except asyncio.TimeoutError:
+                        pass
+                fn = self._pending.pop(key)
+                try:
+                    await asyncio.to_thread(fn)
+                except Exception:
+                    logger.exception("Deferred write for %s failed", key)
+        finally:
+            self._tasks.pop(key, None)
+
+    async def flush(self) -> None:
+        """Write everything pending now, skipping the coalescing delay."""
+        flushing = self._flush_event()
+        flushing.set()
+        try:
+            while self._tasks:
+                await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+        finally:
+            flushing.clear()
+
+
+class JournaledIndex:
+    """
+    A string-to-string map persisted as a JSON snapshot plus an append-only
+    journal of changes. Writes append one line per change; the journal is folded
+    into the snapshot once it grows past `compact_every` entries.
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, compact_every: int = 1000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = max(1, compact_every)
+        self._lock = threading.Lock()
+        self._data: Dict[str, str] = {}
+        self._buffer: list[dict[str, str]] = []
+        self._journal_len = 0
+
+        data = read_json(snapshot_path)
+        if isinstance(data, dict):
+            self._data = {str(k): str(v) for k, v in data.items()}
+        for entry in read_jsonl(journal_path):
+            if isinstance(entry, dict) and "k" in entry:
+                if entry.get("v") is None:
+                    self._data.pop(str(entry["k"]), None)
+                else:
+                    self._data[str(entry["k"])] = str(entry["v"])
+                self._journal_len += 1
+
+    def get(self, key: str) -> Optional[str]:
+        return self._data.get(key)
+
+    def items(self) -> list[tuple[str, str]]:
+        return list(self._data.items())
+
+    def set(self, key: str, value: Optional[str]) -> None:
+        """Update in memory; call `persist` (typically off the event loop) to make it durable."""
+        with self._lock:
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = value
+            self._buffer.append({"k": key, "v": value})
+
+    def persist(self) -> None:
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+            if self._journal_len + len(pending) >= self.compact_every:
+                write_json(self.snapshot_path, self._data)
+                self.journal_path.unlink(missing_ok=True)
+                self._journal_len = 0
+                return
+            append_jsonl(self.journal_path, pending)
+            self._journal_len += len(pending)
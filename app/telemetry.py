@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+
+_stats: ContextVar[Optional[dict[str, Any]]] = ContextVar("job_stats", default=None)
+
+
+@contextmanager
+def collect_stats() -> Iterator[dict[str, Any]]:
+    """
+    Collect values recorded with `record_stat` / `timed` inside the block,
+    including from `asyncio.to_thread` calls (they inherit the context).
+    """
+    stats: dict[str, Any] = {}
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def record_stat(key: str, value: Any) -> None:
+    stats = _stats.get()
+    if stats is not None:
+        stats[key] = value
+
+
+@contextmanager
+def timed(key: str) -> Iterator[None]:
+    """Add the block's wall time to `key`, so repeated steps (e.g. one upload per chunk) are summed."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _stats.get()
+        if stats is not None:
+            stats[key] = round(stats.get(key, 0.0) + time.perf_counter() - start, 3)
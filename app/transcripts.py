@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .state import StateBackend
+from .storage import JournaledIndex, ensure_dir, write_text_atomic
+
+
+def url_key(normalized_url: str) -> str:
+    return f"url:{normalized_url}"
+
+
+def video_key(canonical_id: str) -> str:
+    return f"video:{canonical_id}"
+
+
+def audio_key(sha256: str) -> str:
+    return f"audio:{sha256}"
+
+
+class TranscriptCache:
+    """
+    Transcripts shared across output languages and providers.
+
+    Texts are stored content-addressed under `transcripts/<sha256>.txt`; the
+    aliases mapping lookup keys (normalized URL, audio hash, ...) to them live
+    in the shared `StateBackend`, so every worker process sees them.
+    Methods do blocking I/O and are meant to be called via `asyncio.to_thread`.
+    """
+
+    def __init__(self, base_dir: Path, state: StateBackend):
+        self.dir = base_dir / "transcripts"
+        self._lock = threading.Lock()
+        self._state = state
+        legacy = self.dir / "aliases.json"
+        journal = self.dir / "aliases.journal"
+        if legacy.exists() or journal.exists():
+            aliases = JournaledIndex(legacy, journal).items()
+            state.import_keys(((self._alias(k), v) for k, v in aliases), marker="transcript_aliases")
+
+    @staticmethod
+    def _alias(key: str) -> str:
+        return f"transcript:{key}"
+
+    def _text_path(self, digest: str) -> Path:
+        return self.dir / f"{digest}.txt"
+
+    def lookup(self, keys: Iterable[str]) -> Optional[str]:
+        for key in keys:
+            digest = self._state.get_key(self._alias(key))
+            if not digest:
+                continue
+            path = self._text_path(digest)
+            if path.exists():
+                return path.read_text(encoding="utf-8")
+        return None
+
+    def store(self, transcript: str, keys: Iterable[str]) -> None:
+        if not transcript.strip():
+            return
+        digest = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+        with self._lock:
+            ensure_dir(self.dir)
+            path = self._text_path(digest)
+            if not path.exists():
+                write_text_atomic(path, transcript)
+            for key in keys:
+                self._state.set_key(self._alias(key), digest)
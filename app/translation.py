@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from .schemas import FactCheckReport
+
+
+def extract_translatable(report: FactCheckReport) -> dict[str, Any]:
+    """The human-readable fields that build_factcheck_user_prompt asks to be written in the output language."""
+    return {
+        "summary": report.summary,
+        "whats_right": list(report.whats_right),
+        "whats_wrong": list(report.whats_wrong),
+        "missing_context": list(report.missing_context),
+        "claims": [{"explanation": c.explanation, "correction": c.correction} for c in report.claims],
+        "danger": [{"description": d.description, "mitigation": d.mitigation} for d in report.danger],
+        "limitations": report.limitations,
+    }
+
+
+def _str(value: Any, fallback: Optional[str]) -> Optional[str]:
+    if isinstance(value, str) and value.strip():
+        return value
+    return fallback
+
+
+def _str_list(values: Any, originals: list[str]) -> list[str]:
+    if not isinstance(values, list) or len(values) != len(originals):
+        return list(originals)
+    return [_str(v, o) or o for v, o in zip(values, originals)]
+
+
+def _dict_list(values: Any, count: int) -> list[dict[str, Any]]:
+    if not isinstance(values, list) or len(values) != count:
+        return [{} for _ in range(count)]
+    return [v if isinstance(v, dict) else {} for v in values]
+
+
+def apply_translation(report: FactCheckReport, translated: dict[str, Any]) -> FactCheckReport:
+    """
+    Merge translated text back into a copy of `report`. Verdicts, scores and
+    sources are kept as-is; any field the model dropped or reshaped keeps its
+    original text.
+    """
+    claims = [
+        claim.model_copy(
+            update={
+                "explanation": _str(t.get("explanation"), claim.explanation) or claim.explanation,
+                "correction": _str(t.get("correction"), claim.correction) if claim.correction else None,
+            }
+        )
+        for claim, t in zip(report.claims, _dict_list(translated.get("claims"), len(report.claims)))
+    ]
+    danger = [
+        item.model_copy(
+            update={
+                "description": _str(t.get("description"), item.description) or item.description,
+                "mitigation": _str(t.get("mitigation"), item.mitigation) if item.mitigation else None,
+            }
+        )
+        for item, t in zip(report.danger, _dict_list(translated.get("danger"), len(report.danger)))
+    ]
+    return report.model_copy(
+        update={
+            "summary": _str(translated.get("summary"), report.summary) or report.summary,
+            "whats_right": _str_list(translated.get("whats_right"), report.whats_right),
+            "whats_wrong": _str_list(translated.get("whats_wrong"), report.whats_wrong),
+            "missing_context": _str_list(translated.get("missing_context"), report.missing_context),
+            "claims": claims,
+            "danger": danger,
+            "limitations": _str(translated.get("limitations"), report.limitations) if report.limitations else None,
+        }
+    )
@@ -1,48 +1,266 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import shutil
 import subprocess
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+from .schemas import AudioStats
 
 
 class DownloadError(RuntimeError):
     pass
 
 
-def download_mp3(*, url: str, out_dir: Path, cookies_file: Optional[Path] = None) -> Path:
+# codec name -> (file extension, ffmpeg encoder)
+AUDIO_CODECS = {
+    "opus": ("ogg", "libopus"),
+    "flac": ("flac", "flac"),
+    "mp3": ("mp3", "libmp3lame"),
+}
+
+
+def _clear(out_dir: Path, pattern: str) -> None:
+    for stale in out_dir.glob(pattern):
+        if stale.is_file():
+            stale.unlink()
+
+
+def probe_duration(path: Path) -> Optional[float]:
+    """Media duration in seconds via ffprobe, or None if it can't be determined."""
+    if shutil.which("ffprobe") is None:
+        return None
+    proc = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(proc.stdout.strip())
+    except ValueError:
+        return None
+
+
+def download_audio(
+    *,
+    url: str,
+    out_dir: Path,
+    cookies_file: Optional[Path] = None,
+    codec: str = "opus",
+    sample_rate: int = 16000,
+    channels: int = 1,
+    bitrate: Optional[str] = "24k",
+    trim_silence: bool = False,
+    silence_threshold_db: float = -40.0,
+    silence_min_seconds: float = 0.7,
+) -> tuple[Path, AudioStats]:
     """
-    Download audio from a video URL and extract MP3 via yt-dlp + ffmpeg.
-    Returns the path to the generated MP3.
+    Download the best audio stream with yt-dlp and re-encode it with ffmpeg to a
+    transcription-friendly profile (by default 16 kHz mono Opus), optionally
+    cutting silences longer than `silence_min_seconds`.
+    Returns the encoded file and size/timing stats.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
 
     if shutil.which("ffmpeg") is None:
-        raise DownloadError("ffmpeg not found. Install ffmpeg to enable MP3 extraction.")
+        raise DownloadError("ffmpeg not found. Install ffmpeg to enable audio extraction.")
+    if codec not in AUDIO_CODECS:
+        raise DownloadError(f"Unsupported audio codec {codec!r}. Use one of: {', '.join(AUDIO_CODECS)}.")
+    ext = AUDIO_CODECS[codec][0]
+
+    _clear(out_dir, "source.*")
+    _clear(out_dir, "audio.*")
 
-    outtmpl = str(out_dir / "audio.%(ext)s")
     cmd = [
         "yt-dlp",
         "--no-playlist",
-        "-x",
-        "--audio-format",
-        "mp3",
-        "--audio-quality",
-        "0",
+        "-f",
+        "bestaudio/best",
         "-o",
-        outtmpl,
+        str(out_dir / "source.%(ext)s"),
         url,
     ]
     if cookies_file:
         cmd[1:1] = ["--cookies", str(cookies_file)]
 
+    started = time.perf_counter()
     proc = subprocess.run(cmd, capture_output=True, text=True)
     if proc.returncode != 0:
         raise DownloadError((proc.stderr or proc.stdout or "yt-dlp failed").strip())
+    download_seconds = time.perf_counter() - started
+
+    sources = [p for p in out_dir.glob("source.*") if not p.name.endswith((".part", ".ytdl"))]
+    if not sources:
+        raise DownloadError(f"yt-dlp produced no audio file. Got: {[p.name for p in out_dir.iterdir()]}")
+    source = sources[0]
+    source_bytes = source.stat().st_size
+
+    out_path = out_dir / f"audio.{ext}"
+    started = time.perf_counter()
+    encode_audio(
+        source,
+        out_path,
+        codec=codec,
+        sample_rate=sample_rate,
+        channels=channels,
+        bitrate=bitrate,
+        trim_silence=trim_silence,
+        silence_threshold_db=silence_threshold_db,
+        silence_min_seconds=silence_min_seconds,
+    )
+    encode_seconds = time.perf_counter() - started
+
+    encoded_bytes = out_path.stat().st_size
+    source.unlink(missing_ok=True)
+    stats = AudioStats(
+        codec=codec,
+        sample_rate=sample_rate,
+        channels=channels,
+        bitrate=bitrate if codec != "flac" else None,
+        trimmed_silence=trim_silence,
+        source_bytes=source_bytes,
+        encoded_bytes=encoded_bytes,
+        bytes_saved=source_bytes - encoded_bytes,
+        duration_seconds=probe_duration(out_path),
+        pcm_sha256=pcm_sha256(out_path),
+        download_seconds=round(download_seconds, 3),
+        encode_seconds=round(encode_seconds, 3),
+    )
+    return out_path, stats
+
+
+def encode_audio(
+    source: Path,
+    out_path: Path,
+    *,
+    codec: str = "opus",
+    sample_rate: int = 16000,
+    channels: int = 1,
+    bitrate: Optional[str] = "24k",
+    trim_silence: bool = False,
+    silence_threshold_db: float = -40.0,
+    silence_min_seconds: float = 0.7,
+) -> Path:
+    """
+    Re-encode `source` with ffmpeg. Output is bit-exact: the same input gives
+    the same bytes (no random Ogg stream serials or encoder version tags).
+    """
+    if codec not in AUDIO_CODECS:
+        raise DownloadError(f"Unsupported audio codec {codec!r}. Use one of: {', '.join(AUDIO_CODECS)}.")
+    _, encoder = AUDIO_CODECS[codec]
+    ffmpeg = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(source), "-vn", "-ac", str(channels), "-ar", str(sample_rate)]
+    if trim_silence:
+        ffmpeg += [
+            "-af",
+            f"silenceremove=start_periods=1:start_threshold={silence_threshold_db}dB:"
+            f"stop_periods=-1:stop_duration={silence_min_seconds}:stop_threshold={silence_threshold_db}dB",
+        ]
+    ffmpeg += ["-c:a", encoder]
+    if bitrate and codec != "flac":
+        ffmpeg += ["-b:a", bitrate]
+    if codec == "opus":
+        ffmpeg += ["-application", "voip"]
+    ffmpeg += ["-map_metadata", "-1", "-fflags", "+bitexact", "-flags:a", "+bitexact", str(out_path)]
+
+    proc = subprocess.run(ffmpeg, capture_output=True, text=True)
+    if proc.returncode != 0 or not out_path.exists():
+        raise DownloadError((proc.stderr or "ffmpeg failed").strip())
+    return out_path
+
+
+def pcm_sha256(path: Path, chunk_size: int = 1 << 20) -> Optional[str]:
+    """
+    SHA-256 of the decoded samples, so container details (stream serials,
+    tags, muxer version) don't change it; None if ffmpeg can't decode the file.
+    """
+    if shutil.which("ffmpeg") is None:
+        return None
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(path), "-map", "0:a:0", "-f", "s16le", "-"]
+    digest = hashlib.sha256()
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        for chunk in iter(lambda: proc.stdout.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest() if proc.returncode == 0 else None
+
+
+def download_mp3(*, url: str, out_dir: Path, cookies_file: Optional[Path] = None) -> Path:
+    """
+    Download audio from a video URL as 44.1 kHz stereo 192k MP3: `download_audio`
+    with the original max-quality profile. Returns the path to the MP3.
+    """
+    path, _ = download_audio(url=url, out_dir=out_dir, cookies_file=cookies_file, codec="mp3", sample_rate=44100, channels=2, bitrate="192k")
+    return path
+
+
+def probe_video(*, url: str, cookies_file: Optional[Path] = None, timeout: float = 60) -> dict[str, Any]:
+    """
+    Fetch yt-dlp metadata for a URL without downloading any media.
+    """
+    cmd = ["yt-dlp", "--no-playlist", "--skip-download", "--dump-single-json", url]
+    if cookies_file:
+        cmd[1:1] = ["--cookies", str(cookies_file)]
+
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise DownloadError("yt-dlp metadata lookup timed out") from e
+    if proc.returncode != 0:
+        raise DownloadError((proc.stderr or proc.stdout or "yt-dlp failed").strip())
+    try:
+        info = json.loads(proc.stdout)
+    except json.JSONDecodeError as e:
+        raise DownloadError(f"yt-dlp returned invalid metadata: {e}") from e
+    if not isinstance(info, dict):
+        raise DownloadError("yt-dlp returned unexpected metadata")
+    return info
+
+
+def download_subtitles(
+    *,
+    url: str,
+    out_dir: Path,
+    language: str,
+    automatic: bool = False,
+    cookies_file: Optional[Path] = None,
+    timeout: float = 60,
+) -> Path:
+    """
+    Download a single subtitle track (converted to WebVTT) without fetching any media.
+    Returns the path to the .vtt file.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob("captions.*"):
+        stale.unlink()
 
-    mp3_path = out_dir / "audio.mp3"
-    if not mp3_path.exists():
-        candidates = sorted(out_dir.glob("audio.*"))
-        raise DownloadError(f"Expected audio.mp3 not found. Got: {[p.name for p in candidates]}")
-    return mp3_path
+    cmd = [
+        "yt-dlp",
+        "--no-playlist",
+        "--skip-download",
+        "--write-auto-subs" if automatic else "--write-subs",
+        "--sub-langs",
+        language,
+        "--sub-format",
+        "vtt/best",
+        "--convert-subs",
+        "vtt",
+        "-o",
+        str(out_dir / "captions.%(ext)s"),
+        url,
+    ]
+    if cookies_file:
+        cmd[1:1] = ["--cookies", str(cookies_file)]
+
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise DownloadError("yt-dlp subtitle download timed out") from e
+    if proc.returncode != 0:
+        raise DownloadError((proc.stderr or proc.stdout or "yt-dlp failed").strip())
 
+    candidates = sorted(out_dir.glob("captions*.vtt"))
+    if not candidates:
+        raise DownloadError(f"No subtitle file written for language {language!r}")
+    return candidates[0]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import time
+import wave
+from pathlib import Path
+from typing import Any, Optional
+
+from app.schemas import AudioStats
+from app.ytdlp_audio import DownloadError
+
+
+TRANSCRIPT = (
+    "Drinking eight glasses of water a day is required for every adult. "
+    "The Great Wall of China is visible from the Moon with the naked eye. "
+    "Lightning never strikes the same place twice. "
+    "Humans only use ten percent of their brains. "
+    "Mount Everest is the tallest mountain above sea level."
+)
+
+_CLAIMS = [
+    ("Drinking eight glasses of water a day is required for every adult.", "mixed", 70),
+    ("The Great Wall of China is visible from the Moon with the naked eye.", "contradicted", 90),
+    ("Lightning never strikes the same place twice.", "contradicted", 95),
+    ("Humans only use ten percent of their brains.", "contradicted", 95),
+    ("Mount Everest is the tallest mountain above sea level.", "supported", 98),
+]
+
+
+def _claim(text: str, verdict: str, confidence: int) -> dict[str, Any]:
+    return {
+        "claim": text,
+        "verdict": verdict,
+        "confidence": confidence,
+        "explanation": f"Benchmark verdict for: {text}",
+        "correction": None if verdict == "supported" else "See sources.",
+        "sources": [{"title": "Benchmark source", "url": "https://example.org/source"}],
+    }
+
+
+def sample_report(claims: int = len(_CLAIMS)) -> dict[str, Any]:
+    """A complete fact-check report as a model would return it."""
+    return {
+        "overall_score": 35,
+        "overall_verdict": "misleading",
+        "summary": "Several popular myths are repeated as facts.",
+        "whats_right": ["Mount Everest is the tallest mountain above sea level."],
+        "whats_wrong": ["The Great Wall is not visible from the Moon.", "Humans use most of their brain."],
+        "missing_context": [],
+        "danger": [],
+        "claims": [_claim(*_CLAIMS[i % len(_CLAIMS)]) for i in range(claims)],
+        "sources_used": [{"title": "Benchmark source", "url": "https://example.org/source"}],
+        "limitations": None,
+    }
+
+
+def extracted_claims() -> dict[str, Any]:
+    return {"claims": [{"claim": text, "quote": text} for text, _, _ in _CLAIMS]}
+
+
+def verified_claim(index: int = 0) -> dict[str, Any]:
+    return _claim(*_CLAIMS[index % len(_CLAIMS)])
+
+
+def composed_summary() -> dict[str, Any]:
+    report = sample_report()
+    return {k: report[k] for k in ("summary", "whats_right", "whats_wrong", "missing_context", "danger", "limitations")}
+
+
+def write_silence(path: Path, seconds: float, sample_rate: int = 16000) -> Path:
+    """A mono 16-bit PCM WAV file of silence, used as the downloaded audio."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frames = int(seconds * sample_rate)
+    # Several benchmark workers may create the same fixture at once.
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    with wave.open(str(tmp), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\x00\x00" * frames)
+    os.replace(tmp, path)
+    return path
+
+
+class FakeDownloader:
+    """
+    Stand-in for `download_audio`: copies a local fixture into the job's
+    media directory after a simulated delay, failing at `error_rate`.
+
+    With `unique` the tail of each copy is overwritten with faint noise so
+    every job hashes differently and misses the audio-keyed report and
+    transcript caches; without it, repeat jobs measure the cache-hit path.
+    """
+
+    def __init__(
+        self,
+        fixture: Path,
+        *,
+        duration_seconds: float,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        unique: bool = True,
+    ):
+        self.fixture = fixture
+        self.duration_seconds = duration_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.unique = unique
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def download_audio(self, *, url: str, out_dir: Path, codec: str = "opus", **_: Any) -> tuple[Path, AudioStats]:
+        start = time.perf_counter()
+        time.sleep(self._delay())
+        if random.random() < self.error_rate:
+            raise DownloadError(f"injected download failure for {url}")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        target = out_dir / f"audio{self.fixture.suffix}"
+        shutil.copyfile(self.fixture, target)
+        if self.unique:
+            noise = bytes(random.choice((0, 1, 255)) for _ in range(64))
+            with target.open("r+b") as f:
+                f.seek(-len(noise), os.SEEK_END)
+                f.write(noise)
+        size = target.stat().st_size
+        return target, AudioStats(
+            codec=codec,
+            sample_rate=16000,
+            channels=1,
+            source_bytes=size,
+            encoded_bytes=size,
+            bytes_saved=0,
+            duration_seconds=self.duration_seconds,
+            download_seconds=round(time.perf_counter() - start, 3),
+            encode_seconds=0.0,
+        )
+
+    def probe_video(self, *, url: str, cookies_file: Optional[Path] = None) -> dict[str, Any]:
+        # No metadata offline: captions are skipped and the audio path is used.
+        raise DownloadError("metadata lookup disabled in benchmarks")
@@ -0,0 +1,353 @@
+"""
+Offline end-to-end benchmark: starts the provider stubs and the app (with a
+fake downloader), submits N analyses through /api/analyze with bounded
+concurrency, and reports per-stage p50/p95/p99, jobs/sec and server memory.
+
+    python -m bench.run --jobs 200 --concurrency 20 --provider openai --latency chat=1,transcribe=0.5
+    python -m bench.run --jobs 50 --json bench.json --max-p95 end_to_end=10
+
+Exits with status 1 when a `--max-p95` budget is exceeded or too many jobs fail.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import httpx
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _children(pid: int) -> list[int]:
+    pids = []
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        try:
+            pids.extend(int(p) for p in task.read_text().split())
+        except (OSError, ValueError):
+            continue
+    return pids
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of `pid` and its descendants (Linux /proc); None elsewhere."""
+    total = 0
+    stack = [pid]
+    found = False
+    while stack:
+        current = stack.pop()
+        try:
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+                    found = True
+                    break
+        except OSError:
+            continue
+        stack.extend(_children(current))
+    return total if found else None
+
+
+def _spawn(args: list[str], env: Dict[str, str], log: Path) -> subprocess.Popen:
+    return subprocess.Popen(
+        args,
+        cwd=str(ROOT),
+        env=env,
+        stdout=log.open("wb"),
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient, url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {proc.returncode}")
+        try:
+            await client.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+class MemorySampler:
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[int] = []
+
+    async def run(self) -> None:
+        while True:
+            rss = _rss_bytes(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            await asyncio.sleep(self.interval)
+
+
+async def _run_job(
+    client: httpx.AsyncClient,
+    base: str,
+    url: str,
+    args: argparse.Namespace,
+    sem: asyncio.Semaphore,
+) -> dict[str, Any]:
+    async with sem:
+        submitted = time.perf_counter()
+        resp = await client.post(
+            f"{base}/api/analyze",
+            json={"url": url, "output_language": args.language, "provider": args.provider, "mode": args.mode},
+        )
+        if resp.status_code != 200:
+            return {"status": "rejected", "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
+        job_id = resp.json()["job_id"]
+        etag = None
+        while True:
+            headers = {"If-None-Match": etag} if etag else {}
+            poll = await client.get(f"{base}/api/jobs/{job_id}", params={"fields": "status"}, headers=headers)
+            if poll.status_code == 200:
+                etag = poll.headers.get("etag")
+                if poll.json()["status"] in {"completed", "failed"}:
+                    break
+            await asyncio.sleep(args.poll_interval)
+        elapsed = time.perf_counter() - submitted
+        job = (
+            await client.get(f"{base}/api/jobs/{job_id}", params={"fields": "status,error,metrics,created_at,updated_at"})
+        ).json()
+        return {"status": job["status"], "error": job.get("error"), "metrics": job.get("metrics") or {}, "seconds": elapsed}
+
+
+def summarize(results: list[dict[str, Any]], wall: float, memory: list[int]) -> dict[str, Any]:
+    completed = [r for r in results if r["status"] == "completed"]
+    stages: Dict[str, list[float]] = {"end_to_end": [r["seconds"] for r in completed]}
+    for r in completed:
+        metrics = r["metrics"]
+        if metrics.get("queue_wait_seconds") is not None:
+            stages.setdefault("queue_wait", []).append(metrics["queue_wait_seconds"])
+        per_stage: Dict[str, float] = {}
+        for span in metrics.get("spans", []):
+            per_stage[span["stage"]] = per_stage.get(span["stage"], 0.0) + span["seconds"]
+        for stage, seconds in per_stage.items():
+            stages.setdefault(stage, []).append(seconds)
+    tokens = sum(u.get("total_tokens", 0) for r in completed for u in r["metrics"].get("usage", []))
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r["status"] != "completed":
+            key = (r.get("error") or r["status"])[:80]
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        "jobs": len(results),
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "wall_seconds": round(wall, 3),
+        "jobs_per_second": round(len(completed) / wall, 3) if wall > 0 else None,
+        "tokens_total": tokens,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": max(values) if values else None,
+            }
+            for stage, values in stages.items()
+        },
+        "memory": {
+            "peak_rss_bytes": max(memory) if memory else None,
+            "final_rss_bytes": memory[-1] if memory else None,
+        },
+        "errors": errors,
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def print_summary(summary: dict[str, Any]) -> None:
+    print(
+        f"jobs={summary['jobs']} completed={summary['completed']} failed={summary['failed']} "
+        f"wall={summary['wall_seconds']:.2f}s throughput={summary['jobs_per_second']} jobs/s "
+        f"tokens={summary['tokens_total']}"
+    )
+    print(f"{'stage':<16}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, s in summary["stages"].items():
+        print(f"{stage:<16}{s['count']:>7}{_fmt(s['p50']):>10}{_fmt(s['p95']):>10}{_fmt(s['p99']):>10}{_fmt(s['max']):>10}")
+    memory = summary["memory"]
+    if memory["peak_rss_bytes"] is not None:
+        print(f"server rss: peak {memory['peak_rss_bytes'] / 2**20:.1f} MiB, final {memory['final_rss_bytes'] / 2**20:.1f} MiB")
+    for error, count in summary["errors"].items():
+        print(f"  {count} x {error}")
+
+
+def _budgets(values: list[str]) -> Dict[str, float]:
+    budgets = {}
+    for value in values:
+        stage, _, seconds = value.partition("=")
+        budgets[stage.strip()] = float(seconds)
+    return budgets
+
+
+def check(summary: dict[str, Any], budgets: Dict[str, float], max_failure_rate: float) -> list[str]:
+    problems = []
+    for stage, budget in budgets.items():
+        p95 = summary["stages"].get(stage, {}).get("p95")
+        if p95 is None:
+            problems.append(f"{stage}: no samples")
+        elif p95 > budget:
+            problems.append(f"{stage}: p95 {p95:.3f}s exceeds {budget:.3f}s")
+    if summary["jobs"] and summary["failed"] / summary["jobs"] > max_failure_rate:
+        problems.append(f"{summary['failed']}/{summary['jobs']} jobs failed")
+    return problems
+
+
+async def run(args: argparse.Namespace) -> int:
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="factcheck-bench-"))
+    logs = data_dir / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    stub_port, app_port = _free_port(), _free_port()
+    stub_base = f"http://127.0.0.1:{stub_port}"
+    app_base = f"http://127.0.0.1:{app_port}"
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    stub = _spawn(
+        [
+            sys.executable, "-m", "bench.stubs",
+            "--port", str(stub_port),
+            "--latency", args.latency,
+            "--jitter", str(args.jitter),
+            "--error-rate", str(args.error_rate),
+            "--rate-limit-rate", str(args.rate_limit_rate),
+        ],
+        env,
+        logs / "stubs.log",
+    )
+    app_env = {
+        **env,
+        "DATA_DIR": str(data_dir / "data"),
+        "OPENAI_API_KEY": "bench",
+        "GEMINI_API_KEY": "bench",
+        "DEEPSEEK_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{stub_base}/v1",
+        "GEMINI_BASE_URL": f"{stub_base}/",
+        "DEEPSEEK_BASE_URL": f"{stub_base}/v1",
+        "RETRY_BASE_DELAY": "0.2",
+        "BENCH_DOWNLOAD_LATENCY": str(args.download_latency),
+        "BENCH_DOWNLOAD_JITTER": str(args.jitter),
+        "BENCH_DOWNLOAD_ERROR_RATE": str(args.download_error_rate),
+        "BENCH_AUDIO_SECONDS": str(args.audio_seconds),
+        "BENCH_SHARED_AUDIO": "1" if args.shared_audio else "",
+    }
+    server = _spawn(
+        [
+            sys.executable, "-m", "uvicorn", "bench.serve:app",
+            "--host", "127.0.0.1",
+            "--port", str(app_port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        app_env,
+        logs / "app.log",
+    )
+
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency * 2 + 10)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            await _wait_ready(client, f"{stub_base}/stats", stub)
+            await _wait_ready(client, f"{app_base}/api/limits", server)
+
+            sampler = MemorySampler(server.pid)
+            sampling = asyncio.create_task(sampler.run())
+            sem = asyncio.Semaphore(args.concurrency)
+            run_id = uuid4().hex[:3]
+            urls = [
+                f"https://www.youtube.com/watch?v=bn{run_id}{i % (args.distinct or args.jobs):06d}"
+                for i in range(args.jobs)
+            ]
+            started = time.perf_counter()
+            results = await asyncio.gather(*(_run_job(client, app_base, url, args, sem) for url in urls))
+            wall = time.perf_counter() - started
+            sampling.cancel()
+    finally:
+        for proc in (server, stub):
+            proc.terminate()
+        for proc in (server, stub):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    summary = summarize(list(results), wall, sampler.samples)
+    summary["config"] = {
+        k: v for k, v in vars(args).items() if k not in {"json", "max_p95", "data_dir"}
+    }
+    print_summary(summary)
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    problems = check(summary, _budgets(args.max_p95), args.max_failure_rate)
+    for problem in problems:
+        print(f"FAIL {problem}", file=sys.stderr)
+    print(f"logs and data: {data_dir}")
+    return 1 if problems else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10, help="Analyses in flight at once.")
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct URLs (default: one per job).")
+    parser.add_argument("--provider", choices=["gemini", "openai", "deepseek"], default="openai")
+    parser.add_argument("--mode", choices=["full", "per_claim"], default="full")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--latency", default="chat=0.5,transcribe=0.3,upload=0.05,generate=0.5")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    parser.add_argument("--download-error-rate", type=float, default=0.0)
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--shared-audio",
+        action="store_true",
+        help="Serve identical audio to every job, so repeats hit the report and transcript caches.",
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=60.0, help="HTTP timeout per request.")
+    parser.add_argument("--data-dir", help="Keep data and logs here instead of a temp directory.")
+    parser.add_argument("--json", help="Write the summary as JSON to this path.")
+    parser.add_argument("--max-p95", action="append", default=[], metavar="STAGE=SECONDS")
+    parser.add_argument("--max-failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
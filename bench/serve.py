@@ -0,0 +1,43 @@
+"""
+The app with yt-dlp replaced by a local audio fixture, for benchmarks.
+
+    BENCH_DOWNLOAD_LATENCY=0.5 uvicorn bench.serve:app --workers 2
+
+Patches are applied at import, so they also hold in every uvicorn worker.
+Point the providers at `bench.stubs` with OPENAI_BASE_URL / GEMINI_BASE_URL.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+from app import jobs
+from app.main import app
+
+from .fixtures import FakeDownloader, write_silence
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else default
+
+
+_audio_seconds = _env_float("BENCH_AUDIO_SECONDS", 5.0)
+_fixture = Path(os.environ.get("BENCH_AUDIO_FIXTURE") or Path(tempfile.gettempdir()) / f"bench-{_audio_seconds:g}s.wav")
+if not _fixture.exists():
+    write_silence(_fixture, _audio_seconds)
+
+downloader = FakeDownloader(
+    _fixture,
+    duration_seconds=_audio_seconds,
+    latency=_env_float("BENCH_DOWNLOAD_LATENCY", 0.0),
+    jitter=_env_float("BENCH_DOWNLOAD_JITTER", 0.0),
+    error_rate=_env_float("BENCH_DOWNLOAD_ERROR_RATE", 0.0),
+    unique=os.environ.get("BENCH_SHARED_AUDIO", "").strip().lower() not in {"1", "true", "yes"},
+)
+jobs.download_audio = downloader.download_audio
+jobs.probe_video = downloader.probe_video
+
+__all__ = ["app"]
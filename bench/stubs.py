@@ -0,0 +1,269 @@
+"""
+Stub provider server: OpenAI-compatible and Gemini endpoints with canned
+answers and configurable latency and fault injection.
+
+    python -m bench.stubs --port 9100 --latency chat=1.0,transcribe=0.5 --error-rate 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+from app.prompts import (
+    CLAIM_EXTRACT_SYSTEM_PROMPT,
+    CLAIM_VERIFY_SYSTEM_PROMPT,
+    REPORT_COMPOSE_SYSTEM_PROMPT,
+    TRANSLATE_SYSTEM_PROMPT,
+)
+
+from .fixtures import TRANSCRIPT, composed_summary, extracted_claims, sample_report, verified_claim
+
+
+ENDPOINTS = ("chat", "transcribe", "upload", "generate")
+
+
+class Faults:
+    """Per-endpoint latency (seconds, ± jitter) and injected 500 / 429 rates."""
+
+    def __init__(
+        self,
+        *,
+        latency: Optional[Dict[str, float]] = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+    ):
+        self.latency = {name: 0.0 for name in ENDPOINTS} | (latency or {})
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+    def delay(self, endpoint: str) -> float:
+        return max(0.0, self.latency.get(endpoint, 0.0) + random.uniform(-self.jitter, self.jitter))
+
+    def failure(self) -> Optional[Response]:
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return JSONResponse(
+                {"error": {"message": "injected rate limit", "code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            return JSONResponse({"error": {"message": "injected failure", "code": 500, "status": "INTERNAL"}}, status_code=500)
+        return None
+
+
+def parse_latency(value: str) -> Dict[str, float]:
+    """`chat=1.0,transcribe=0.5`, or a single number for every endpoint."""
+    value = (value or "").strip()
+    if not value:
+        return {}
+    if "=" not in value:
+        return {name: float(value) for name in ENDPOINTS}
+    latency = {}
+    for part in value.split(","):
+        name, _, seconds = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        latency[name.strip()] = float(seconds)
+    return latency
+
+
+def _answer(prompt_text: str) -> str:
+    """Canned JSON answer chosen by the system prompt the app sent."""
+    if CLAIM_EXTRACT_SYSTEM_PROMPT in prompt_text:
+        data: Any = extracted_claims()
+    elif CLAIM_VERIFY_SYSTEM_PROMPT in prompt_text:
+        data = verified_claim(random.randrange(5))
+    elif REPORT_COMPOSE_SYSTEM_PROMPT in prompt_text:
+        data = composed_summary()
+    elif TRANSLATE_SYSTEM_PROMPT in prompt_text:
+        data = {}  # Nothing translated: the app keeps the original text.
+    else:
+        data = sample_report()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _chunks(text: str, size: int = 64) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def create_app(faults: Faults) -> FastAPI:
+    app = FastAPI(title="Provider stubs")
+    counters: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    async def begin(endpoint: str) -> Optional[Response]:
+        counters[endpoint] += 1
+        await asyncio.sleep(faults.delay(endpoint))
+        return faults.failure()
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    # OpenAI-compatible ------------------------------------------------------
+
+    @app.post("/v1/audio/transcriptions")
+    async def openai_transcribe(request: Request):
+        await request.body()
+        failure = await begin("transcribe")
+        return failure or PlainTextResponse(TRANSCRIPT)
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        body = await request.json()
+        prompt = "\n".join(str(m.get("content") or "") for m in body.get("messages", []))
+        model = body.get("model") or "stub"
+        failure = await begin("chat")
+        if failure:
+            return failure
+        text = _answer(prompt)
+        usage = {
+            "prompt_tokens": _tokens(prompt),
+            "completion_tokens": _tokens(text),
+            "total_tokens": _tokens(prompt) + _tokens(text),
+        }
+        completion_id = f"chatcmpl-{uuid4().hex[:12]}"
+        created = int(time.time())
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+
+        async def events() -> AsyncIterator[str]:
+            def chunk(delta: dict, finish: Optional[str] = None, **extra: Any) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    **extra,
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in _chunks(text):
+                await asyncio.sleep(0)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+                yield f"data: {json.dumps({**final, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Gemini -------------------------------------------------------------------
+
+    @app.post("/upload/v1beta/files")
+    async def gemini_upload_start(request: Request):
+        await request.body()
+        session = uuid4().hex
+        base = str(request.base_url).rstrip("/")
+        return JSONResponse({}, headers={"x-goog-upload-url": f"{base}/upload/session/{session}"})
+
+    @app.post("/upload/session/{session}")
+    async def gemini_upload_chunk(session: str, request: Request):
+        await request.body()
+        if "finalize" not in request.headers.get("x-goog-upload-command", ""):
+            return Response(headers={"x-goog-upload-status": "active"})
+        failure = await begin("upload")
+        if failure:
+            failure.headers["x-goog-upload-status"] = "final"
+            return failure
+        base = str(request.base_url).rstrip("/")
+        file = {
+            "name": f"files/{session}",
+            "uri": f"{base}/v1beta/files/{session}",
+            "mimeType": "audio/wav",
+            "state": "ACTIVE",
+        }
+        return JSONResponse({"file": file}, headers={"x-goog-upload-status": "final"})
+
+    @app.post("/v1beta/models/{target}")
+    async def gemini_generate(target: str, request: Request):
+        model, _, method = target.partition(":")
+        body = await request.json()
+        texts = []
+        for content in body.get("contents", []):
+            for part in content.get("parts", []):
+                texts.append(str(part.get("text") or ""))
+        for part in (body.get("systemInstruction") or {}).get("parts", []):
+            texts.append(str(part.get("text") or ""))
+        prompt = "\n".join(texts)
+        has_audio = any("fileData" in part for c in body.get("contents", []) for part in c.get("parts", []))
+        failure = await begin("transcribe" if has_audio else "generate")
+        if failure:
+            return failure
+        text = TRANSCRIPT if has_audio else _answer(prompt)
+        usage = {
+            "promptTokenCount": _tokens(prompt),
+            "candidatesTokenCount": _tokens(text),
+            "totalTokenCount": _tokens(prompt) + _tokens(text),
+        }
+
+        def response(piece: str, final: bool) -> dict[str, Any]:
+            candidate: dict[str, Any] = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+            if final:
+                candidate["finishReason"] = "STOP"
+            return {"candidates": [candidate], "usageMetadata": usage, "modelVersion": model}
+
+        if method == "generateContent":
+            return response(text, True)
+
+        async def events() -> AsyncIterator[str]:
+            pieces = _chunks(text)
+            for i, piece in enumerate(pieces):
+                await asyncio.sleep(0)
+                yield f"data: {json.dumps(response(piece, i == len(pieces) - 1))}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="", help="Seconds per endpoint (chat, transcribe, upload, generate).")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with HTTP 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with HTTP 429.")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = Faults(
+        latency=parse_latency(args.latency),
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    uvicorn.run(create_app(faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+import socket
+import tempfile
+
+import pytest
+
+# Settings are read when `app.config` is first imported; keep the module-level
+# stores (job_store, batch_store, ...) out of the working tree.
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="factcheck-tests-"))
+
+_LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    """Fail any test that would reach beyond loopback instead of quietly calling a real service."""
+    getaddrinfo, connect = socket.getaddrinfo, socket.socket.connect
+
+    def guarded_getaddrinfo(host, *args, **kwargs):
+        name = host.decode() if isinstance(host, bytes) else host
+        if name is not None and name not in _LOCAL_HOSTS:
+            raise OSError(f"network access in tests: lookup of {host!r}")
+        return getaddrinfo(host, *args, **kwargs)
+
+    def guarded_connect(sock, address):
+        if isinstance(address, tuple) and address[0] not in _LOCAL_HOSTS:
+            raise OSError(f"network access in tests: connect to {address!r}")
+        return connect(sock, address)
+
+    monkeypatch.setattr(socket, "getaddrinfo", guarded_getaddrinfo)
+    monkeypatch.setattr(socket.socket, "connect", guarded_connect)
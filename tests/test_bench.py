@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bench.run import ROOT, check, percentile
+
+
+def test_percentile():
+    assert percentile([], 95) is None
+    assert percentile([3.0], 50) == 3.0
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+
+
+def test_check_budgets():
+    summary = {"jobs": 10, "failed": 1, "stages": {"transcribe": {"p95": 2.5}}}
+    assert check(summary, {}, 0.1) == []
+    assert len(check(summary, {}, 0.0)) == 1
+    assert len(check(summary, {"transcribe": 2.0}, 0.1)) == 1
+    assert len(check(summary, {"missing": 1.0}, 0.1)) == 1
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--provider", "openai"],
+        ["--provider", "gemini", "--mode", "per_claim"],
+    ],
+)
+def test_smoke_run_against_stub_providers(tmp_path, options):
+    summary_path = tmp_path / "summary.json"
+    proc = subprocess.run(
+        [
+            sys.executable, "-m", "bench.run",
+            "--jobs", "6",
+            "--concurrency", "3",
+            "--latency", "0.02",
+            "--jitter", "0",
+            "--download-latency", "0.02",
+            "--audio-seconds", "1",
+            "--data-dir", str(tmp_path / "run"),
+            "--json", str(summary_path),
+            *options,
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=180,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    summary = json.loads(Path(summary_path).read_text(encoding="utf-8"))
+    assert (summary["jobs"], summary["completed"], summary["failed"]) == (6, 6, 0)
+    assert summary["stages"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from app.claims import ClaimCache, minhash, normalize_claim, similarity
+from app.schemas import FactCheckReport
+from bench.fixtures import TRANSCRIPT, sample_report
+
+
+WALL = "The Great Wall of China is visible from the Moon with the naked eye."
+
+
+def report(claims: list[str] | None = None, *, age: timedelta = timedelta(0)) -> FactCheckReport:
+    data = sample_report()
+    if claims is not None:
+        template = data["claims"][0]
+        data["claims"] = [{**template, "claim": text} for text in claims]
+    return FactCheckReport.model_validate({**data, "generated_at": datetime.now(tz=timezone.utc) - age})
+
+
+def sig(text: str) -> tuple[int, ...]:
+    return minhash(normalize_claim(text))
+
+
+def test_similarity_thresholds():
+    reworded = "the great wall of china is visible from the moon with a naked eye"
+    assert similarity(sig(WALL), sig(WALL)) == 1.0
+    assert similarity(sig(WALL), sig(reworded)) >= 0.8
+    assert similarity(sig(WALL), sig("Humans only use ten percent of their brains.")) < 0.2
+    assert similarity(sig(""), sig(WALL)) == 0.0
+
+
+def test_match_threshold_language_and_age(tmp_path):
+    cache = ClaimCache(tmp_path)
+    assert cache.add_report(report(), job_id="j1", output_language="en") == 5
+
+    matches = cache.match(["The great wall of China is visible from the moon with a naked eye"], threshold=0.8)
+    assert [m.record.claim for m in matches] == [WALL]
+    assert matches[0].record.job_id == "j1"
+    assert cache.match([WALL], threshold=0.8, output_language="fr") == []
+    assert cache.match(["Completely unrelated sentence about cooking pasta."], threshold=0.5) == []
+
+    old = ClaimCache(tmp_path / "old")
+    old.add_report(report(age=timedelta(days=10)), job_id="j0", output_language="en")
+    assert old.match([WALL], threshold=0.8, max_age=timedelta(days=7)) == []
+
+
+def test_match_transcript_finds_every_claim(tmp_path):
+    cache = ClaimCache(tmp_path)
+    cache.add_report(report(), job_id="j1", output_language="en")
+    matches = cache.match_transcript(TRANSCRIPT, threshold=0.8, output_language="en")
+    assert len(matches) == 5
+    assert all(m.similarity == 1.0 for m in matches)
+
+
+def test_add_report_indexes_only_fresh_factual_claims(tmp_path):
+    cache = ClaimCache(tmp_path)
+    data = report()
+    data.claims[1].verdict = "not_a_factual_claim"
+    assert cache.add_report(data, job_id="j1", output_language="en", only=[0, 1, 3]) == 2
+    assert len(cache) == 2
+    assert cache.match([WALL], threshold=0.8) == []
+
+
+def test_instances_share_the_log_across_compaction(tmp_path):
+    a = ClaimCache(tmp_path)
+    b = ClaimCache(tmp_path)
+    a.add_report(report([WALL]), job_id="a", output_language="en")
+    assert [m.record.job_id for m in b.match([WALL], threshold=0.8)] == ["a"]
+
+    # Re-adding the same claims grows the log until `b` compacts it.
+    others = report(["Lightning never strikes the same place twice.", "Humans only use ten percent of their brains."])
+    for _ in range(1000):
+        b.add_report(others, job_id="b", output_language="en")
+    lines = (tmp_path / "claims" / "claims.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+
+    # `a` notices the rewritten log, and the record it wrote survived.
+    assert [m.record.job_id for m in a.match([WALL], threshold=0.8)] == ["a"]
+    assert len(a) == 3
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import pytest
+
+from app.config import settings
+from app.execution import stage_providers
+
+
+def test_no_failover_by_default():
+    assert stage_providers("fact_check", "gemini") == ["gemini"]
+    assert stage_providers("transcribe", "openai") == ["openai"]
+
+
+def test_configured_failover_is_deduplicated(monkeypatch):
+    monkeypatch.setattr(settings, "fact_check_failover", "OpenAI, gemini, openai")
+    assert stage_providers("fact_check", "gemini") == ["gemini", "openai"]
+
+
+@pytest.mark.parametrize("failover, chain", [("", ["gemini", "openai"]), ("openai,deepseek", ["gemini", "openai"])])
+def test_deepseek_transcription_is_substituted(monkeypatch, failover, chain):
+    monkeypatch.setattr(settings, "transcribe_failover", failover)
+    assert stage_providers("transcribe", "deepseek") == chain
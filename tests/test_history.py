@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.history import HistoryIndex, InvalidCursorError
+from app.schemas import Job
+
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def job(job_id: str, minutes: int, *, status: str = "completed") -> Job:
+    at = BASE + timedelta(minutes=minutes)
+    return Job(id=job_id, url=f"https://example.com/{job_id}", status=status, created_at=at, updated_at=at)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = HistoryIndex(tmp_path / "history.db", tmp_path / "jobs")
+    for i in range(7):
+        index.upsert(job(f"job{i}", i, status="failed" if i % 3 == 0 else "completed"))
+    # Same timestamp: ties are broken by id.
+    index.upsert(job("tie-a", 3))
+    index.upsert(job("tie-b", 3))
+    return index
+
+
+def pages(index: HistoryIndex, **filters) -> list[list[str]]:
+    result, cursor = [], None
+    while True:
+        page = index.list(limit=3, cursor=cursor, **filters)
+        result.append([item.id for item in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            return result
+
+
+def test_cursor_walks_newest_first_without_gaps(index):
+    assert pages(index) == [
+        ["job6", "job5", "job4"],
+        ["tie-b", "tie-a", "job3"],
+        ["job2", "job1", "job0"],
+    ]
+
+
+def test_cursor_is_stable_under_new_writes(index):
+    first = index.list(limit=3)
+    index.upsert(job("newer", 60))
+    second = index.list(limit=3, cursor=first.next_cursor)
+    assert [item.id for item in second.items] == ["tie-b", "tie-a", "job3"]
+
+
+def test_filters_apply_to_every_page(index):
+    assert pages(index, status="failed") == [["job6", "job3", "job0"]]
+
+
+def test_statuses(index):
+    assert index.statuses(["job0", "job1", "missing"]) == {"job0": "failed", "job1": "completed"}
+    assert index.statuses([]) == {}
+
+
+def test_invalid_cursor(index):
+    with pytest.raises(InvalidCursorError):
+        index.list(cursor="not-a-cursor")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.jobcache import JobCache, slim
+from app.schemas import Job
+
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def job(job_id: str, *, transcript: str | None = None) -> Job:
+    return Job(
+        id=job_id,
+        url=f"https://example.com/{job_id}",
+        status="completed",
+        created_at=NOW,
+        updated_at=NOW,
+        transcript=transcript,
+    )
+
+
+def cache(**kwargs) -> JobCache:
+    return JobCache(**{"max_entries": 100, "max_bytes": 1 << 20, "ttl_seconds": 60, **kwargs})
+
+
+def test_evicts_least_recently_used_by_count():
+    jobs = cache(max_entries=2)
+    jobs.put(job("a"))
+    jobs.put(job("b"))
+    assert jobs.get("a") is not None  # "b" is now the oldest
+    jobs.put(job("c"))
+    assert "b" not in jobs
+    assert "a" in jobs and "c" in jobs
+    stats = jobs.stats(pinned=3)
+    assert (stats.entries, stats.evictions, stats.hits, stats.pinned) == (2, 1, 1, 3)
+
+
+def test_evicts_by_size():
+    size = len(job("a").model_dump_json())
+    jobs = cache(max_bytes=size * 2)
+    for job_id in "abc":
+        jobs.put(job(job_id))
+    assert [job_id for job_id in "abc" if job_id in jobs] == ["b", "c"]
+    assert jobs.stats().bytes == size * 2
+
+    # Replacing an entry releases its old size first.
+    jobs.put(job("c"))
+    assert jobs.stats().bytes == size * 2
+
+
+def test_entries_expire_after_ttl():
+    jobs = cache(ttl_seconds=0)
+    jobs.put(job("a"))
+    assert jobs.peek("a") is not None
+    assert jobs.get("a") is None
+    stats = jobs.stats()
+    assert (stats.entries, stats.expirations, stats.misses) == (0, 1, 1)
+
+
+def test_versions_only_move_forward():
+    jobs = cache()
+    jobs.put(job("a"), version=3)
+    jobs.put(job("a"))
+    assert jobs.version("a") == 3
+    jobs.set_version("a", 2)
+    assert jobs.version("a") == 3
+    jobs.set_version("a", 5)
+    assert jobs.version("a") == 5
+    assert jobs.version("missing") == 0
+
+
+def test_slim_drops_content():
+    full = job("a", transcript="hello " * 1000)
+    assert slim(full).transcript is None
+    assert full.transcript is not None
+    light = job("b")
+    assert slim(light) is light
@@ -0,0 +1,556 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import pytest
+
+from app import jobs
+from app.config import settings
+from app.jobs import JobStore
+from app.metrics import BYTES
+from app.openai_pipeline import WHISPER_MODEL
+from app.schemas import AnalyzeRequest, FactCheckReport, Job
+from app.storage import read_json
+from app.ytdlp_audio import DownloadError
+from bench.fixtures import TRANSCRIPT, FakeDownloader, sample_report, write_silence
+
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class Providers:
+    """
+    Stand-ins for yt-dlp and every provider call the pipeline makes. `fail[name]`
+    is raised once; providers in `down` answer every call with a 503. While
+    `hold` is set, transcription waits on it, keeping the job running.
+    """
+
+    def __init__(self, fixture: Path):
+        self.calls: Counter[str] = Counter()
+        self.served: list[tuple[str, str, Optional[str]]] = []
+        self.fail: dict[str, BaseException] = {}
+        self.down: set[str] = set()
+        self.hold: Optional[asyncio.Event] = None
+        self.cancelled = 0
+        # Same bytes on every download, as for re-uploads of one video.
+        self._downloader = FakeDownloader(fixture, duration_seconds=1.0, unique=False)
+
+    def _call(self, name: str, provider: Optional[str] = None, api_key: Optional[str] = None, **options: Any) -> None:
+        if options.get("base_url") == settings.deepseek_base_url:
+            provider = "deepseek"
+        self.calls[name] += 1
+        self.served.append((name, provider, api_key))
+        if provider in self.down:
+            raise Unavailable(f"{provider} is down")
+        error = self.fail.pop(name, None)
+        if error is not None:
+            raise error
+
+    def download_audio(self, **kwargs: Any):
+        self._call("download")
+        return self._downloader.download_audio(**kwargs)
+
+    def probe_video(self, **kwargs: Any) -> dict[str, Any]:
+        raise DownloadError("no metadata in tests")
+
+    def download_subtitles(self, **kwargs: Any) -> Path:
+        raise DownloadError("no subtitles in tests")
+
+    async def transcribe(self, path: Path, *, provider: str, api_key: Optional[str] = None, **options: Any) -> str:
+        self._call("transcribe", provider, api_key, **options)
+        if self.hold is not None:
+            try:
+                await self.hold.wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return TRANSCRIPT
+
+    async def fact_check(
+        self, *, provider: str, api_key: Optional[str] = None, **options: Any
+    ) -> tuple[FactCheckReport, dict[str, Any]]:
+        self._call("fact_check", provider, api_key, **options)
+        data = {**sample_report(), "generated_at": datetime.now(tz=timezone.utc)}
+        return FactCheckReport.model_validate(data), {"model": "stub"}
+
+    async def translate(
+        self, *, provider: str, report: FactCheckReport, output_language: str, api_key: Optional[str] = None, **options: Any
+    ) -> tuple[FactCheckReport, dict[str, Any]]:
+        self._call("translate", provider, api_key, **options)
+        return report.model_copy(update={"summary": f"[{output_language}] {report.summary}"}), {"model": "stub"}
+
+
+@pytest.fixture
+def providers(tmp_path, monkeypatch) -> Providers:
+    for name, value in {
+        "gemini_api_key": "server-gemini",
+        "openai_api_key": "server-openai",
+        "deepseek_api_key": "",
+        "retry_base_delay": 0.0,
+        "retry_max_delay": 0.0,
+        "write_coalesce_seconds": 0.0,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    stubs = Providers(write_silence(tmp_path / "fixture.wav", 1.0))
+    monkeypatch.setattr(jobs, "download_audio", stubs.download_audio)
+    monkeypatch.setattr(jobs, "probe_video", stubs.probe_video)
+    monkeypatch.setattr(jobs, "download_subtitles", stubs.download_subtitles)
+    for provider in ("gemini", "openai"):
+        monkeypatch.setattr(jobs, f"{provider}_transcribe", partial(stubs.transcribe, provider=provider))
+        monkeypatch.setattr(jobs, f"{provider}_fact_check", partial(stubs.fact_check, provider=provider))
+        monkeypatch.setattr(jobs, f"{provider}_translate", partial(stubs.translate, provider=provider))
+    return stubs
+
+
+def run(tmp_path: Path, scenario: Callable[[JobStore], Awaitable[Any]]) -> Any:
+    async def main() -> Any:
+        store = JobStore(tmp_path / "data")
+        try:
+            return await scenario(store)
+        finally:
+            await store.stop()
+
+    return asyncio.run(main())
+
+
+async def analyze(store: JobStore, url: str = URL, *, api_key: Optional[str] = None, **fields: Any) -> Job:
+    fields = {"output_language": "en", "provider": "gemini", **fields}
+    job, _ = await store.find_or_create(url=url, api_key=api_key, **fields)
+    await store.run_pipeline(job.id, api_key)
+    return await store.get(job.id)
+
+
+def test_failed_job_resumes_from_checkpoints(tmp_path, providers):
+    providers.fail["fact_check"] = ValueError("unparseable reply")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store)
+        assert job.status == "failed"
+        assert set(job.checkpoints) == {"download", "transcribe"}
+
+        await store.retry(job.id)
+        await store.run_pipeline(job.id)
+        job = await store.get(job.id)
+        assert job.status == "completed"
+        assert job.attempts == 2
+        assert job.report is not None
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 1, "transcribe": 1, "fact_check": 2}
+
+
+def test_invalid_checkpoint_reruns_its_stage(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "transcript_cache_enabled", False)
+    providers.fail["fact_check"] = ValueError("unparseable reply")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store)
+        # A transcript that no longer matches its checkpoint hash is not trusted.
+        store._transcript_path(job.id).write_text("tampered", encoding="utf-8")
+        await store.retry(job.id)
+        await store.run_pipeline(job.id)
+        job = await store.get(job.id)
+        assert job.status == "completed"
+        assert job.transcript == TRANSCRIPT
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 1, "transcribe": 2, "fact_check": 2}
+
+
+def test_translate_mode_relocalizes_an_existing_report(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        source = await analyze(store, output_language="en")
+        job = await analyze(store, output_language="fr", mode="translate")
+        assert job.status == "completed"
+        assert job.source_job_id == source.id
+        assert job.report.summary == f"[fr] {source.report.summary}"
+        assert [c.verdict for c in job.report.claims] == [c.verdict for c in source.report.claims]
+        assert (job.transcript, job.transcript_source) == (source.transcript, "cache")
+        raw = read_json(store._raw_response_path(job.id))
+        assert (raw["mode"], raw["source_job_id"]) == ("translate", source.id)
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 1, "transcribe": 1, "fact_check": 1, "translate": 1}
+
+
+def test_translate_mode_without_a_report_runs_in_full(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store, output_language="fr", mode="translate")
+        assert (job.status, job.mode) == ("completed", "full")
+        assert job.report.summary == sample_report()["summary"]
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 1, "transcribe": 1, "fact_check": 1}
+
+
+def test_same_video_under_another_url_reuses_the_report(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        first = await analyze(store, URL)
+        second = await analyze(store, "https://youtu.be/dQw4w9WgXcQ")
+        assert second.canonical_id == first.canonical_id == "youtube:dQw4w9WgXcQ"
+        assert (second.status, second.source_job_id) == ("completed", first.id)
+        assert second.report == first.report
+        assert read_json(store._raw_response_path(second.id))["mode"] == "dedupe"
+
+        # Another language needs its own report, but not another transcription.
+        other = await analyze(store, "https://youtu.be/dQw4w9WgXcQ", output_language="fr")
+        assert (other.status, other.transcript_source, other.source_job_id) == ("completed", "cache", None)
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 1, "transcribe": 1, "fact_check": 2}
+
+
+def test_same_audio_under_unrelated_urls_reuses_the_report(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        first = await analyze(store, "https://example.com/videos/1")
+        second = await analyze(store, "https://mirror.example.org/clip.mp4")
+        assert first.canonical_id is None and second.canonical_id is None
+        assert second.checkpoints["download"].sha256 == first.checkpoints["download"].sha256
+        assert (second.status, second.source_job_id) == ("completed", first.id)
+        assert second.transcript == first.transcript
+
+    run(tmp_path, scenario)
+    # Only the download repeats: the audio hash is what identifies the video.
+    assert providers.calls == {"download": 2, "transcribe": 1, "fact_check": 1}
+
+
+def test_forced_run_skips_deduplication(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "force_rerun_min_interval_seconds", 0)
+
+    async def scenario(store: JobStore) -> None:
+        first = await analyze(store, URL)
+        forced = await analyze(store, "https://youtu.be/dQw4w9WgXcQ", force=True)
+        assert forced.id != first.id
+        assert (forced.status, forced.source_job_id) == ("completed", None)
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 2, "transcribe": 2, "fact_check": 2}
+
+
+async def submit(store: JobStore, url: str = URL, **fields: Any) -> tuple[Job, bool]:
+    return await store.find_or_create(url=url, output_language="en", provider="gemini", **fields)
+
+
+def test_concurrent_submissions_share_one_job(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        results = await asyncio.gather(*(submit(store) for _ in range(5)))
+        assert len({job.id for job, _ in results}) == 1
+        assert sorted(cached for _, cached in results) == [False, True, True, True, True]
+
+    run(tmp_path, scenario)
+
+
+def test_forced_rerun_coalesces_within_the_min_interval(tmp_path, providers, monkeypatch):
+    async def scenario(store: JobStore) -> None:
+        job, _ = await submit(store)
+        await store.update(job.id, status="completed", progress=100)
+
+        joined, cached = await submit(store)
+        assert (joined.id, cached) == (job.id, True)
+        # A burst of forced re-runs right after completion joins the fresh result.
+        forced, cached = await submit(store, force=True)
+        assert (forced.id, cached) == (job.id, True)
+
+        monkeypatch.setattr(settings, "force_rerun_min_interval_seconds", 0)
+        forced, cached = await submit(store, force=True)
+        assert (forced.id != job.id, cached) == (True, False)
+        # Forced and plain requests then join the running re-run.
+        assert (await submit(store, force=True))[0].id == forced.id
+        assert (await submit(store))[0].id == forced.id
+
+    run(tmp_path, scenario)
+
+
+def test_failed_jobs_are_not_joined(tmp_path, providers):
+    async def scenario(store: JobStore) -> None:
+        job, _ = await submit(store)
+        await store.update(job.id, status="failed", progress=100, error="boom")
+        again, cached = await submit(store)
+        assert (again.id != job.id, cached) == (True, False)
+
+    run(tmp_path, scenario)
+
+
+def test_audio_dedupe_uses_the_decoded_samples_hash(tmp_path, providers, monkeypatch):
+    providers._downloader.unique = True
+    download = providers.download_audio
+
+    def download_audio(**kwargs: Any):
+        # Different container bytes, same samples.
+        path, stats = download(**kwargs)
+        return path, stats.model_copy(update={"pcm_sha256": "same-samples"})
+
+    monkeypatch.setattr(jobs, "download_audio", download_audio)
+
+    async def scenario(store: JobStore) -> None:
+        first = await analyze(store, "https://example.com/videos/1")
+        second = await analyze(store, "https://mirror.example.org/clip.mp4")
+        assert second.checkpoints["download"].sha256 != first.checkpoints["download"].sha256
+        assert (second.status, second.source_job_id) == ("completed", first.id)
+
+    run(tmp_path, scenario)
+    assert providers.calls == {"download": 2, "transcribe": 1, "fact_check": 1}
+
+
+def test_own_key_requests_do_not_fail_over_to_server_keys(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "fact_check_failover", "openai")
+    providers.down.add("gemini")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store, api_key="user-gemini")
+        assert job.status == "failed"
+        assert "gemini is down" in job.error
+
+    run(tmp_path, scenario)
+    assert {provider for _, provider, _ in providers.served} == {"gemini", None}
+
+
+@pytest.mark.parametrize("api_key, allow", [(None, False), ("user-gemini", True)])
+def test_failover_to_server_keys(tmp_path, providers, monkeypatch, api_key, allow):
+    monkeypatch.setattr(settings, "fact_check_failover", "openai")
+    monkeypatch.setattr(settings, "allow_server_key_failover", allow)
+    providers.fail["fact_check"] = Unavailable("gemini is down")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store, api_key=api_key)
+        assert job.status == "completed"
+        execution = read_json(store._raw_response_path(job.id))["execution"]
+        assert [(r["stage"], r["provider"], r["reason"], r["server_key_failover"]) for r in execution] == [
+            ("transcribe", "gemini", "primary", False),
+            ("fact_check", "openai", "failover", True),
+        ]
+
+    run(tmp_path, scenario)
+    assert providers.served[-1] == ("fact_check", "openai", "server-openai")
+
+
+def test_withheld_failover_is_recorded(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "fact_check_failover", "openai")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store, api_key="user-gemini")
+        execution = read_json(store._raw_response_path(job.id))["execution"]
+        fact_check = execution[-1]
+        assert (fact_check["provider"], fact_check["server_key_failover"], fact_check["withheld"]) == (
+            "gemini", False, ["openai"],
+        )
+
+    run(tmp_path, scenario)
+    assert ("fact_check", "gemini", "user-gemini") in providers.served
+
+
+def test_deepseek_transcribes_on_a_server_key(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "deepseek_api_key", "server-deepseek")
+    providers.down.add("gemini")
+
+    async def scenario(store: JobStore) -> None:
+        job = await analyze(store, provider="deepseek", api_key="user-deepseek")
+        assert job.status == "completed"
+
+    run(tmp_path, scenario)
+    # DeepSeek can't transcribe: Gemini, then OpenAI stand in; the user's key only goes to DeepSeek.
+    assert [s for s in providers.served if s[0] != "download"] == [
+        ("transcribe", "gemini", "server-gemini"),
+        ("transcribe", "openai", "server-openai"),
+        ("fact_check", "deepseek", "user-deepseek"),
+    ]
+
+
+def uploaded_bytes(provider: str, model: str) -> float:
+    labels = f'{{kind="uploaded",provider="{provider}",model="{model}"}}'
+    lines = [line for line in BYTES.render() if line.startswith(f"{BYTES.name}{labels} ")]
+    return float(lines[0].rsplit(" ", 1)[1]) if lines else 0
+
+
+def test_uploaded_bytes_are_counted_per_provider_and_model(tmp_path, providers):
+    providers.down.add("gemini")
+    before = uploaded_bytes("openai", WHISPER_MODEL), uploaded_bytes("gemini", settings.transcribe_model)
+
+    async def scenario(store: JobStore) -> int:
+        job = await analyze(store, provider="deepseek")
+        assert job.status == "completed"
+        return job.audio_stats.encoded_bytes
+
+    size = run(tmp_path, scenario)
+    after = uploaded_bytes("openai", WHISPER_MODEL), uploaded_bytes("gemini", settings.transcribe_model)
+    # Both transcription attempts uploaded the audio.
+    assert (after[0] - before[0], after[1] - before[1]) == (size, size)
+
+
+def test_batch_export_reads_reports_only(tmp_path, providers, monkeypatch):
+    from app.batches import BatchStore
+
+    async def scenario(store: JobStore) -> list[dict[str, Any]]:
+        job = await analyze(store)
+        batches = BatchStore(tmp_path / "data", store)
+        batch = await batches.create([AnalyzeRequest(url=URL, output_language="en")], ["user-gemini"])
+
+        def no_transcripts(job: Job) -> Job:
+            raise AssertionError(f"read the transcript of {job.id}")
+
+        monkeypatch.setattr(store, "_read_content", no_transcripts)
+        lines = [json.loads(line) async for line in batches.export(batch.id)]
+        assert [(line["job_id"], line["status"]) for line in lines] == [(job.id, "completed")]
+        return lines
+
+    lines = run(tmp_path, scenario)
+    assert lines[0]["report"]["summary"] == sample_report()["summary"]
+
+
+async def eventually(check: Callable[[], Awaitable[bool]], timeout: float = 5) -> None:
+    async def poll() -> None:
+        while not await check():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def record_runs(store: JobStore) -> list[bool]:
+    """Outcomes of the store's pipeline runs; install before `start`."""
+    outcomes: list[bool] = []
+    run_pipeline = store.run_pipeline
+
+    async def spy(job_id: str, api_key: Optional[str] = None) -> bool:
+        outcomes.append(await run_pipeline(job_id, api_key))
+        return outcomes[-1]
+
+    store.run_pipeline = spy
+    return outcomes
+
+
+# Two JobStores on one data dir stand in for two worker processes: each has its own lease owner.
+OTHER_URL = "https://www.youtube.com/watch?v=9bZkp7q19f0"
+
+
+async def queued(store: JobStore, url: str = URL) -> Job:
+    job, _ = await submit(store, url)
+    await store.submit(job.id)
+    return job
+
+
+def test_restart_resumes_only_jobs_whose_process_is_gone(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "max_concurrent_jobs", 1)
+
+    async def main() -> None:
+        providers.hold = asyncio.Event()
+        first = JobStore(tmp_path / "data")
+        await first.start()
+        running = await queued(first)
+        waiting = await queued(first, OTHER_URL)
+
+        async def transcribing() -> bool:
+            return providers.calls["transcribe"] == 1
+
+        await eventually(transcribing)
+        await first.flush()
+
+        # One job is leased, the other queued by a live process: a sibling starting now takes neither.
+        sibling = JobStore(tmp_path / "data")
+        await sibling.start()
+        assert sibling.scheduler.depth == 0
+        await sibling.stop()
+
+        await first.stop()
+        providers.hold = None
+        restarted = JobStore(tmp_path / "data")
+        await restarted.start()
+
+        async def finished() -> bool:
+            statuses = await restarted.statuses([running.id, waiting.id])
+            return set(statuses.values()) == {"completed"}
+
+        try:
+            await eventually(finished)
+        finally:
+            await restarted.stop()
+
+    asyncio.run(main())
+
+
+def test_a_job_leased_elsewhere_keeps_its_queue_record(tmp_path, providers):
+    async def main() -> None:
+        providers.hold = asyncio.Event()
+        first = JobStore(tmp_path / "data")
+        first_runs = record_runs(first)
+        await first.start()
+        job = await queued(first)
+
+        async def transcribing() -> bool:
+            return providers.calls["transcribe"] == 1
+
+        await eventually(transcribing)
+        sibling = JobStore(tmp_path / "data")
+        runs = record_runs(sibling)
+        await sibling.start()
+        await sibling.submit(job.id)
+
+        async def declined() -> bool:
+            return runs == [False]
+
+        await eventually(declined)
+        await sibling.flush()
+        assert [job_id for job_id, _ in sibling.scheduler.persisted()] == [job.id]
+
+        providers.hold.set()
+
+        async def finished() -> bool:
+            return first_runs == [True]
+
+        await eventually(finished)
+        await first.stop()
+        assert sibling.scheduler.persisted() == []
+        await sibling.stop()
+
+    asyncio.run(main())
+
+
+def test_losing_the_lease_stops_the_run(tmp_path, providers, monkeypatch):
+    monkeypatch.setattr(settings, "lease_ttl_seconds", 0.5)
+
+    async def main() -> None:
+        providers.hold = asyncio.Event()
+        first = JobStore(tmp_path / "data")
+        runs = record_runs(first)
+        await first.start()
+        job = await queued(first)
+
+        async def transcribing() -> bool:
+            return providers.calls["transcribe"] == 1
+
+        await eventually(transcribing)
+        # The lease runs out before the next renewal and a sibling takes the job.
+        await asyncio.sleep(0.6)
+        sibling = JobStore(tmp_path / "data")
+        assert sibling._state.acquire_lease(f"job:{job.id}", sibling._owner, 60)
+
+        async def stopped() -> bool:
+            return runs == [False]
+
+        await eventually(stopped)
+        assert providers.cancelled == 1
+        await first.flush()
+        assert read_json(first._job_path(job.id))["status"] == "transcribing"
+        assert [job_id for job_id, _ in sibling.scheduler.persisted()] == [job.id]
+
+        # The worker survives and serves the next job.
+        providers.hold = None
+        other = await queued(first, OTHER_URL)
+
+        async def finished() -> bool:
+            return (await first.statuses([other.id])).get(other.id) == "completed"
+
+        await eventually(finished)
+        await first.stop()
+        await sibling.stop()
+
+    asyncio.run(main())
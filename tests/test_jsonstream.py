@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.jsonstream import JsonStream
+
+
+def snapshot(text: str):
+    stream = JsonStream()
+    stream.feed(text)
+    return stream.snapshot()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", None),
+        ("Sure, here is the report", None),
+        ('{"summary": "Hel', {"summary": "Hel"}),
+        ('{"a": 1, "b', {"a": 1}),
+        ('{"a": true,', {"a": True}),
+        # A number or literal may still grow, so it is held back.
+        ('{"a": 12', {}),
+        ('Sure: {"a": tr', {}),
+        ('{"a": "x\\', {"a": "x"}),
+        ('{"a": "x\\u00', {"a": "x"}),
+        ('{"a": "x\\\\', {"a": "x\\"}),
+        ('```json\n{"claims": [{"claim": "x", "verdict": "fa', {"claims": [{"claim": "x", "verdict": "fa"}]}),
+        ('{"a": [1, 2', {"a": [1]}),
+        ('{"a": {"b": "c"}} trailing prose {', {"a": {"b": "c"}}),
+    ],
+)
+def test_prefix_snapshots(text, expected):
+    assert snapshot(text) == expected
+
+
+def test_every_prefix_parses_and_converges():
+    document = {
+        "overall_score": 35,
+        "summary": "Line one.\nA \"quoted\" word and a backslash \\ here.",
+        "claims": [
+            {"claim": "The Great Wall is visible from the Moon.", "verdict": "false", "confidence": 90},
+            {"claim": "Water boils at 100 °C at sea level.", "verdict": "true", "sources": []},
+        ],
+        "limitations": None,
+    }
+    text = "```json\n" + json.dumps(document, ensure_ascii=False, indent=2) + "\n```"
+    stream = JsonStream()
+    for ch in text:
+        stream.feed(ch)
+        value = stream.snapshot()
+        assert value is None or isinstance(value, dict)
+    assert stream.snapshot() == document
+    assert stream.text == text
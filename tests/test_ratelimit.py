@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.ratelimit import RateLimiter, TokenBucket, estimate_tokens, tokens_used
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(60)  # one unit per second
+    now = bucket._updated
+    assert bucket.wait_time(60, now) == 0.0
+    bucket.take(60, now)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(30, now + 30) == 0.0
+
+
+def test_bucket_caps_level_and_request_size():
+    bucket = TokenBucket(60)
+    now = bucket._updated
+    assert bucket.wait_time(1, now + 3600) == 0.0
+    assert bucket.level == 60
+    bucket.take(60, now + 3600)
+    # Asking for more than the capacity waits for a full bucket, not forever.
+    assert bucket.wait_time(600, now + 3600) == pytest.approx(60.0)
+
+
+def test_bucket_debt_from_underestimates():
+    bucket = TokenBucket(60)
+    now = bucket._updated
+    bucket.take(90, now)
+    assert bucket.level == pytest.approx(-30)
+    assert bucket.wait_time(1, now) == pytest.approx(31.0)
+
+
+def test_unlimited_bucket():
+    bucket = TokenBucket(0)
+    bucket.take(10**6, bucket._updated)
+    assert bucket.wait_time(10**6, bucket._updated) == 0.0
+
+
+def test_token_accounting():
+    assert estimate_tokens("a" * 400, "") == 101
+    assert tokens_used({"usage": {"total_tokens": 42}}) == 42
+    assert tokens_used({"usage_metadata": {"total_token_count": 7}}) == 7
+    assert tokens_used({"usage_metadata": {"total_token_count": 0}}) is None
+    assert tokens_used(None) is None
+
+
+def test_least_recently_used_idle_limiters_are_dropped():
+    limiters = RateLimiter(max_keys=2)
+    a = limiters.limiter("gemini", "key-a")
+    limiters.limiter("gemini", "key-b")
+    assert limiters.limiter("gemini", "key-a") is a
+    limiters.limiter("gemini", "key-c")
+    assert len(limiters) == 2
+    assert limiters.limiter("gemini", "key-a") is a
+
+
+def test_busy_limiters_are_kept_past_the_bound():
+    limiters = RateLimiter(max_keys=1)
+    busy = limiters.limiter("gemini", "key-a")
+    busy.requests.take(1, time.monotonic())
+    limiters.limiter("gemini", "key-b")
+    assert len(limiters) == 2
+    assert limiters.limiter("gemini", "key-a") is busy
+    # key-b was idle, so it makes room once the bound is exceeded again.
+    limiters.limiter("gemini", "key-c")
+    assert len(limiters) == 2
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.retry import is_quota_exhausted, is_rate_limit_error, is_transient_error, retry_async
+from app.ytdlp_audio import DownloadError
+
+
+class HTTPError(Exception):
+    def __init__(self, message: str = "", status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SDKError(Exception):
+    """Stands in for an exception raised by a provider SDK."""
+
+
+SDKError.__module__ = "openai._exceptions"
+
+
+def wrapped(exc: BaseException) -> RuntimeError:
+    try:
+        raise RuntimeError("Transcription failed") from exc
+    except RuntimeError as e:
+        return e
+
+
+@pytest.mark.parametrize(
+    "exc, transient, rate_limited",
+    [
+        (HTTPError(status_code=429), True, True),
+        (HTTPError(status_code=503), True, False),
+        (HTTPError(status_code=409), False, False),
+        (HTTPError(status_code=400), False, False),
+        (TimeoutError(), True, False),
+        (ConnectionResetError(), True, False),
+        (wrapped(HTTPError(status_code=502)), True, False),
+        (SDKError("Resource exhausted, please retry"), True, True),
+        (SDKError("The server is overloaded"), True, False),
+        # Our own and yt-dlp messages are not matched against provider markers.
+        (RuntimeError("rate limit"), False, False),
+        (RuntimeError("Video unavailable"), False, False),
+        (DownloadError("ERROR: Video unavailable"), False, False),
+        (DownloadError("ERROR: Private video"), False, False),
+        (DownloadError("ERROR: Read timed out."), True, False),
+        (wrapped(DownloadError("ERROR: HTTP Error 503: Service Unavailable")), True, False),
+        # Out of credit: waiting won't help, even though it arrives as a 429.
+        (HTTPError("You exceeded your current quota", status_code=429), False, False),
+        (SDKError("429 RESOURCE_EXHAUSTED: GenerateRequestsPerDayPerProjectPerModel"), False, False),
+    ],
+)
+def test_classification(exc, transient, rate_limited):
+    assert is_transient_error(exc) is transient
+    assert is_rate_limit_error(exc) is rate_limited
+
+
+def test_quota_exhausted_through_cause():
+    assert is_quota_exhausted(wrapped(SDKError("Error code: 429 - insufficient_quota")))
+    assert not is_quota_exhausted(HTTPError(status_code=429))
+
+
+class Flaky:
+    def __init__(self, *errors: BaseException):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def retry(fn, **kwargs):
+    kwargs = {"attempts": 3, "base_delay": 0, "max_delay": 0, **kwargs}
+    return asyncio.run(retry_async(fn, **kwargs))
+
+
+def test_retries_transient_errors_until_success():
+    fn = Flaky(TimeoutError(), HTTPError(status_code=503))
+    seen = []
+
+    async def on_retry(attempt, exc, delay):
+        seen.append((attempt, type(exc).__name__, delay))
+
+    assert retry(fn, on_retry=on_retry) == "ok"
+    assert fn.calls == 3
+    assert seen == [(1, "TimeoutError", 0), (2, "HTTPError", 0)]
+
+
+def test_gives_up_after_attempts():
+    fn = Flaky(*[TimeoutError()] * 5)
+    with pytest.raises(TimeoutError):
+        retry(fn)
+    assert fn.calls == 3
+
+
+def test_permanent_errors_fail_fast():
+    for error in (HTTPError(status_code=409), DownloadError("ERROR: Video unavailable")):
+        fn = Flaky(error)
+        with pytest.raises(type(error)):
+            retry(fn)
+        assert fn.calls == 1
+
+
+def test_rate_limits_get_their_own_budget():
+    fn = Flaky(*[HTTPError(status_code=429)] * 4)
+    assert retry(fn, rate_limit_attempts=5) == "ok"
+    assert fn.calls == 5
+
+    fn = Flaky(*[HTTPError(status_code=503)] * 4)
+    with pytest.raises(HTTPError):
+        retry(fn, rate_limit_attempts=5)
+    assert fn.calls == 3
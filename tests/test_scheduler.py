@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.scheduler import JobScheduler, QueueFullError
+from app.state import SqliteStateBackend
+from app.storage import CoalescingWriter, write_json
+
+
+def scheduler(tmp_path, **kwargs) -> JobScheduler:
+    state = SqliteStateBackend(tmp_path / "state.db")
+    kwargs = {"workers": 1, "max_queue_size": 3, "stage_limits": {}, **kwargs}
+    return JobScheduler(tmp_path / "queue.json", CoalescingWriter(delay=0), state, **kwargs)
+
+
+def test_jobs_run_in_order(tmp_path):
+    async def main() -> list[str]:
+        queue = scheduler(tmp_path)
+        for job_id in ("a", "b", "c"):
+            await queue.enqueue(job_id)
+        assert [queue.position(j) for j in ("a", "b", "c", "missing")] == [1, 2, 3, None]
+
+        order: list[str] = []
+        done = asyncio.Event()
+
+        async def runner(job_id: str, api_key) -> None:
+            order.append(job_id)
+            if len(order) == 3:
+                done.set()
+
+        await queue.start(runner)
+        await asyncio.wait_for(done.wait(), 5)
+        await queue.stop()
+        return order
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+
+
+def test_queue_is_bounded(tmp_path):
+    async def main() -> None:
+        queue = scheduler(tmp_path)
+        for job_id in ("a", "b", "c"):
+            await queue.enqueue(job_id)
+        with pytest.raises(QueueFullError):
+            await queue.enqueue("d")
+        # Enqueueing a waiting job again is a no-op, not an error.
+        await queue.enqueue("a")
+        assert queue.depth == 3
+
+    asyncio.run(main())
+
+
+def test_stage_limits(tmp_path):
+    async def main() -> int:
+        queue = scheduler(tmp_path, workers=4, stage_limits={"transcribe": 2})
+        running = peak = 0
+
+        async def work() -> None:
+            nonlocal running, peak
+            async with queue.stage("transcribe"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return peak
+
+    assert asyncio.run(main()) == 2
+
+
+def test_queue_is_shared_through_the_state_backend(tmp_path):
+    async def main() -> tuple[list, list]:
+        queue = scheduler(tmp_path)
+        for job_id in ("a", "b", "c"):
+            await queue.enqueue(job_id)
+        await queue._writer.flush()
+        # Another process opening the same state sees every waiting job, oldest first.
+        waiting = scheduler(tmp_path).persisted()
+
+        done = asyncio.Event()
+
+        async def runner(job_id: str, api_key) -> None:
+            if job_id == "c":
+                done.set()
+
+        await queue.start(runner)
+        await asyncio.wait_for(done.wait(), 5)
+        await queue.stop()
+        await queue._writer.flush()
+        return waiting, scheduler(tmp_path).persisted()
+
+    waiting, left = asyncio.run(main())
+    assert waiting == [("a", ""), ("b", ""), ("c", "")]
+    assert left == []
+
+
+def test_legacy_queue_file_is_imported(tmp_path):
+    write_json(tmp_path / "queue.json", {"jobs": ["old1", "old2"]})
+
+    async def main() -> list:
+        queue = scheduler(tmp_path)
+        done = asyncio.Event()
+
+        async def runner(job_id: str, api_key) -> None:
+            await done.wait()
+
+        groups = dict(queue.persisted())
+        await queue.start(runner, resume=list(groups), groups=groups)
+        persisted = scheduler(tmp_path).persisted()
+        done.set()
+        await queue.stop()
+        return persisted
+
+    assert asyncio.run(main()) == [("old1", ""), ("old2", "")]
+    assert not (tmp_path / "queue.json").exists()
+
+
+async def fill_groups(queue: JobScheduler) -> None:
+    for job_id in ("a1", "a2", "a3"):
+        await queue.enqueue(job_id, group="batch-a")
+    await queue.enqueue("x1")
+    await queue.enqueue("b1", group="batch-b")
+
+
+def test_groups_take_turns(tmp_path):
+    async def main() -> list[str]:
+        queue = scheduler(tmp_path)
+        await fill_groups(queue)
+        assert [queue.position(j) for j in ("a1", "x1", "b1", "a2", "a3")] == [1, 2, 3, 4, 5]
+
+        order: list[str] = []
+        done = asyncio.Event()
+
+        async def runner(job_id: str, api_key) -> None:
+            order.append(job_id)
+            if len(order) == 5:
+                done.set()
+
+        await queue.start(runner)
+        await asyncio.wait_for(done.wait(), 5)
+        await queue.stop()
+        return order
+
+    assert asyncio.run(main()) == ["a1", "x1", "b1", "a2", "a3"]
+
+
+def test_queue_limit_is_per_group(tmp_path):
+    async def main() -> list:
+        queue = scheduler(tmp_path)
+        await fill_groups(queue)
+        with pytest.raises(QueueFullError):
+            await queue.enqueue("a4", group="batch-a")
+        await queue.enqueue("x2")
+        await queue._writer.flush()
+        return scheduler(tmp_path).persisted()
+
+    assert asyncio.run(main()) == [
+        ("a1", "batch-a"), ("a2", "batch-a"), ("a3", "batch-a"), ("x1", ""), ("b1", "batch-b"), ("x2", ""),
+    ]
+
+
+def test_only_one_process_adopts_an_orphaned_job(tmp_path):
+    async def main() -> None:
+        gone = scheduler(tmp_path)
+        await gone.enqueue("a", group="batch-a")
+        await gone._writer.flush()
+
+        first, second = scheduler(tmp_path), scheduler(tmp_path)
+        assert first.adopt("a", "", lambda owner: owner != gone.owner) is None
+        assert first.adopt("a", "", lambda owner: owner == gone.owner) == "batch-a"
+        # The record is first's now, which is alive as far as second can tell.
+        assert second.adopt("a", "", lambda owner: owner == gone.owner) is None
+        # Jobs without a record (e.g. unfinished in history) are adopted once too.
+        assert first.adopt("b", "", lambda owner: not owner) == ""
+        assert second.adopt("b", "", lambda owner: not owner) is None
+        assert first.persisted() == [("a", "batch-a"), ("b", "")]
+
+    asyncio.run(main())
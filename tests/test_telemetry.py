@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.telemetry import collect_stats, record_stat, timed
+
+
+def test_timed_sums_repeated_steps():
+    with collect_stats() as stats:
+        for _ in range(3):
+            with timed("upload_seconds"):
+                time.sleep(0.02)
+        record_stat("bytes_encoded", 123)
+    assert stats["upload_seconds"] >= 0.06
+    assert stats["bytes_encoded"] == 123
+
+
+def test_stats_reach_worker_threads():
+    def work() -> None:
+        with timed("encode_seconds"):
+            record_stat("chunks", 2)
+
+    async def main() -> dict:
+        with collect_stats() as stats:
+            await asyncio.to_thread(work)
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["chunks"] == 2
+    assert "encode_seconds" in stats
+
+
+def test_outside_collection_is_a_no_op():
+    with timed("ignored"):
+        record_stat("ignored", 1)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from app.state import SqliteStateBackend
+from app.storage import JournaledIndex
+from app.transcripts import TranscriptCache, audio_key, url_key, video_key
+
+
+def test_aliases_are_shared_between_processes(tmp_path):
+    # Two worker processes: separate connections to the same state database.
+    first = TranscriptCache(tmp_path, SqliteStateBackend(tmp_path / "state.db"))
+    second = TranscriptCache(tmp_path, SqliteStateBackend(tmp_path / "state.db"))
+
+    first.store("first transcript", [url_key("https://a"), audio_key("aa")])
+    second.store("second transcript", [url_key("https://b")])
+
+    assert second.lookup([url_key("https://a")]) == "first transcript"
+    assert first.lookup([video_key("yt:1"), url_key("https://b")]) == "second transcript"
+    assert first.lookup([video_key("yt:1")]) is None
+
+
+def test_legacy_aliases_are_imported_once(tmp_path):
+    TranscriptCache(tmp_path, SqliteStateBackend(tmp_path / "old.db")).store("old transcript", [])
+    legacy = JournaledIndex(tmp_path / "transcripts" / "aliases.json", tmp_path / "transcripts" / "aliases.journal")
+    digest = next(p.stem for p in (tmp_path / "transcripts").glob("*.txt"))
+    legacy.set(url_key("https://old"), digest)
+    legacy.persist()
+
+    state = SqliteStateBackend(tmp_path / "state.db")
+    cache = TranscriptCache(tmp_path, state)
+    assert cache.lookup([url_key("https://old")]) == "old transcript"
+
+    # A newer alias written through the state backend is not overwritten on the next start.
+    cache.store("new transcript", [url_key("https://old")])
+    assert TranscriptCache(tmp_path, state).lookup([url_key("https://old")]) == "new transcript"
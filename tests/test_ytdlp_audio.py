@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app import ytdlp_audio
+from app.storage import sha256_file
+from app.ytdlp_audio import download_audio, encode_audio, pcm_sha256
+from bench.fixtures import write_silence
+
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+
+@pytest.fixture
+def fake_ytdlp(tmp_path, monkeypatch) -> Path:
+    """`yt-dlp` copies a local fixture into place; every other command (ffmpeg) really runs."""
+    fixture = write_silence(tmp_path / "fixture.wav", 2.0, sample_rate=44100)
+    run = subprocess.run
+
+    def fake_run(cmd, *args, **kwargs):
+        if cmd[0] != "yt-dlp":
+            return run(cmd, *args, **kwargs)
+        target = Path(cmd[cmd.index("-o") + 1].replace("%(ext)s", "wav"))
+        shutil.copyfile(fixture, target)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(ytdlp_audio.subprocess, "run", fake_run)
+    return fixture
+
+
+def test_encode_is_bit_exact(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(
+        ytdlp_audio.subprocess,
+        "run",
+        lambda cmd, **kwargs: commands.append(cmd) or Path(cmd[-1]).touch() or subprocess.CompletedProcess(cmd, 0),
+    )
+    encode_audio(tmp_path / "source.webm", tmp_path / "audio.ogg")
+    cmd = commands[0]
+    # Without these the Ogg muxer picks a random stream serial on every run.
+    assert cmd[cmd.index("-fflags") + 1] == "+bitexact"
+    assert cmd[cmd.index("-flags:a") + 1] == "+bitexact"
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("codec", ["opus", "flac", "mp3"])
+def test_same_source_downloads_to_the_same_hash(tmp_path, fake_ytdlp, codec):
+    first, first_stats = download_audio(url="https://example.com/a", out_dir=tmp_path / "a", codec=codec)
+    second, second_stats = download_audio(url="https://example.com/b", out_dir=tmp_path / "b", codec=codec)
+    assert sha256_file(first) == sha256_file(second)
+    assert first_stats.pcm_sha256 is not None
+    assert first_stats.pcm_sha256 == second_stats.pcm_sha256
+
+
+@needs_ffmpeg
+def test_pcm_hash_ignores_the_container(tmp_path, fake_ytdlp):
+    flac = encode_audio(fake_ytdlp, tmp_path / "audio.flac", codec="flac")
+    wav = tmp_path / "audio.wav"
+    subprocess.run(["ffmpeg", "-loglevel", "error", "-i", str(flac), str(wav)], check=True)
+    assert pcm_sha256(flac) == pcm_sha256(wav)